@@ -0,0 +1,384 @@
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+"""
+Benchmark suite for the game logic and the UI hot paths
+Runs on a headless machine: widgets are built against Kivy's mock GL backend
+and SDL's offscreen video driver, and only the benchmarks that need them
+import Kivy. Results are written as JSON and can be compared against a
+saved baseline; the exit status is 1 when a benchmark got slower than the
+threshold allows.
+
+    python bench.py --output bench.json
+    python bench.py --baseline bench.json
+"""
+
+BENCHMARKS = {}  # name -> (factory, needs Kivy)
+
+
+def benchmark(name, ui=False):
+    """
+    Register a benchmark factory
+    The factory returns (setup, run): setup (or None) prepares the state before
+    every call and is not timed, run is the call being measured.
+    """
+    def register(factory):
+        BENCHMARKS[name] = (factory, ui)
+        return factory
+    return register
+
+
+def headless():
+    """
+    Point Kivy at the mock GL backend and SDL at the offscreen driver, before Kivy is imported
+    """
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+    os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+    if not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'):
+        os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    # the game screen writes its statistics, replay log and snapshot, keep them out of the real files
+    scratch = tempfile.mkdtemp(prefix='wordle-bench-')
+    os.environ['WORDLE_STATS'] = os.path.join(scratch, 'stats.db')
+    os.environ['WORDLE_REPLAY'] = os.path.join(scratch, 'replays.bin')
+    os.environ['WORDLE_SNAPSHOT'] = os.path.join(scratch, 'snapshot.bin')
+
+
+def measure(setup, run, min_time=0.2, repeats=5):
+    """
+    Time run() after setup(), calling both until each repeat has spent min_time
+
+    Return:
+        list: Mean seconds per call of every repeat
+    """
+    perf_counter = time.perf_counter
+    # cost of the two timer reads around an empty call, removed from every sample
+    overhead = min(_timer_overhead() for _ in range(5))
+    samples = []
+    for _ in range(repeats):
+        timed = 0.0
+        calls = 0
+        deadline = perf_counter() + min_time
+        while calls == 0 or perf_counter() < deadline:
+            if setup is not None:
+                setup()
+            start = perf_counter()
+            run()
+            timed += perf_counter() - start
+            calls += 1
+        samples.append(max(0.0, timed / calls - overhead))
+    return samples
+
+
+def _timer_overhead(calls=10000):
+    perf_counter = time.perf_counter
+    noop = lambda: None
+    timed = 0.0
+    for _ in range(calls):
+        start = perf_counter()
+        noop()
+        timed += perf_counter() - start
+    return timed / calls
+
+
+"""
+Game logic
+"""
+def answer_words():
+    from words import load_words, ANSWERS_PATH
+    return list(load_words(ANSWERS_PATH))
+
+
+@benchmark('scoring.score_guess')
+def bench_score_guess():
+    from scoring import score_guess
+    pairs = itertools.cycle([('SPEED', 'ERASE'), ('CRANE', 'APPLE'), ('LLAMA', 'HELLO'), ('TIGER', 'TIGER')])
+    return None, lambda: score_guess(*next(pairs))
+
+
+@benchmark('scoring.pattern_table')
+def bench_pattern_table():
+    from scoring import PatternTable
+    words = answer_words()
+    return None, lambda: PatternTable(words)
+
+
+@benchmark('engine.type_and_submit')
+def bench_submit():
+    from engine import WordleGame
+    game = WordleGame('APPLE')
+
+    def run():
+        for letter in 'CRANE':
+            game.type_letter(letter)
+        game.submit()
+    return game.reset, run
+
+
+@benchmark('solver.second_guess')
+def bench_solver():
+    from solver import Solver
+    from scoring import score_guess, encode
+    solver = Solver(answer_words())
+    opening = solver.best_guess()
+    history = [(opening, encode(score_guess(opening, 'FLOCK')))]
+    return None, lambda: solver.best_guess(history)
+
+
+def gacha_benchmark(effect, prepare=None):
+    """
+    Benchmark of one Gacha effect, prepare(game, gacha) sets up a board it has work to do on
+    """
+    def factory():
+        from engine import WordleGame
+        from gacha import Gacha
+        from rng import GameRandom
+        game = WordleGame('APPLE', rng=GameRandom(0))
+        gacha = Gacha(verbose=False)
+        apply = getattr(gacha, effect)
+
+        def setup():
+            game.reset()
+            if prepare is not None:
+                prepare(game, gacha)
+        return setup, lambda: apply(game, game.current_row)
+    return factory
+
+
+def _cursed(game, gacha):
+    for _ in range(3):
+        gacha.add_curse(game, game.current_row)
+
+
+def _tries_removed(game, gacha):
+    for letter in 'CRANE':
+        game.type_letter(letter)
+    game.submit()
+    gacha.remove_tries(game, game.current_row)
+
+
+benchmark('gacha.remove_tries')(gacha_benchmark('remove_tries'))
+benchmark('gacha.add_curse')(gacha_benchmark('add_curse'))
+benchmark('gacha.lose_game')(gacha_benchmark('lose_game'))
+benchmark('gacha.add_tries')(gacha_benchmark('add_tries', _tries_removed))
+benchmark('gacha.remove_curse')(gacha_benchmark('remove_curse', _cursed))
+benchmark('gacha.hint_one_letter')(gacha_benchmark('hint_one_letter'))
+benchmark('gacha.win_game')(gacha_benchmark('win_game'))
+
+
+@benchmark('snapshot.encode_decode')
+def bench_snapshot():
+    import snapshot
+    from engine import WordleGame
+    from gacha import Gacha
+    from rng import GameRandom
+    game = WordleGame('APPLE', rng=GameRandom(0))
+    Gacha(verbose=False).add_curse(game, 0)  # one random stream in use, as after a gacha roll
+    for letter in 'CRANE':
+        game.type_letter(letter)
+    game.submit()
+    return None, lambda: snapshot.decode(snapshot.encode(game, ['add_curse'], 10.0))
+
+
+def simulated_game_benchmark(policy_name):
+    def factory():
+        from scoring import PatternTable
+        from simulate import Simulator, POLICIES
+        simulator = Simulator(PatternTable(answer_words()), 6, POLICIES[policy_name])
+        seeds = itertools.count()
+        return None, lambda: simulator.run(1, next(seeds))
+    return factory
+
+
+benchmark('simulate.game_never')(simulated_game_benchmark('never'))
+benchmark('simulate.game_every_turn')(simulated_game_benchmark('every_turn'))
+
+
+"""
+UI hot paths, built on the headless window
+"""
+_screens = None
+
+
+def screens():
+    """
+    Game and gacha screens in a ScreenManager, built once for every UI benchmark
+    """
+    global _screens
+    if _screens is None:
+        from kivy.uix.screenmanager import ScreenManager
+        from game_screen import GameScreenManager
+        from gacha_animation import GachaAnimationScreen
+        manager = ScreenManager()
+        game_screen = GameScreenManager(name='game_screen')
+        gacha_screen = GachaAnimationScreen(name='gacha_animation')
+        manager.add_widget(game_screen)
+        manager.add_widget(gacha_screen)
+        _screens = manager, game_screen, gacha_screen
+    return _screens
+
+
+@benchmark('ui.keyword_generator', ui=True)
+def bench_keyword_generator():
+    _, game_screen, _ = screens()
+    rng = game_screen.game.rng
+    return None, lambda: game_screen.keyword_generator(rng)
+
+
+@benchmark('ui.board_reset', ui=True)
+def bench_board_reset():
+    _, game_screen, _ = screens()
+    game, board = game_screen.game, game_screen.gamebox_layout
+
+    def setup():
+        for letter in 'CRANE':
+            game.type_letter(letter)
+        game.submit()
+        board.flush()
+
+    def run():
+        game.reset()
+        board.flush()
+    return setup, run
+
+
+@benchmark('ui.reveal_letter', ui=True)
+def bench_reveal_letter():
+    _, game_screen, _ = screens()
+    game, board = game_screen.game, game_screen.gamebox_layout
+    columns = itertools.cycle(range(game.max_word_length))
+
+    def setup():
+        game.reset()
+        board.flush()
+
+    def run():
+        game.reveal_letter(next(columns))
+        board.flush()
+    return setup, run
+
+
+@benchmark('ui.keyboard_sync', ui=True)
+def bench_keyboard_sync():
+    _, game_screen, _ = screens()
+    game, keyboard = game_screen.game, game_screen.virtual_keyboard
+
+    def setup():
+        game.reset()
+        keyboard.sync(game.keyboard)
+        for letter in 'CRANE':
+            game.type_letter(letter)
+        game.submit()
+    return setup, lambda: keyboard.sync(game.keyboard)
+
+
+@benchmark('ui.generate_boxes', ui=True)
+def bench_generate_boxes():
+    _, _, gacha_screen = screens()
+    gacha_screen.strip.size = (1000, 300)
+    return None, gacha_screen.generate_boxes
+
+
+def run_benchmarks(names, min_time, repeats):
+    results = {}
+    with open(os.devnull, 'w') as devnull:
+        for name in names:
+            factory, _ = BENCHMARKS[name]
+            with contextlib.redirect_stdout(devnull):
+                setup, run = factory()
+                samples = measure(setup, run, min_time, repeats)
+            results[name] = {
+                'median_ns': statistics.median(samples) * 1e9,
+                'min_ns': min(samples) * 1e9,
+                'repeats': repeats,
+            }
+            print(f"{name:32s} {format_ns(results[name]['median_ns']):>12s}")
+    return results
+
+
+def format_ns(ns):
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f}{unit}"
+    return f"{ns:.0f}ns"
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change of every benchmark against the baseline
+
+    Return:
+        list: Names of the benchmarks slower than baseline * (1 + threshold)
+    """
+    regressions = []
+    print(f"\n{'benchmark':32s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:32s} {'-':>12s} {format_ns(result['median_ns']):>12s}      new")
+            continue
+        change = result['median_ns'] / max(old['median_ns'], 1e-9) - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:32s} {format_ns(old['median_ns']):>12s} {format_ns(result['median_ns']):>12s} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of the game logic and UI hot paths')
+    parser.add_argument('--filter', action='append', help='only run benchmarks whose name contains this (repeatable)')
+    parser.add_argument('--no-ui', action='store_true', help='skip the benchmarks that need Kivy')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds spent in each repeat')
+    parser.add_argument('--repeats', type=int, default=5, help='repeats per benchmark, the median is reported')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON file of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='slowdown counted as a regression (0.10 = 10%%)')
+    parser.add_argument('--list', action='store_true', help='list the benchmarks and exit')
+    args = parser.parse_args()
+
+    names = [name for name, (_, ui) in BENCHMARKS.items()
+             if not (ui and args.no_ui) and (not args.filter or any(f in name for f in args.filter))]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+    if any(BENCHMARKS[name][1] for name in names):
+        headless()
+
+    results = run_benchmarks(names, args.min_time, args.repeats)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'min_time': args.min_time,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import argparse
+import datetime
+import os
+
+from rng import GameRandom, derive_seed
+from words import load_words, answers_path
+
+"""
+Daily puzzle
+Every install maps a date to the same answer and the same gacha streams
+without a stored schedule or the network. Days are numbered from EPOCH and
+split into cycles of len(answers) days; inside a cycle the day's position
+goes through a keyed permutation of the answer list, so no word comes back
+before every other word was used, and each cycle is shuffled with its own
+key. The permutation is a small Feistel network, computed in constant
+time for any list size, nothing is precomputed.
+"""
+
+DAILY_KEY = os.environ.get('WORDLE_DAILY_KEY', 'gacha-wordle-daily')
+EPOCH = datetime.date(2025, 1, 1)
+
+
+class KeyedPermutation:
+    """
+    Bijection of range(size) chosen by a key
+    A Feistel network permutes the smallest even number of bits covering size;
+    values that land outside the range are encrypted again (cycle walking),
+    which takes under 4 rounds on average since the domain is less than 4 * size.
+    """
+    __slots__ = ('size', 'half', 'mask', 'keys')
+
+    def __init__(self, size, key, rounds=4):
+        """
+        Args:
+            size (int): Number of values permuted
+            key: Anything derive_seed accepts, different keys give unrelated permutations
+            rounds (int): Feistel rounds
+        """
+        if size < 1:
+            raise ValueError("KeyedPermutation needs a positive size")
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        bits += bits & 1
+        self.half = bits // 2
+        self.mask = (1 << self.half) - 1
+        self.keys = [derive_seed(key, 'round', r) for r in range(rounds)]
+
+    def _encrypt(self, value):
+        half, mask = self.half, self.mask
+        left, right = value >> half, value & mask
+        for key in self.keys:
+            left, right = right, left ^ (derive_seed(key, right) & mask)
+        return (left << half) | right
+
+    def __call__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(f"{index} is outside range({self.size})")
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+def day_number(date):
+    return (date - EPOCH).days
+
+
+def daily_index(date, num_answers, key=DAILY_KEY):
+    """
+    Index in the answer list of the answer of a date
+
+    Args:
+        date (datetime.date): Day of the puzzle
+        num_answers (int): Length of the answer list
+        key (str): Secret shared by every install
+    """
+    cycle, position = divmod(day_number(date), num_answers)
+    return KeyedPermutation(num_answers, (key, cycle))(position)
+
+
+def daily_word(words, date, key=DAILY_KEY):
+    return words[daily_index(date, len(words), key)].upper()
+
+
+def daily_rng(date, key=DAILY_KEY):
+    """
+    Random streams of a date's game, so everyone playing that day draws the same gacha strips and curses
+    """
+    return GameRandom(derive_seed(key, 'daily', day_number(date)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Answers of the daily puzzle')
+    parser.add_argument('--date', type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help='first date (YYYY-MM-DD), today by default')
+    parser.add_argument('--days', type=int, default=1, help='number of days to print')
+    parser.add_argument('--length', type=int, default=5, help='word length')
+    args = parser.parse_args()
+
+    words = load_words(answers_path(args.length), args.length)
+    for offset in range(args.days):
+        date = args.date + datetime.timedelta(days=offset)
+        print(f"{date.isoformat()}  {daily_word(words, date)}  (seed {daily_rng(date).seed})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+"""
+Headless Wordle game engine
+Holds the whole board state in flat arrays so games can be played
+without any Kivy widget. The UI only renders what this engine holds.
+"""
+from rng import GameRandom
+from scoring import score_guess, encode, decode
+from timing import timed
+
+# Box states (same values the board has always used)
+LOCKED = 0
+CHANGABLE = 1
+REVEALED = 2
+
+# Feedback of a submitted tile (a scoring digit + 1, 0 means not submitted)
+NO_FEEDBACK = 0
+ABSENT = 1
+PRESENT = 2
+CORRECT = 3
+
+FEEDBACK_NAMES = {ABSENT: 'absent', PRESENT: 'present', CORRECT: 'correct'}
+FEEDBACK_STATES = {name: state for state, name in FEEDBACK_NAMES.items()}
+
+PLAYING = 'playing'
+WON = 'won'
+LOST = 'lost'
+
+
+class LetterStates:
+    """
+    Best feedback known for each letter A-Z, one byte per letter (NO_FEEDBACK until it is guessed)
+    A letter only moves up: correct > present > absent.
+    """
+    __slots__ = ('states',)
+
+    def __init__(self):
+        self.states = bytearray(26)
+
+    def update(self, letter, state):
+        """
+        Return:
+            bool: True if the letter's state got better
+        """
+        index = ord(letter) - 65
+        if state > self.states[index]:
+            self.states[index] = state
+            return True
+        return False
+
+    def state(self, letter):
+        """
+        Return:
+            int: Best feedback known for the letter, NO_FEEDBACK if it was never submitted
+        """
+        return self.states[ord(letter.upper()) - 65]
+
+    def reset(self):
+        self.states[:] = bytes(26)
+
+
+class WordleGame:
+    """
+    State of a single Wordle game
+
+    Cells are stored row-major: the cell at (row, col) lives at
+    index row * max_word_length + col of every per-cell array.
+    For every cell, next_editable holds the first changable column at or
+    right of it (max_word_length if none) and prev_editable one more than
+    the last changable column at or left of it (0 if none), so typing and
+    backspace jump over locked and revealed boxes in one lookup.
+    """
+    __slots__ = (
+        'hidden_text', 'num_tries', 'max_word_length',
+        'letters', 'box_state', 'feedback', 'is_letter_revealed',
+        'current_row', 'current_col', 'status', 'listener', 'pattern_table',
+        'dictionary', 'history', 'rng', 'keyboard', 'next_editable', 'prev_editable', 'hard_mode',
+    )
+
+    def __init__(self, hidden_text, num_tries=6, listener=None, pattern_table=None, dictionary=None, rng=None,
+                 hard_mode=False):
+        """
+        Args:
+            hidden_text (str): The word to guess
+            num_tries (int): Number of rows on the board
+            listener (callable): Called with a cell index every time that cell changes
+            pattern_table (PatternTable): Precomputed scores, rows are scored directly without it
+            dictionary (container): Words a guess must belong to, every guess is accepted without it
+            rng (GameRandom): Random streams of the game, freshly seeded if None
+            hard_mode (bool): Guesses must use every hint revealed so far, see hard_mode_error
+        """
+        self.num_tries = num_tries
+        self.hard_mode = hard_mode
+        self.listener = listener
+        self.pattern_table = pattern_table
+        self.dictionary = dictionary
+        self.rng = GameRandom() if rng is None else rng
+        self.keyboard = LetterStates()  # what the submitted rows taught about each letter
+        self.reset(hidden_text)
+
+    def reset(self, hidden_text=None, rng=None, num_tries=None):
+        """
+        Start a new game, optionally with a new hidden word, random streams and number of rows
+        """
+        if rng is not None:
+            self.rng = rng
+        if num_tries is not None:
+            self.num_tries = num_tries
+        if hidden_text is not None:
+            self.hidden_text = hidden_text.upper()
+            self.max_word_length = len(self.hidden_text)
+        num_cells = self.num_tries * self.max_word_length
+        self.letters = [''] * num_cells
+        self.box_state = bytearray([CHANGABLE]) * num_cells
+        # every box is changable, so each cell's neighbours are itself
+        self.next_editable = bytearray(range(self.max_word_length)) * self.num_tries
+        self.prev_editable = bytearray(range(1, self.max_word_length + 1)) * self.num_tries
+        self.feedback = bytearray(num_cells)
+        self.is_letter_revealed = [False] * self.max_word_length
+        self.current_row = 0
+        self.current_col = 0
+        self.status = PLAYING
+        self.history = []  # (guess, pattern) of every submitted row
+        self.keyboard.reset()
+        if self.listener is not None:
+            for index in range(num_cells):
+                self.listener(index)
+
+    @property
+    def is_over(self):
+        return self.status != PLAYING
+
+    @property
+    def won(self):
+        return self.status == WON
+
+    @property
+    def lost(self):
+        return self.status == LOST
+
+    def finish(self, won):
+        self.status = WON if won else LOST
+
+    def _changed(self, index):
+        if self.listener is not None:
+            self.listener(index)
+
+    def _index_row(self, row):
+        """
+        Recompute the next/previous changable columns of a row after a box state changed
+        """
+        length = self.max_word_length
+        start = row * length
+        box_state = self.box_state
+        following = length
+        for col in range(length - 1, -1, -1):
+            if box_state[start + col] == CHANGABLE:
+                following = col
+            self.next_editable[start + col] = following
+        preceding = 0
+        for col in range(length):
+            if box_state[start + col] == CHANGABLE:
+                preceding = col + 1
+            self.prev_editable[start + col] = preceding
+
+    def reindex(self):
+        """
+        Rebuild the editable column indexes after box_state was replaced as a whole (e.g. from a snapshot)
+        """
+        for row in range(self.num_tries):
+            self._index_row(row)
+
+    def letter_at(self, row, col):
+        return self.letters[row * self.max_word_length + col]
+
+    def row_text(self, row):
+        start = row * self.max_word_length
+        return ''.join(self.letters[start:start + self.max_word_length])
+
+    def add_letter_at(self, row, col, letter):
+        """
+        Put a letter in a changable box
+
+        Return:
+            int: 1 if the letter was written, 0 if the box is locked or revealed
+        """
+        index = row * self.max_word_length + col
+        if self.box_state[index] != CHANGABLE:
+            return 0
+        self.letters[index] = letter.upper()
+        self._changed(index)
+        return 1
+
+    def delete_letter_at(self, row, col):
+        """
+        Clear a changable box
+
+        Return:
+            int: 1 if the box was cleared, 0 if the box is locked or revealed
+        """
+        index = row * self.max_word_length + col
+        if self.box_state[index] != CHANGABLE:
+            return 0
+        self.letters[index] = ''
+        self._changed(index)
+        return 1
+
+    @timed('set_box_state')
+    def set_box_state(self, row, col, state):
+        """
+        Set the state of a box
+
+        Args:
+            row (int): Row index
+            col (int): Column index
+            state (int): State to set (0 for locked, 1 for changable, 2 for revealed)
+        """
+        index = row * self.max_word_length + col
+        self.box_state[index] = state
+        self.feedback[index] = NO_FEEDBACK
+        self._index_row(row)
+        self._changed(index)
+
+    def reveal_letter(self, index):
+        """
+        Reveal the letter at the given index on every row of the board
+
+        Args:
+            index (int): Index of the letter in the hidden text
+        """
+        self.is_letter_revealed[index] = True
+        letter = self.hidden_text[index]
+        for row in range(self.num_tries):
+            cell = row * self.max_word_length + index
+            self.letters[cell] = letter
+            self.box_state[cell] = REVEALED
+            self.feedback[cell] = NO_FEEDBACK
+            self._index_row(row)
+            self._changed(cell)
+
+    def is_valid_row(self, row):
+        return self.row_error(row) is None
+
+    def row_error(self, row):
+        """
+        Check a row against the dictionary and, in hard mode, against the feedback so far
+        Rows holding cursed boxes are always valid since their letters were
+        not chosen by the player, incomplete rows are left to check_current_row.
+
+        Return:
+            str or None: Why the row cannot be submitted, None if it can
+        """
+        start = row * self.max_word_length
+        stop = start + self.max_word_length
+        if LOCKED in self.box_state[start:stop] or '' in self.letters[start:stop]:
+            return None
+        word = ''.join(self.letters[start:stop])
+        if self.dictionary is not None and word not in self.dictionary:
+            return "Not in word list"
+        if self.hard_mode:
+            return self.hard_mode_error(word)
+        return None
+
+    def hard_mode_error(self, word):
+        """
+        Hard mode rule: every green letter of the submitted rows stays in its column
+        and every other letter known to be in the answer is used again
+
+        Args:
+            word (str): Guess to check
+        Return:
+            str or None: The first rule the guess breaks, None if it follows them all
+        """
+        word = word.upper()
+        for guess, pattern in self.history:
+            for col, digit in enumerate(decode(pattern, self.max_word_length)):
+                if digit == CORRECT - 1 and word[col] != guess[col]:
+                    return f"Letter {col + 1} must be {guess[col]}"
+        for index in range(26):
+            letter = chr(65 + index)
+            if self.keyboard.state(letter) >= PRESENT and letter not in word:
+                return f"Guess must contain {letter}"
+        return None
+
+    @timed('check_current_row')
+    def check_current_row(self, cur_row, pattern=None):
+        """
+        Score the given row against the hidden text
+
+        Args:
+            cur_row (int): Row index
+            pattern (int): Encoded feedback already computed for this row (e.g. by a batched scorer)
+        Return:
+            tuple: (Number of correct letters in correct position, dict of letter states)
+        """
+        start = cur_row * self.max_word_length
+        guess = self.letters[start:start + self.max_word_length]
+        if '' in guess:
+            return 0, {}  # incomplete row
+
+        guess = ''.join(guess)
+        if pattern is not None:
+            digits = decode(pattern, self.max_word_length)
+        elif self.pattern_table is not None:
+            pattern = self.pattern_table.pattern(guess, self.hidden_text)
+            digits = decode(pattern, self.max_word_length)
+        else:
+            digits = score_guess(guess, self.hidden_text)
+            pattern = encode(digits)
+        self.history.append((guess, pattern))
+
+        num_corrects = 0
+        letter_states = {}
+        for c, letter in enumerate(guess):
+            state = digits[c] + 1
+            self.feedback[start + c] = state
+            if state == CORRECT:
+                num_corrects += 1
+            # correct > present > absent
+            if state > letter_states.get(letter, NO_FEEDBACK):
+                letter_states[letter] = state
+            self._changed(start + c)
+
+        for letter, state in letter_states.items():
+            self.keyboard.update(letter, state)
+        letter_states = {letter: FEEDBACK_NAMES[state] for letter, state in letter_states.items()}
+        return num_corrects, letter_states
+
+    def type_letter(self, letter):
+        """
+        Write a letter in the next changable box of the current row,
+        skipping locked and revealed boxes
+        """
+        if self.status != PLAYING or self.current_col >= self.max_word_length:
+            return False
+        start = self.current_row * self.max_word_length
+        col = self.next_editable[start + self.current_col]  # skip locked boxes
+        if col >= self.max_word_length:
+            self.current_col = self.max_word_length
+            return False
+        self.letters[start + col] = letter.upper()
+        self._changed(start + col)
+        self.current_col = col + 1
+        return True
+
+    def backspace(self):
+        """
+        Clear the closest changable box left of the cursor
+        """
+        if self.status != PLAYING or self.current_col <= 0:
+            return False
+        start = self.current_row * self.max_word_length
+        col = self.prev_editable[start + self.current_col - 1] - 1  # skip locked boxes
+        if col < 0:
+            self.current_col = 0
+            return False
+        self.letters[start + col] = ''
+        self._changed(start + col)
+        self.current_col = col
+        return True
+
+    def submit(self, pattern=None):
+        """
+        Submit the current row and move to the next one
+
+        Args:
+            pattern (int): Encoded feedback of the row if it was scored elsewhere
+
+        Return:
+            tuple: (Number of correct letters in correct position, dict of letter states),
+            the dict is empty if the row is incomplete or not in the dictionary
+        """
+        if self.status != PLAYING or not self.is_valid_row(self.current_row):
+            return 0, {}
+        num_correct, letter_states = self.check_current_row(self.current_row, pattern)
+        if not letter_states:
+            return 0, {}
+
+        self.current_row += 1
+        self.current_col = 0
+        if num_correct == self.max_word_length:
+            self.status = WON
+        elif self.current_row >= self.num_tries:
+            self.status = LOST
+        return num_correct, letter_states
+
+    def handle_key(self, key):
+        """
+        Apply a key press ('backspace', 'enter', or a letter)
+
+        Return:
+            tuple or None: The submit result for 'enter', None otherwise
+        """
+        if key == 'enter':
+            return self.submit()
+        if key == 'backspace':
+            self.backspace()
+        elif len(key) == 1 and 'a' <= key.lower() <= 'z':
+            self.type_letter(key)
+        return None
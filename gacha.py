@@ -1,72 +1,106 @@
-import random
 import string
 
+from engine import LOCKED, CHANGABLE, REVEALED
+from sampler import AliasSampler
+
+"""
+Gacha items: the single source of the odds used by the animation and the simulator
+'effect' is the name of the Gacha method applied when the item is drawn
+"""
+GACHA_ITEMS = [ # [0.17, 0.3, 0.03, 0.12, 0.25, 0.1, 0.03]
+    {'type': 'Curse', 'name': 'Remove Tries', 'effect': 'remove_tries', 'weight': 0.17, 'color': (0.6, 0.1, 0.1, 1)},
+    {'type': 'Curse', 'name': 'Add Curse', 'effect': 'add_curse', 'weight': 0.3, 'color': (0.8, 0.2, 0.2, 1)},
+    {'type': 'Curse', 'name': 'Instant Lose', 'effect': 'lose_game', 'weight': 0.03, 'color': (0.3, 0.0, 0.0, 1)},
+
+    {'type': 'Bless', 'name': 'Add Tries', 'effect': 'add_tries', 'weight': 0.12, 'color': (0.5, 0.8, 1.0, 1)},
+    {'type': 'Bless', 'name': 'Remove Curse', 'effect': 'remove_curse', 'weight': 0.25, 'color': (0.4, 0.7, 1.0, 1)},
+    {'type': 'Bless', 'name': 'Hint One Letter', 'effect': 'hint_one_letter', 'weight': 0.1, 'color': (0.6, 0.8, 0.6, 1)},
+    {'type': 'Bless', 'name': 'Instant Win', 'effect': 'win_game', 'weight': 0.03, 'color': (1.0, 0.84, 0.0, 1)}
+]
+
+# every draw of a gacha item goes through this sampler
+GACHA_SAMPLER = AliasSampler([item['weight'] for item in GACHA_ITEMS])
+
 class Gacha:
-    def __init__(self):
-        pass
+    def __init__(self, verbose=True):
+        """
+        Args:
+            verbose (bool): Print what every effect did, turned off by headless simulations
+        """
+        self.verbose = verbose
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
 
-    def remove_curse(self, gamebox_layout, current_row):
+    def remove_curse(self, game, current_row):
         for row in range(current_row + 1):
-            for col in range(gamebox_layout.max_word_length):
-                index = row * gamebox_layout.max_word_length + col
-                if gamebox_layout.box_state[index] == 0:
-                    gamebox_layout.set_box_state(row, col, 1)  # unlock box 
-                    print(f"Remove a curse from box at row {row}, col {col}")
-                    return gamebox_layout
-        print(f"Tried to remove a curse from box at row {current_row}, but it was not cursed.")
-        return gamebox_layout
+            for col in range(game.max_word_length):
+                index = row * game.max_word_length + col
+                if game.box_state[index] == LOCKED:
+                    game.set_box_state(row, col, CHANGABLE)  # unlock box 
+                    self.log(f"Remove a curse from box at row {row}, col {col}")
+                    return game
+        self.log(f"Tried to remove a curse from box at row {current_row}, but it was not cursed.")
+        return game
 
-    def add_tries(self, gamebox_layout, current_row):
+    def add_tries(self, game, current_row):
+        rng = game.rng.curse
         if current_row > 0:
             # delete all letters in the random row [0, current_row-1]
-            random_row = random.randint(current_row, gamebox_layout.num_tries - 1)
-            print(f"Add tries by clearing row {random_row}")
-            for i in range(gamebox_layout.max_word_length):
-                gamebox_layout.delete_letter_at(random_row, i)
-                gamebox_layout.set_box_state(random_row, i, 1)  # unlock
+            random_row = rng.randint(current_row, game.num_tries - 1)
+            self.log(f"Add tries by clearing row {random_row}")
+            for i in range(game.max_word_length):
+                game.delete_letter_at(random_row, i)
+                game.set_box_state(random_row, i, CHANGABLE)  # unlock
         else:
-            print("Tried to add tries, but no previous rows exist.")
-        return gamebox_layout
+            self.log("Tried to add tries, but no previous rows exist.")
+        return game
 
-    def hint_one_letter(self, gamebox_layout, current_row):
-        hidden_text = gamebox_layout.hidden_text
-        unrevealed_indices = [i for i in range(len(hidden_text)) if not gamebox_layout.is_letter_revealed[i]]
+    def hint_one_letter(self, game, current_row):
+        rng = game.rng.curse
+        hidden_text = game.hidden_text
+        unrevealed_indices = [i for i in range(len(hidden_text)) if not game.is_letter_revealed[i]]
         if unrevealed_indices:
-            index_to_reveal = random.choice(unrevealed_indices)
-            gamebox_layout.reveal_letter(index_to_reveal)
-            gamebox_layout.set_box_state(current_row, index_to_reveal, 2)  # revealed
-            print(f"Hint: Revealed letter at index {index_to_reveal}")
+            index_to_reveal = rng.choice(unrevealed_indices)
+            game.reveal_letter(index_to_reveal)
+            game.set_box_state(current_row, index_to_reveal, REVEALED)  # revealed
+            self.log(f"Hint: Revealed letter at index {index_to_reveal}")
         else:
-            print("No letters to reveal.")
-        return gamebox_layout
+            self.log("No letters to reveal.")
+        return game
 
-    def win_game(self, gamebox_layout, current_row):
-        print("Caused the player to win the game instantly!")
+    def win_game(self, game, current_row):
+        self.log("Caused the player to win the game instantly!")
+        game.finish(won=True)
         return None
 
-    def add_curse(self, gamebox_layout, current_row):
-        random_row = random.randint(current_row, gamebox_layout.num_tries - 1)
-        random_col = random.randint(0, gamebox_layout.max_word_length - 1)
-        index = random_row * gamebox_layout.max_word_length + random_col
-        if gamebox_layout.box_state[index] == 1:
-            gamebox_layout.add_letter_at(random_row, random_col, random.choice(string.ascii_uppercase))
-            gamebox_layout.set_box_state(random_row, random_col, 0)  # curse box
-            print(f"Added a curse to box at row {random_row}, col {random_col}")
+    def add_curse(self, game, current_row):
+        rng = game.rng.curse
+        random_row = rng.randint(current_row, game.num_tries - 1)
+        random_col = rng.randint(0, game.max_word_length - 1)
+        index = random_row * game.max_word_length + random_col
+        if game.box_state[index] == CHANGABLE:
+            game.add_letter_at(random_row, random_col, rng.choice(string.ascii_uppercase))
+            game.set_box_state(random_row, random_col, LOCKED)  # curse box
+            self.log(f"Added a curse to box at row {random_row}, col {random_col}")
         else:
-            print(f"Tried to add a curse to box at row {random_row}, col {random_col}, but it was already cursed.")
-        return gamebox_layout
+            self.log(f"Tried to add a curse to box at row {random_row}, col {random_col}, but it was already cursed.")
+        return game
 
-    def remove_tries(self, gamebox_layout, current_row):
-        if current_row < gamebox_layout.num_tries - 1:
-            random_row = random.randint(current_row + 1, gamebox_layout.num_tries - 1)
-            print(f"Remove tries by adding random word to row {random_row}")
-            for i in range(gamebox_layout.max_word_length):
-                gamebox_layout.add_letter_at(random_row, i, random.choice(string.ascii_uppercase))
-                gamebox_layout.set_box_state(random_row, i, 0)  # lock 
+    def remove_tries(self, game, current_row):
+        rng = game.rng.curse
+        if current_row < game.num_tries - 1:
+            random_row = rng.randint(current_row + 1, game.num_tries - 1)
+            self.log(f"Remove tries by adding random word to row {random_row}")
+            for i in range(game.max_word_length):
+                game.add_letter_at(random_row, i, rng.choice(string.ascii_uppercase))
+                game.set_box_state(random_row, i, LOCKED)  # lock 
         else:
-            print("Tried to remove tries, but this is the last row.")
-        return gamebox_layout
+            self.log("Tried to remove tries, but this is the last row.")
+        return game
 
-    def lose_game(self, gamebox_layout, current_row):
-        print("Caused the player to lose the game instantly!")
+    def lose_game(self, game, current_row):
+        self.log("Caused the player to lose the game instantly!")
+        game.finish(won=False)
         return None
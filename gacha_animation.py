@@ -1,81 +1,186 @@
 from kivy.uix.screenmanager import Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
+from kivy.core.text import Label as CoreLabel
+from kivy.metrics import sp
 from kivy.uix.button import Button
+from kivy.uix.widget import Widget
+from kivy.properties import NumericProperty
 from kivy.graphics import Color, Rectangle, Line
 from kivy.animation import Animation
 from kivy.clock import Clock
 from kivy.core.window import Window
-import random
 import math
 
-from gacha import Gacha
+from gacha import Gacha, GACHA_ITEMS, GACHA_SAMPLER
+from timing import timed
 
-class GachaBox(BoxLayout):
-    """Individual box in the gacha animation"""
-    def __init__(self, item_type, item_name, rarity_color, func, **kwargs):
-        """
-        Args:
-            item_type (str): 'Bless' or 'Curse'
-            item_name (str): Name of the gacha item
-            rarity_color (tuple): RGBA color tuple for the box background
-        """
+BOX_WIDTH = 150
+BOX_SPACING = 10
+BOX_STEP = BOX_WIDTH + BOX_SPACING
+
+# animation speed modes: (label, duration of each of the two phases, None to skip the animation)
+TURBO_MODES = [
+    ('NORMAL', 2.5),
+    ('FAST', 0.3),
+    ('SKIP', None),
+]
+
+
+def winning_index(scroll_distance, strip_length):
+    """
+    Index of the item that stops under the selector
+    The strip starts with item 0 centered on the selector, so after scrolling
+    by scroll_distance the closest item is the nearest multiple of BOX_STEP.
+    """
+    index = int(math.floor(scroll_distance / BOX_STEP + 0.5))
+    return min(max(index, 0), strip_length - 1)
+
+def card_textures(item):
+    """
+    Textures of the text of a gacha card, rendered once per item type and shared by every box
+
+    Return:
+        tuple: (type texture, name texture)
+    """
+    textures = _card_textures.get(item['name'])
+    if textures is None:
+        icon = 'Bless' if item['type'] == 'Bless' else 'Curse'
+        type_label = CoreLabel(text=icon, font_size=sp(48))
+        type_label.refresh()
+        name_label = CoreLabel(text=item['name'], font_size=sp(14), bold=True)
+        name_label.refresh()
+        textures = (type_label.texture, name_label.texture)
+        _card_textures[item['name']] = textures
+    return textures
+
+_card_textures = {}
+
+
+class GachaBox(Widget):
+    """Individual box in the gacha animation, recycled by GachaStrip for many items"""
+    def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.orientation = 'vertical'
-        self.size_hint = (None, 1)
-        self.width = 150
+        self.size_hint = (None, None)
+        self.width = BOX_WIDTH
         self.padding = 10
         self.spacing = 5
         
-        self.item_type = item_type
-        self.item_name = item_name
-        self.rarity_color = rarity_color
-        self.func = None
+        self.index = -1  # position on the strip of the item shown
+        self.item_data = None
         
         with self.canvas.before:
-            Color(*rarity_color)
+            self.bg_color = Color(1, 1, 1, 1)
             self.bg_rect = Rectangle(pos=self.pos, size=self.size)
+            Color(1, 1, 1, 1)
+            self.type_rect = Rectangle(size=(0, 0))
+            self.name_rect = Rectangle(size=(0, 0))
         
         self.bind(pos=self.update_rect, size=self.update_rect)
-        
-        icon = 'Bless' if item_type == 'Bless' else 'Curse'
-        self.type_label = Label(
-            text=f'[size=48sp]{icon}[/size]',
-            markup=True,
-            size_hint_y=0.5
-        )
-        
-        self.name_label = Label(
-            text=f'[b]{item_name}[/b]',
-            markup=True,
-            font_size='14sp',
-            size_hint_y=0.3
-        )
-        
-        self.add_widget(self.type_label)
-        self.add_widget(self.name_label)
+    
+    def bind_item(self, index, item):
+        """
+        Show another item
+
+        Args:
+            index (int): Position of the item on the strip
+            item (dict): Entry of the gacha item table
+        """
+        self.index = index
+        if item is self.item_data:
+            return
+        self.item_data = item
+        self.bg_color.rgba = item['color']
+        type_texture, name_texture = card_textures(item)
+        self.type_rect.texture = type_texture
+        self.type_rect.size = type_texture.size
+        self.name_rect.texture = name_texture
+        self.name_rect.size = name_texture.size
+        self.update_rect()
     
     def update_rect(self, *args):
         self.bg_rect.pos = self.pos
         self.bg_rect.size = self.size
 
+        # same layout as a vertical BoxLayout holding the type (0.5) over the name (0.3)
+        inner_height = self.height - 2 * self.padding - self.spacing
+        name_height = inner_height * 0.3 / 0.8
+        type_height = inner_height * 0.5 / 0.8
+        name_center_y = self.y + self.padding + name_height / 2
+        type_center_y = self.y + self.padding + name_height + self.spacing + type_height / 2
+        for rect, center_y in ((self.type_rect, type_center_y), (self.name_rect, name_center_y)):
+            width, height = rect.size
+            rect.pos = (self.center_x - width / 2, center_y - height / 2)
+
+
+class GachaStrip(Widget):
+    """
+    Horizontal strip of gacha items
+    Only a small ring of GachaBox widgets is created; as the strip scrolls they
+    are moved and rebound to the items under the viewport, so the cost of a
+    spin does not depend on the strip length.
+    """
+    strip_x = NumericProperty(0)  # x of the left edge of the first item
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.items = []
+        self.ring = []
+        self.bind(strip_x=self.update_boxes, pos=self.update_boxes, size=self.update_boxes)
+
+    def set_items(self, items):
+        """
+        Args:
+            items (list): Gacha item entries, one per position on the strip
+        """
+        self.items = items
+        for box in self.ring:
+            box.index = -1
+        self.update_boxes()
+
+    def _ensure_ring(self):
+        # enough boxes to cover the viewport plus one partially visible at each edge
+        needed = int(math.ceil(self.width / BOX_STEP)) + 2
+        while len(self.ring) < needed:
+            box = GachaBox()
+            box.opacity = 0
+            self.ring.append(box)
+            self.add_widget(box)
+
+    @timed('gacha_strip')
+    def update_boxes(self, *args):
+        if not self.items:
+            for box in self.ring:
+                box.opacity = 0
+            return
+        self._ensure_ring()
+        ring_size = len(self.ring)
+        first = max(0, int(math.floor((self.x - self.strip_x) / BOX_STEP)))
+        for slot in range(ring_size):
+            index = first + slot
+            box = self.ring[index % ring_size]
+            if index >= len(self.items):
+                box.opacity = 0
+                continue
+            if box.index != index:
+                box.bind_item(index, self.items[index])
+            box.opacity = 1
+            box.pos = (self.strip_x + index * BOX_STEP, self.y)
+            box.height = self.height
+
 
 class GachaAnimationScreen(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.orientation = 'vertical'
         self.gacha_system = Gacha()
-        self.gacha_items = [ # [0.17, 0.3, 0.03, 0.12, 0.25, 0.1, 0.03]
-            {'type': 'Curse', 'name': 'Remove Tries', 'func': self.gacha_system.remove_tries, 'weight': 0.17, 'color': (0.6, 0.1, 0.1, 1)},
-            {'type': 'Curse', 'name': 'Add Curse', 'func': self.gacha_system.add_curse, 'weight': 0.3, 'color': (0.8, 0.2, 0.2, 1)},
-            {'type': 'Curse', 'name': 'Instant Lose', 'func': self.gacha_system.lose_game, 'weight': 0.03, 'color': (0.3, 0.0, 0.0, 1)},
-
-            {'type': 'Bless', 'name': 'Add Tries', 'func': self.gacha_system.add_tries, 'weight': 0.12, 'color': (0.5, 0.8, 1.0, 1)},
-            {'type': 'Bless', 'name': 'Remove Curse', 'func': self.gacha_system.remove_curse, 'weight': 0.25, 'color': (0.4, 0.7, 1.0, 1)},
-            {'type': 'Bless', 'name': 'Hint One Letter', 'func': self.gacha_system.hint_one_letter, 'weight': 0.1, 'color': (0.6, 0.8, 0.6, 1)},
-            {'type': 'Bless', 'name': 'Instant Win', 'func': self.gacha_system.win_game, 'weight': 0.03, 'color': (1.0, 0.84, 0.0, 1)}
+        self.gacha_items = [
+            dict(item, func=getattr(self.gacha_system, item['effect'])) for item in GACHA_ITEMS
         ]
         self.result_func = None
+        self.winning_item = None
+        self.turbo = 0  # index in TURBO_MODES
+        self.source = 'game_screen'  # screen the gacha was opened from, set by that screen
         self.setup_ui()
 
     def reset(self):
@@ -84,6 +189,7 @@ class GachaAnimationScreen(Screen):
         """
         self.result_label.text = 'Press "Open Box" to start!'
         self.result_func = None
+        self.winning_item = None
         self.open_button.disabled = False
     
     def setup_ui(self):
@@ -118,15 +224,11 @@ class GachaAnimationScreen(Screen):
         
         self.animation_container.bind(pos=self.update_selector, size=self.update_selector)
         
-        # Scrollable container for gacha boxes
-        self.scroll_container = BoxLayout(
-            orientation='horizontal',
-            size_hint=(None, 1),
-            spacing=10
-        )
-        self.scroll_container.width = 0
+        # Scrolling strip of gacha boxes
+        self.strip = GachaStrip()
+        self.strip_length = 50
         
-        self.animation_container.add_widget(self.scroll_container)
+        self.animation_container.add_widget(self.strip)
         
         self.result_label = Label(
             text='Press "Open Box" to start!',
@@ -158,7 +260,16 @@ class GachaAnimationScreen(Screen):
         )
         back_button.bind(on_press=self.go_back_game_screen)
         
+        self.turbo_button = Button(
+            text=f'SPEED: {TURBO_MODES[self.turbo][0]}',
+            font_size='20sp',
+            bold=True,
+            background_color=(0.3, 0.5, 0.8, 1)
+        )
+        self.turbo_button.bind(on_press=self.toggle_turbo)
+        
         button_layout.add_widget(self.open_button)
+        button_layout.add_widget(self.turbo_button)
         button_layout.add_widget(back_button)
         main_layout.add_widget(self.animation_container)
         main_layout.add_widget(self.result_label)
@@ -179,34 +290,20 @@ class GachaAnimationScreen(Screen):
         top_y = self.animation_container.y + self.animation_container.height
         self.selector_line.points = [center_x, bottom_y, center_x, top_y]
     
+    def game_rng(self):
+        """
+        Random streams of the game being played
+        """
+        return self.manager.get_screen(self.source).game.rng
+
     def generate_boxes(self):
         """
         Generate boxes for the animation with random items
         """
-        self.scroll_container.clear_widgets()
-        
-        total_boxes = 50
-        
-        for _ in range(total_boxes):
-            item = random.choices(
-                self.gacha_items,
-                weights=[it['weight'] for it in self.gacha_items],
-                k=1
-            )[0]
-            
-            box = GachaBox(
-                item_type=item['type'],
-                item_name=item['name'],
-                rarity_color=item['color'],
-                func=item['func']
-            )
-            box.item_data = item
-            self.scroll_container.add_widget(box)
-        
-        total_width = (150 + 10) * total_boxes
-        self.scroll_container.width = total_width
-        
-        self.initial_x = self.animation_container.center_x - 75
+        indices = GACHA_SAMPLER.sample_many(self.strip_length, self.game_rng().strip)
+        self.initial_x = self.animation_container.center_x - BOX_WIDTH / 2
+        self.strip.strip_x = self.initial_x
+        self.strip.set_items([self.gacha_items[index] for index in indices])
         
     
     def start_animation(self, *args):
@@ -214,64 +311,59 @@ class GachaAnimationScreen(Screen):
         self.result_label.text = 'Opening box...'
         
         self.generate_boxes()
-        
-        self.scroll_container.x = self.initial_x
 
-        box_width = 160  # 10 for spacing
+        box_width = BOX_STEP  # 10 for spacing
         min_boxes = 10
         max_boxes = 40
-        random_boxes_to_scroll = random.uniform(min_boxes, max_boxes)
+        scroll_rng = self.game_rng().scroll
+        random_boxes_to_scroll = scroll_rng.uniform(min_boxes, max_boxes)
         
-        random_offset = random.uniform(-box_width/2, box_width/2)
+        random_offset = scroll_rng.uniform(-box_width/2, box_width/2)
         scroll_distance = random_boxes_to_scroll * box_width + random_offset
-        self.final_x = self.initial_x - scroll_distance # final position of the scroll container
+        self.final_x = self.initial_x - scroll_distance # final position of the strip
+        
+        # the result is decided as soon as the scroll distance is known
+        self.winning_item = self.strip.items[winning_index(scroll_distance, len(self.strip.items))]
         
-        # Fast scroll (2.5 seconds)
+        phase_duration = TURBO_MODES[self.turbo][1]
+        if phase_duration is None:
+            self.strip.strip_x = self.final_x
+            self.reveal_result()
+            return
+        
+        # Fast scroll (2.5 seconds at normal speed)
         anim1 = Animation(
-            x=self.final_x + box_width,
-            duration=2.5,
+            strip_x=self.final_x + box_width,
+            duration=phase_duration,
             t='in_cubic'
         )
         
-        # Slow down (2.5 seconds)
+        # Slow down (2.5 seconds at normal speed)
         anim2 = Animation(
-            x=self.final_x,
-            duration=2.5,
+            strip_x=self.final_x,
+            duration=phase_duration,
             t='out_quad'
         )
         
-        anim1.bind(on_complete=lambda *x: anim2.start(self.scroll_container))
+        anim1.bind(on_complete=lambda *x: anim2.start(self.strip))
         anim2.bind(on_complete=lambda *x: self.reveal_result())
 
-        anim1.start(self.scroll_container)
+        anim1.start(self.strip)
     
-    def get_winning_box(self):
+    def toggle_turbo(self, *args):
         """
-        Find which box is closest to the center selector line
+        Cycle through the animation speeds
         """
-        center_x = self.animation_container.center_x
-        
-        closest_box = None
-        min_distance = float('inf')
-        
-        for box in self.scroll_container.children[::-1]: # Reverse to get left-to-right order
-            box_center_x = box.x + box.width / 2
-            distance = abs(box_center_x - center_x)
-            
-            if distance < min_distance:
-                min_distance = distance
-                closest_box = box
-        
-        return closest_box
+        self.turbo = (self.turbo + 1) % len(TURBO_MODES)
+        self.turbo_button.text = f'SPEED: {TURBO_MODES[self.turbo][0]}'
     
     def reveal_result(self):
         """
-        Reveal the final result by finding the box at the center
+        Reveal the result decided when the animation started
         """
-        winning_box = self.get_winning_box()
+        winning_item = self.winning_item
         
-        if winning_box:
-            winning_item = winning_box.item_data
+        if winning_item:
             icon = 'Bless' if winning_item['type'] == 'Bless' else 'Curse'
             color = '6ac764' if winning_item['type'] == 'Bless' else 'ff6b6b'
             
@@ -282,7 +374,7 @@ class GachaAnimationScreen(Screen):
             self.result_func = winning_item['func']
     
     def go_back_game_screen(self, *args):
-        game_screen = self.manager.get_screen('game_screen')
+        game_screen = self.manager.get_screen(self.source)
         
         # Apply the gacha result if one exists
         if self.result_func:
@@ -292,4 +384,4 @@ class GachaAnimationScreen(Screen):
         # reset gacha state
         self.reset()
         
-        self.manager.current = 'game_screen'
+        self.manager.current = self.source
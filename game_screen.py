@@ -8,13 +8,33 @@ from kivy.uix.screenmanager import Screen
 from kivy.uix.popup import Popup
 from kivy.core.window import Window
 from kivy.uix.widget import Widget
+from kivy.clock import Clock
+from kivy.animation import Animation
 
-import random
+import datetime
+import os
+import time
+
+from daily import daily_word, daily_rng
 from gacha import Gacha
+from rng import GameRandom
+from words import load_words, load_allowed, answers_path, allowed_path, MIN_WORD_LENGTH, MAX_WORD_LENGTH
+from engine import WordleGame, LOCKED, CHANGABLE, REVEALED, CORRECT, PRESENT, ABSENT, NO_FEEDBACK, PLAYING, WON, LOST
+from stats import StatsStore, GameRecord, SURRENDERED, ABANDONED
+from replay import ReplayWriter, REPLAY_PATH
+import snapshot
+from timing import timed
 """
 Virtual keyboard widget for the Wordle game
 """
 class VirtualKeyboard(BoxLayout):
+    key_colors = {
+        NO_FEEDBACK: (0.5, 0.5, 0.5, 1),  # Gray
+        ABSENT: (0.3, 0.3, 0.3, 1),  # Dark gray
+        PRESENT: (0.8, 0.7, 0.2, 1),  # Yellow
+        CORRECT: (0.4, 0.7, 0.4, 1),  # Green
+    }
+
     def __init__(self, handle_key_input, **kwargs):
         super().__init__(**kwargs)
         self.orientation = 'vertical'
@@ -25,6 +45,7 @@ class VirtualKeyboard(BoxLayout):
         
         self.handle_key_input = handle_key_input
         self.key_buttons = {}
+        self.painted = bytearray(26)  # state each letter key is colored with
         
         keyboard_rows = [
             ['Q', 'W', 'E', 'R', 'T', 'Y', 'U', 'I', 'O', 'P'],
@@ -83,194 +104,268 @@ class VirtualKeyboard(BoxLayout):
         else:
             self.handle_key_input(key.lower())
     
-    def update_key_color(self, letter, state):
-        """
-        Update the color of a key based on its state
-        state: 'correct' (green), 'present' (yellow), 'absent' (gray)
+    def paint_key(self, index, state):
+        self.painted[index] = state
+        button = self.key_buttons.get(chr(65 + index))
+        if button is not None:
+            button.background_color = self.key_colors[state]
+
+    def sync(self, letter_states):
         """
-        letter = letter.upper()
-        if letter in self.key_buttons:
-            button = self.key_buttons[letter]
-            current_color = button.background_color
-            
-            # correct > present > absent
-            if state == 'correct':
-                button.background_color = (0.4, 0.7, 0.4, 1)  # Green
-            elif state == 'present':
-                if current_color != (0.4, 0.7, 0.4, 1):
-                    button.background_color = (0.8, 0.7, 0.2, 1)  # Yellow
-            elif state == 'absent':
-                if current_color == (0.5, 0.5, 0.5, 1):
-                    button.background_color = (0.3, 0.3, 0.3, 1)  # Dark gray
-    
+        Repaint only the keys whose state differs from a LetterStates
+
+        Args:
+            letter_states (LetterStates): Letter knowledge of the game, usually game.keyboard
+        """
+        states = letter_states.states
+        if states == self.painted:
+            return
+        for index, state in enumerate(states):
+            if state != self.painted[index]:
+                self.paint_key(index, state)
+
     def reset_keyboard(self):
-        """Reset all key colors to default"""
-        for button in self.key_buttons.values():
-            button.background_color = (0.5, 0.5, 0.5, 1)
+        """Reset the colored keys to default"""
+        for index, state in enumerate(self.painted):
+            if state:
+                self.paint_key(index, NO_FEEDBACK)
+
+
+"""
+Key presses collected during a frame and handled together on the next one
+Auto-repeat and fast typing then cost one pass per frame and the board is
+repainted once for all of them, in the order the keys were pressed.
+"""
+class KeyQueue:
+    def __init__(self, handle_key):
+        """
+        Args:
+            handle_key (callable): Called with each queued key ('backspace', 'enter', or a letter)
+        """
+        self.handle_key = handle_key
+        self.keys = []
+        self._drain_trigger = Clock.create_trigger(self.drain)
+
+    def push(self, key):
+        self.keys.append(key)
+        self._drain_trigger()
+
+    def drain(self, *args):
+        keys, self.keys = self.keys, []
+        for key in keys:
+            self.handle_key(key)
+
+    def clear(self):
+        self.keys = []
+        self._drain_trigger.cancel()
 
 
 """
 Game board layout
+Only renders the state held by a WordleGame engine
 """
 class GameBoxLayout(StackLayout):
-    def __init__(self, hidden_text, word_list, **kwargs):
+    state_colors = {
+        LOCKED: (1, 0, 0, 1),  # ff0000 for locked boxes
+        CHANGABLE: (1, 1, 1, 1),  # White for changable boxes
+        REVEALED: (0.6, 1, 0.6, 1),  # Light green for revealed boxes
+    }
+    feedback_colors = {
+        CORRECT: (0, 1, 0, 1),  # Green (for correct letters in correct position)
+        PRESENT: (1, 1, 0, 1),  # Yellow (for correct letters in wrong position)
+        ABSENT: (0.5, 0.5, 0.5, 1),  # Gray (for incorrect letters)
+    }
+
+    max_box_size = 60
+    spacing_ratio = 1 / 6  # gap between tiles relative to their size, 10px at 60px
+    font_ratio = 32 / 60
+
+    def __init__(self, game, **kwargs):
         super().__init__(**kwargs)
-        box_size = 60
-        spacing = 10
         self.size_hint = (None, None)
 
-        self.word_list = word_list
-        self.num_tries = 6
-        self.hidden_text = hidden_text.upper()
-        self.max_word_length = len(self.hidden_text)
-        self.is_letter_revealed = [False] * self.max_word_length
-        self.width = self.max_word_length * box_size + (self.max_word_length-1) * spacing + 2 * spacing 
-        self.height = self.num_tries * box_size + (self.num_tries-1) * spacing + 2 * spacing
-        self.box_state = {}
-        for i in range(self.num_tries * self.max_word_length):
-            self.box_state[i] = 1  # possible states:  0 (locked), 1 (changable), 2 (revealed)
+        self.game = game
+        self.num_tries = 0
+        self.max_word_length = 0
+        self.box_size = self.max_box_size
 
         with self.canvas.before:
             Color(0.2, 0.2, 0.2, 1) # Dark gray background
 
-        for _ in range(self.num_tries * self.max_word_length):
-            word_box = Label(text='', size_hint=(None, None), size=(box_size, box_size), font_size=32, color=(0, 0, 0, 1))
-            with word_box.canvas.before:
-                Color(1, 1, 1, 1) # White background
-                word_box.rect = Rectangle(size=word_box.size, pos=word_box.pos)
-            word_box.bind(size=self._update_rect, pos=self._update_rect)
+        self.cells = []  # row-major, same order as the engine arrays
+
+        # changed cells are collected and repainted together on the next frame,
+        # so a reveal or gacha effect touching a whole row or column costs one pass
+        self.dirty = set()
+        self._flush_trigger = Clock.create_trigger(self.flush)
+        game.listener = self.mark_dirty
+        self.rebuild()
+
+    def new_cell(self):
+        word_box = Label(text='', size_hint=(None, None), color=(0, 0, 0, 1))
+        with word_box.canvas.before:
+            # owned for the whole life of the tile, repaints only change rgba
+            word_box.bg_color = Color(1, 1, 1, 1) # White background
+            word_box.rect = Rectangle(size=word_box.size, pos=word_box.pos)
+        word_box.bind(size=self._update_rect, pos=self._update_rect)
+        return word_box
+
+    def rebuild(self):
+        """
+        Match the number of tiles to the engine's board, keeping the tiles that already exist
+        The tiles flow left to right, so changing the word length only needs the new width.
+        """
+        num_cells = self.game.num_tries * self.game.max_word_length
+        while len(self.cells) > num_cells:
+            self.remove_widget(self.cells.pop())
+        while len(self.cells) < num_cells:
+            word_box = self.new_cell()
             self.add_widget(word_box)
+            self.cells.append(word_box)
+        self.num_tries = self.game.num_tries
+        self.max_word_length = self.game.max_word_length
+        self.fit()
+        self.refresh()
+
+    def on_parent(self, widget, parent):
+        if parent is not None:
+            parent.bind(size=self.fit)
+            self.fit()
+
+    def fit(self, *args):
+        """
+        Size the tiles to the largest that lets the whole board fit in the parent
+        """
+        cols, rows = self.max_word_length, self.num_tries
+        ratio = self.spacing_ratio
+        box_size = self.max_box_size
+        if self.parent is not None:
+            width, height = self.parent.size
+            box_size = min(box_size,
+                           width / (cols + (cols + 1) * ratio),
+                           height / (rows + (rows + 1) * ratio))
+        # whole pixels, so the rows of the stack layout wrap exactly after cols tiles
+        box_size = max(8, int(box_size))
+        gap = max(1, int(round(box_size * ratio)))
+        self.spacing = gap
+        self.padding = gap
+        self.width = cols * box_size + (cols + 1) * gap
+        self.height = rows * box_size + (rows + 1) * gap
+        if box_size == self.box_size and self.cells and self.cells[-1].width == box_size:
+            return
+        self.box_size = box_size
+        font_size = box_size * self.font_ratio
+        for word_box in self.cells:
+            word_box.size = (box_size, box_size)
+            word_box.font_size = font_size
 
     def _update_rect(self, instance, value):
         instance.rect.pos = instance.pos
         instance.rect.size = instance.size
-    
-    def update_hidden_text(self, new_hidden_text):
-        self.hidden_text = new_hidden_text.upper()
-        self.max_word_length = len(self.hidden_text)
 
-    def reveal_letter(self, index):
+    def refresh_cell(self, index):
         """
-        Reveal the letter at the given index on the board
+        Repaint one tile from the engine state
+
         Args:
-            index (int): Index of the letter in the hidden text
+            index (int): Row-major index of the cell
         """
-        self.is_letter_revealed[index] = True
-        for row in range(self.num_tries):
-            for col in range(self.max_word_length):
-                if col == index:
-                    self.set_box_state(row, col, 1) # set to changable to change the text
-                    self.add_letter_at(row, col, self.hidden_text[index])
-                    self.set_box_state(row, col, 2)  # set to revealed
+        word_box = self.cells[index]
+        word_box.text = self.game.letters[index]
+
+        feedback = self.game.feedback[index]
+        if feedback:
+            rgba = self.feedback_colors[feedback]
+        else:
+            rgba = self.state_colors[self.game.box_state[index]]
 
-    def reset(self):
-        for word_box in self.children:
-            word_box.text = ''
-            word_box.canvas.before.clear()
-            with word_box.canvas.before:
-                Color(1, 1, 1, 1) # White background
-                word_box.rect = Rectangle(size=word_box.size, pos=word_box.pos)
+        word_box.bg_color.rgba = rgba
 
-    def check_current_row(self, cur_row):
+    def mark_dirty(self, index):
         """
-        Check the words in the current row and color them 
+        Schedule a tile to be repainted on the next frame
 
         Args:
-            row (int): Current row index
-        Return:
-            tuple: (Number of correct letters in correct position, dict of letter states)
-        """
-        num_corrects = 0
-        letter_states = {}
-        guessed_letter = []
-        # precheck
-        for c in range(self.max_word_length):
-            index = cur_row * self.max_word_length + c
-            word_box = self.children[len(self.children) - 1 - index]
-            letter = word_box.text
-            if not letter:
-                return 0, {}  # incomplete row
-            guessed_letter.append(letter)
-            
-        for c in range(self.max_word_length):
-            index = cur_row * self.max_word_length + c
-            word_box = self.children[len(self.children) - 1 - index]
-            letter = word_box.text
-            
-            word_box.canvas.before.clear() #important!!!!!!!!!!!!!
-            word_box.color = (0, 0, 0, 1) 
-
-            if word_box.text == self.hidden_text[c]:
-                num_corrects += 1
-                letter_states[letter] = 'correct'
-                with word_box.canvas.before:
-                    Color(0, 1, 0, 1)  # Green (for correct letters in correct position)
-                    word_box.rect = Rectangle(size=word_box.size, pos=word_box.pos)
-
-            elif word_box.text in self.hidden_text:
-                if letter_states.get(letter, '-1') == '-1' or letter_states[letter] != 'correct':
-                    letter_states[letter] = 'present'
-                with word_box.canvas.before:
-                    Color(1, 1, 0, 1)  # Yellow (for correct letters in wrong position)
-                    word_box.rect = Rectangle(size=word_box.size, pos=word_box.pos)
-
-            else:
-                if letter_states.get(letter, '-1') == '-1':
-                    letter_states[letter] = 'absent'
-
-                with word_box.canvas.before:
-                    Color(0.5, 0.5, 0.5, 1)  # Gray (for incorrect letters)
-                    word_box.rect = Rectangle(size=word_box.size, pos=word_box.pos)
-
-        return num_corrects, letter_states
-
-    def add_letter_at(self, row, col, letter):
-        index = row * self.max_word_length + col
-        if 0 <= index < len(self.children):
-            if self.box_state.get(index) == 1:
-                self.children[len(self.children) - 1 - index].text = letter.upper()
-                return 1
-            else:
-                return 0
-
-    def delete_letter_at(self, row, col):
-        index = row * self.max_word_length + col
-        if 0 <= index < len(self.children):
-            if self.box_state.get(index) == 1:
-                self.children[len(self.children) - 1 - index].text = ''
-                return 1
-            else:
-                return 0
-
-
-    def set_box_state(self, row, col, state: int): # force state to be an int
-        """
-        Set the state of a box
+            index (int): Row-major index of the cell
+        """
+        self.dirty.add(index)
+        self._flush_trigger()
 
-        Args:
-            row (int): Row index
-            col (int): Column index
-            state (int): State to set (0 for locked, 1 for changable, 2 for revealed)
-        """
-        index = row * self.max_word_length + col
-        self.box_state[index] = state
-        child_index = len(self.children) - 1 - index
-        word_box = self.children[child_index]
-        
-        word_box.canvas.before.clear()
-        with word_box.canvas.before:
-            if state == 0:
-                Color(1, 0, 0, 1)  # ff0000 for locked boxes
-            elif state == 1:
-                Color(1, 1, 1, 1)  # White for changable boxes
-            elif state == 2:
-                Color(0.6, 1, 0.6, 1)  # Light green for revealed boxes
-            word_box.rect = Rectangle(size=word_box.size, pos=word_box.pos)
-        
-        word_box.rect.pos = word_box.pos
-        word_box.rect.size = word_box.size
+    @timed('board_flush')
+    def flush(self, *args):
+        """
+        Repaint every tile changed since the last frame
+        """
+        game = self.game
+        if game.num_tries != self.num_tries or game.max_word_length != self.max_word_length:
+            self.rebuild()  # the engine was reset to another board size, repaints everything
+            return
+        dirty = self.dirty
+        if not dirty:
+            return
+        self.dirty = set()
+        for index in dirty:
+            self.refresh_cell(index)
+
+    def refresh(self):
+        """
+        Repaint every tile from the engine state
+        """
+        self.dirty.clear()
+        self._flush_trigger.cancel()
+        for index in range(len(self.cells)):
+            self.refresh_cell(index)
         
 
+"""
+Popup with a column of markup labels over a row of buttons
+Built once and reused: show() only replaces the texts that change, and the
+buttons call methods of the screen instead of closures over a fresh popup.
+"""
+class MessagePopup(Popup):
+    def __init__(self, texts, heights, buttons, button_height=0.2, **kwargs):
+        """
+        Args:
+            texts (list): Initial text of each label
+            heights (list): size_hint_y of each label
+            buttons (list): (text, background color, callback) of each button, callback gets the popup
+            button_height (float): size_hint_y of the button row
+        """
+        super().__init__(auto_dismiss=False, **kwargs)
+        layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
+        self.labels = []
+        for text, height in zip(texts, heights):
+            label = Label(text=text, markup=True, size_hint_y=height)
+            self.labels.append(label)
+            layout.add_widget(label)
+
+        button_layout = BoxLayout(size_hint_y=button_height, spacing=10)
+        self.callbacks = {}
+        for text, color, callback in buttons:
+            button = Button(text=text, background_color=color, bold=True)
+            button.bind(on_release=self._on_button)
+            self.callbacks[button] = callback
+            button_layout.add_widget(button)
+        layout.add_widget(button_layout)
+        self.content = layout
+
+    def _on_button(self, button):
+        self.callbacks[button](self)
+
+    def show(self, *texts):
+        """
+        Open the popup, each text that is not None replaces the label at the same position
+        """
+        for label, text in zip(self.labels, texts):
+            if text is not None:
+                label.text = text
+        if self._is_open:
+            # still fading out from its last use, finish that first or open() does nothing
+            Animation.cancel_all(self, '_anim_alpha')
+            self._real_remove_widget()
+        self.open()
+
+
 """
 Main game screen
 Most of the game logic is handled here
@@ -279,29 +374,49 @@ class GameScreenManager(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.gacha_system = Gacha()
-        self.winning_streak = 0  # Track winning streak
-        self.total_games = 0
-        self.total_wins = 0
-        self.current_row = 0
-        self.current_col = 0
-
-        self.word_list = [
-            "apple", "grape", "mango", "pearl", "stone",
-            "chair", "table", "plant", "light", "sound",
-            "crane", "flame", "brick", "sword", "cloud",
-            "coder", "debug", "array", "stack", "queue",
-            "globe", "flock", "brave", "charm", "dwarf",
-            "lunar", "comet", "popup", "pixel", "vivid",
-            "frost", "blaze", "lemon", "candy", "baker",
-            "burst", "quest", "dream", "tiger", "zebra",
-            "nerdy", "grant", "juice", "stove", "scale",
-            "cigar", "movie", "focus", "piano", "robot",
-            "evade", "watch", "erode", "refer", "awake",
-            "serve", "query", "gamer", "noble", "pride"
-        ]
-        self.num_tries = 6
-        self.hidden_text = self.keyword_generator()
+        self.stats = StatsStore()
+        self.replay_log = ReplayWriter(open(REPLAY_PATH, 'ab'))
+        totals = self.stats.totals()
+        self.winning_streak = totals['streak']  # Track winning streak
+        self.total_games = totals['games']
+        self.total_wins = totals['wins']
+
+        word_length = int(os.environ.get('WORDLE_LENGTH', 5))
+        if not MIN_WORD_LENGTH <= word_length <= MAX_WORD_LENGTH:
+            print(f"Word length must be between {MIN_WORD_LENGTH} and {MAX_WORD_LENGTH}, using 5.")
+            word_length = 5
+        self.load_word_lists(word_length)
+        self.num_tries = max(1, int(os.environ.get('WORDLE_TRIES', 6)))
+        self.hard_mode = os.environ.get('WORDLE_HARD', '') not in ('', '0')
+        seed = os.environ.get('WORDLE_SEED')
+        self.seed = int(seed) if seed else None  # replays the first game of the session when set
+        self.game_rng = None
+        self.daily_date = None  # day of the puzzle while a daily one is on the board
+        daily = os.environ.get('WORDLE_DAILY')  # YYYY-MM-DD, or any other value for today's puzzle
+        date = None
+        if daily:
+            date = datetime.date.fromisoformat(daily) if daily[0].isdigit() else datetime.date.today()
+            if self.stats.played(daily_rng(date).seed):
+                print(f"The daily puzzle of {date.isoformat()} was already played")
+                date = None
+        if date is not None:
+            # not kept as game_rng: the date is public, the session's own games must not derive from it
+            rng = daily_rng(date)
+            self.hidden_text = daily_word(self.word_list, date)
+        else:
+            rng = self.next_game_rng()
+            self.hidden_text = self.keyword_generator(rng)
         self.max_word_length = len(self.hidden_text)
+        self.game = WordleGame(self.hidden_text, num_tries=self.num_tries, dictionary=self.dictionary, rng=rng,
+                               hard_mode=self.hard_mode)
+        self.solver = None  # built on the first hint
+        self.popups = {}  # kind -> MessagePopup, built the first time it is shown
+        self.key_queue = KeyQueue(self.handle_key_input)
+        # the game is saved at most once per frame after a move, every interval and on exit
+        self._snapshot_trigger = Clock.create_trigger(self.save_snapshot)
+        Clock.schedule_interval(self.save_snapshot, snapshot.SNAPSHOT_INTERVAL)
+        if self.seed is not None or daily or not self.resume_game():
+            self.begin_game(date)
         
         self._keyboard = Window.request_keyboard(self._keyboard_closed, self)
         self._keyboard.bind(on_key_down=self._on_keyboard_down)
@@ -329,9 +444,16 @@ class GameScreenManager(Screen):
             font_size='18sp',
             size_hint_x=0.3
         )
+        self.hint_label = Label(
+            text='',
+            markup=True,
+            font_size='18sp',
+            size_hint_x=0.3
+        )
         stats_layout.add_widget(self.streak_label)
         stats_layout.add_widget(self.games_label)
         stats_layout.add_widget(self.wins_label)
+        stats_layout.add_widget(self.hint_label)
 
         # gacha button
         self.gacha_btn = Button(
@@ -342,14 +464,23 @@ class GameScreenManager(Screen):
             font_size='18sp'
         )
         self.gacha_btn.bind(on_press=lambda x: self.gacha())
+
+        # hint button
+        self.hint_btn = Button(
+            text='HINT',
+            background_color=(0.6, 0.5, 0.2, 1),
+            bold=True,
+            font_size='18sp'
+        )
+        self.hint_btn.bind(on_press=lambda x: self.show_hint())
         
         # Game board
         self.game_main_layout = AnchorLayout(anchor_x='center', anchor_y='center', size_hint_y=0.6)
-        self.gamebox_layout = GameBoxLayout(hidden_text=self.hidden_text, word_list=self.word_list)
+        self.gamebox_layout = GameBoxLayout(game=self.game)
         self.game_main_layout.add_widget(self.gamebox_layout)
         
         # Virtual keyboard
-        self.virtual_keyboard = VirtualKeyboard(handle_key_input=self.handle_key_input, size_hint_y=None)
+        self.virtual_keyboard = VirtualKeyboard(handle_key_input=self.key_queue.push, size_hint_y=None)
         self.virtual_keyboard.height = 140
         
         button_layout = BoxLayout(size_hint_y=0.08, spacing=20, size_hint_x=0.5, pos_hint={'center_x': 0.5})
@@ -372,13 +503,24 @@ class GameScreenManager(Screen):
         
         button_layout.add_widget(self.surrender_btn)
         button_layout.add_widget(self.menu_btn)
+        button_layout.add_widget(self.hint_btn)
         button_layout.add_widget(self.gacha_btn)
         main_container.add_widget(stats_layout)
         main_container.add_widget(self.game_main_layout)
         main_container.add_widget(self.virtual_keyboard)
+        self.virtual_keyboard.sync(self.game.keyboard)  # letters known in a resumed game
         main_container.add_widget(button_layout)
         self.add_widget(main_container)
 
+    @property
+    def current_row(self):
+        return self.game.current_row
+
+    @property
+    def current_col(self):
+        return self.game.current_col
+
+    @timed('handle_key_input')
     def handle_key_input(self, key):
         """
         Handle keyboard input for physical and virtual keyboards
@@ -387,50 +529,37 @@ class GameScreenManager(Screen):
             key (str): The key pressed ('backspace', 'enter', or a letter)
         """
         if key == 'backspace':
-            if self.current_col > 0:
-                is_delete = self.gamebox_layout.delete_letter_at(self.current_row, self.current_col-1)
-                if is_delete:
-                    self.current_col = max(0, self.current_col - 1)
-                else:
-                    while self.current_col - 1 >= 0:
-                        self.current_col -= 1
-                        is_delete = self.gamebox_layout.delete_letter_at(self.current_row, self.current_col - 1)
-                        if is_delete:
-                            self.current_col = max(0, self.current_col - 1)
-                            return True
+            self.replay_log.key(key)
+            self.game.backspace()
         elif len(key) == 1 and 'a' <= key <= 'z':
-            if self.current_col < self.max_word_length:
-                is_add = self.gamebox_layout.add_letter_at(self.current_row, self.current_col, key.upper())
-                if is_add:
-                    self.current_col += 1
-                else:
-                    while self.current_col + 1 < self.max_word_length:
-                        self.current_col += 1  # skip locked box
-                        is_add = self.gamebox_layout.add_letter_at(self.current_row, self.current_col, key.upper())
-                        if is_add:
-                            self.current_col += 1
-                            return True
+            self.replay_log.key(key)
+            self.game.type_letter(key)
         elif key == 'enter':
-            num_correct, letter_states = self.gamebox_layout.check_current_row(self.current_row)
+            error = self.game.row_error(self.game.current_row)
+            if error is not None:
+                print(f"{error}, cannot submit.")
+                self.hint_label.text = f'[b]{error}[/b]'
+                return True
+            # rejected rows are not logged, so a replay does not need the dictionary
+            self.replay_log.key(key)
+            num_correct, letter_states = self.game.submit()
             if letter_states == {}:
                 print("Incomplete row, cannot submit.")
                 return True
+            self.replay_log.submit(self.game.history[-1][1])
             
-            # Update virtual keyboard color
-            for letter, state in letter_states.items():
-                self.virtual_keyboard.update_key_color(letter, state)
-            
-            self.current_row += 1
-            self.current_col = 0
+            # Update virtual keyboard color, only the keys this row changed
+            self.virtual_keyboard.sync(self.game.keyboard)
             
             # Winning state
-            if num_correct == self.max_word_length:
+            if self.game.won:
                 self.handle_win()
                 
             # Game over state
-            elif self.current_row >= self.num_tries:
+            elif self.game.lost:
                 self.handle_game_over()
 
+        self._snapshot_trigger()
         return True
 
     def _keyboard_closed(self):
@@ -445,19 +574,38 @@ class GameScreenManager(Screen):
         3. Enter: submit current row
         4. Ignore other keys
         """
+        if self.manager is not None and self.manager.current != self.name:
+            return False  # another screen (e.g. multi board) has the keyboard
         if keycode[1] == 'backspace':
-            self.handle_key_input('backspace')
+            self.key_queue.push('backspace')
         elif 'a' <= keycode[1] <= 'z' and len(keycode[1]) == 1:
-            self.handle_key_input(keycode[1])
+            self.key_queue.push(keycode[1])
         elif keycode[1] == 'enter':
-            self.handle_key_input('enter')
+            self.key_queue.push('enter')
         else:
             pass
         return True
     
     def gacha(self):
+        self.manager.get_screen('gacha_animation').source = self.name
         self.manager.current = 'gacha_animation'
+
+    def show_hint(self):
+        """
+        Show the guess that gives the most information about the remaining answers
+        """
+        if self.solver is None:
+            from solver import Solver  # deferred, most sessions never ask for a hint
+            guesses = None if self.dictionary is None else list(self.dictionary)
+            self.solver = Solver(list(self.word_list), guesses)
+            self.game.pattern_table = self.solver.table
+        guess = self.solver.suggest(self.game)
+        if guess:
+            self.hint_label.text = f'[b]Try: [color=c9b458]{guess}[/color][/b]'
+        else:
+            self.hint_label.text = '[b]No hint[/b]'
     
+    @timed('apply_gacha_result')
     def apply_gacha_result(self, result_func):
         """
         Apply the gacha result function to the game board
@@ -465,15 +613,15 @@ class GameScreenManager(Screen):
         Args:
             result_func: The gacha function to apply (from Gacha class)
         """
-        gamebox_layout = result_func(self.gamebox_layout, self.current_row)
+        result_func(self.game, self.game.current_row)
+        self.gacha_rolls.append(result_func.__name__)
+        self.replay_log.gacha(result_func.__name__)
         
-        if gamebox_layout is None:
-            if 'win' in result_func.__name__: # instant win
-                self.handle_win()
-            elif 'lose' in result_func.__name__: # instant lose
-                self.handle_game_over()
-        else:
-            self.gamebox_layout = gamebox_layout
+        if self.game.won: # instant win
+            self.handle_win()
+        elif self.game.lost: # instant lose
+            self.handle_game_over()
+        self._snapshot_trigger()
 
     def handle_win(self):
         """
@@ -483,49 +631,13 @@ class GameScreenManager(Screen):
         self.total_wins += 1
         self.winning_streak += 1
         self.update_stats_display()
+        self.record_game(WON)
         
-        winning_layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
-        
-        # labels
-        congrats_label = Label(
-            text=f'[b][size=32sp][color=6ac764]CONGRATULATIONS![/color][/size][/b]',
-            markup=True,
-            size_hint_y=0.25
-        )
         tries_text = f'[size=20sp]You found the word in [b][color=6ac764]{self.current_row}[/color][/b] {"try" if self.current_row == 1 else "tries"}![/size]'
-        tries_label = Label(text=tries_text, markup=True, size_hint_y=0.15)
         # show streak info
         streak_text = f'[size=22sp]Winning Streak: [b][color=ff9500]{self.winning_streak}[/color][/b][/size]'
-        streak_info_label = Label(text=streak_text, markup=True, size_hint_y=0.15)
-        answer_label = Label(
-            text=f'[size=28sp]The word was: [b][color=6ac764]{self.gamebox_layout.hidden_text}[/color][/b][/size]',
-            markup=True,
-            size_hint_y=0.25
-        )
-        
-        
-        button_layout = BoxLayout(size_hint_y=0.2, spacing=10)
-        play_again_btn = Button(text='PLAY AGAIN', background_color=(0.3, 0.7, 0.3, 1), bold=True)
-        menu_btn = Button(text='MAIN MENU', background_color=(0.5, 0.5, 0.5, 1), bold=True)
-        button_layout.add_widget(play_again_btn)
-        button_layout.add_widget(menu_btn)
-        
-        win_popup = Popup(
-            title='Victory!',
-            content=winning_layout,
-            size_hint=(0.7, 0.5),
-            separator_color=(0.4, 0.8, 0.4, 1),
-            auto_dismiss=False
-        )
-        
-        play_again_btn.bind(on_release=lambda x: self.restart_game(win_popup))
-        menu_btn.bind(on_release=lambda x: self.back_to_menu_with_reset(win_popup))
-        winning_layout.add_widget(congrats_label)
-        winning_layout.add_widget(tries_label)
-        winning_layout.add_widget(streak_info_label)
-        winning_layout.add_widget(answer_label)
-        winning_layout.add_widget(button_layout)
-        win_popup.open()
+        answer_text = f'[size=28sp]The word was: [b][color=6ac764]{self.game.hidden_text}[/color][/b][/size]'
+        self.get_popup('win').show(None, tries_text, streak_text, answer_text)
     
     def handle_game_over(self):
         """
@@ -534,55 +646,217 @@ class GameScreenManager(Screen):
         self.total_games += 1
         self.winning_streak = 0  # reset streak when loss
         self.update_stats_display()
+        self.record_game(LOST)
         
-        gameover_layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
-        
-        # labels
-        gameover_label = Label(
-            text='[b][size=32sp][color=c9b458]GAME OVER[/color][/size][/b]',
-            markup=True,
-            size_hint_y=0.3
-        )
-        fail_label = Label(
-            text='[size=18sp]Better luck next time![/size]',
-            markup=True,
-            size_hint_y=0.2
-        )
-        answer_label = Label(
-            text=f'[size=24sp]The word was: [b][color=ff6b6b]{self.gamebox_layout.hidden_text}[/color][/b][/size]',
-            markup=True,
-            size_hint_y=0.3
-        )
-        
-        button_layout = BoxLayout(size_hint_y=0.2, spacing=10)
-        try_again_btn = Button(text='TRY AGAIN', background_color=(0.3, 0.7, 0.3, 1), bold=True)
-        menu_btn = Button(text='MAIN MENU', background_color=(0.5, 0.5, 0.5, 1), bold=True)
-        button_layout.add_widget(try_again_btn)
-        button_layout.add_widget(menu_btn)
-        
-        gameover_popup = Popup(
-            title='Game Over',
-            content=gameover_layout,
-            size_hint=(0.7, 0.5),
-            separator_color=(0.8, 0.4, 0.4, 1),
-            auto_dismiss=False
-        )
-        try_again_btn.bind(on_release=lambda x: self.restart_game(gameover_popup))
-        menu_btn.bind(on_release=lambda x: self.back_to_menu_with_reset(gameover_popup))
-        gameover_layout.add_widget(gameover_label)
-        gameover_layout.add_widget(fail_label)
-        gameover_layout.add_widget(answer_label)
-        gameover_layout.add_widget(button_layout)
-        gameover_popup.open()
+        answer_text = f'[size=24sp]The word was: [b][color=ff6b6b]{self.game.hidden_text}[/color][/b][/size]'
+        self.get_popup('game_over').show(None, None, answer_text)
     
-    def keyword_generator(self):
+    def get_popup(self, kind):
         """
-        Pick a random 5 letters keyword for the game
+        Cached popup of the given kind ('win', 'game_over', 'surrender' or 'confirm')
         """
-        keyword = random.choice(self.word_list).upper()
+        popup = self.popups.get(kind)
+        if popup is None:
+            popup = self.build_popup(kind)
+            self.popups[kind] = popup
+        return popup
+
+    def build_popup(self, kind):
+        green = (0.3, 0.7, 0.3, 1)
+        gray = (0.5, 0.5, 0.5, 1)
+        red = (0.8, 0.3, 0.3, 1)
+        if kind == 'win':
+            return MessagePopup(
+                texts=['[b][size=32sp][color=6ac764]CONGRATULATIONS![/color][/size][/b]', '', '', ''],
+                heights=[0.25, 0.15, 0.15, 0.25],
+                buttons=[('PLAY AGAIN', green, self.restart_game), ('MAIN MENU', gray, self.back_to_menu_with_reset)],
+                title='Victory!',
+                size_hint=(0.7, 0.5),
+                separator_color=(0.4, 0.8, 0.4, 1),
+            )
+        if kind == 'game_over':
+            return MessagePopup(
+                texts=['[b][size=32sp][color=c9b458]GAME OVER[/color][/size][/b]', '[size=18sp]Better luck next time![/size]', ''],
+                heights=[0.3, 0.2, 0.3],
+                buttons=[('TRY AGAIN', green, self.restart_game), ('MAIN MENU', gray, self.back_to_menu_with_reset)],
+                title='Game Over',
+                size_hint=(0.7, 0.5),
+                separator_color=(0.8, 0.4, 0.4, 1),
+            )
+        if kind == 'surrender':
+            return MessagePopup(
+                texts=['[b][size=28sp][color=ff6b6b]YOU SURRENDERED[/color][/size][/b]', '[size=18sp]Don\'t give up so easily next time![/size]', ''],
+                heights=[0.3, 0.2, 0.3],
+                buttons=[('TRY AGAIN', green, self.restart_game), ('MAIN MENU', gray, self.back_to_menu_with_reset)],
+                title='Surrendered',
+                size_hint=(0.7, 0.5),
+                separator_color=(0.8, 0.4, 0.4, 1),
+            )
+        if kind == 'confirm':
+            return MessagePopup(
+                texts=['[b][size=24sp]Leave Game?[/size][/b]', '[size=18sp]Your current progress will be lost.[/size]'],
+                heights=[0.4, 0.3],
+                buttons=[('STAY', green, Popup.dismiss), ('LEAVE', red, self.force_menu)],
+                button_height=0.3,
+                title='Confirm',
+                size_hint=(0.6, 0.4),
+            )
+        raise ValueError(f"Unknown popup kind {kind}")
+
+    def next_game_rng(self):
+        """
+        Random streams of the next game, each game is spawned from the previous one
+        so a session can be replayed from the seed of any of its games
+        """
+        if self.game_rng is None:
+            self.game_rng = GameRandom(self.seed)
+        else:
+            self.game_rng = self.game_rng.spawn('next')
+        print(f"Game seed: {self.game_rng.seed}")
+        return self.game_rng
+
+    def load_word_lists(self, word_length):
+        """
+        Load the answers and allowed guesses of a word length, the hint solver is rebuilt on demand
+        """
+        self.word_list = load_words(answers_path(word_length), word_length)
+        if len(self.word_list) == 0:
+            raise ValueError(f"No {word_length}-letter words in {answers_path(word_length)}")
+        allowed = load_allowed(allowed_path(word_length), word_length)
+        self.dictionary = None if allowed is None else allowed.union(self.word_list)
+        self.solver = None
+
+    def keyword_generator(self, rng):
+        """
+        Pick a random keyword of the current word length for the game
+        """
+        keyword = rng.answer.choice(self.word_list).upper()
         print(keyword)
         return keyword
     
+    def start_daily(self, date=None):
+        """
+        Play the daily puzzle: the answer and the gacha streams depend only on the date,
+        so every install gets the same game. Each day's puzzle is played once, a recorded
+        one is not started again. Guesses already made in another game count as abandoning
+        it, as when leaving it through the menu.
+
+        Args:
+            date (datetime.date): Day of the puzzle, today if None
+        Return:
+            bool: False if the puzzle of that day was already played
+        """
+        date = date or datetime.date.today()
+        if self.daily_date == date and not self.game_recorded:
+            return True  # already playing it
+        rng = daily_rng(date)
+        if self.stats.played(rng.seed):
+            return False
+        if self.current_row > 0 and not self.game_recorded:
+            self.winning_streak = 0
+            self.update_stats_display()
+            self.record_game(ABANDONED)
+        # game_rng is left alone: the date is public, the session's own games must not derive from it
+        print(f"Daily puzzle {date.isoformat()}, game seed: {rng.seed}")
+        self.hidden_text = daily_word(self.word_list, date)
+        self.game.reset(self.hidden_text, rng)
+        self.begin_game(date)
+        self.virtual_keyboard.reset_keyboard()
+        self.hint_label.text = ''
+        return True
+
+    def begin_game(self, daily_date=None):
+        """
+        Start timing and logging a new game and forget the gacha results of the previous one
+
+        Args:
+            daily_date (datetime.date): Day of the puzzle if the game is a daily one
+        """
+        self.daily_date = daily_date
+        self.key_queue.clear()  # keys typed for the previous game
+        self.game_started = time.perf_counter()
+        self.gacha_rolls = []
+        self.game_recorded = False
+        self.replay_log.start(self.game)
+        self._snapshot_trigger()
+
+    def resume_game(self):
+        """
+        Continue the game saved by the last session if it was still being played
+        Its replay log record continues too, since no START is written for it.
+
+        Return:
+            bool: True if a game was resumed
+        """
+        data = snapshot.load(snapshot.SNAPSHOT_PATH)
+        if data is None:
+            return False
+        try:
+            game, items, elapsed, daily_date = snapshot.decode(data)
+        except snapshot.SnapshotError as e:
+            print(f"Could not resume the saved game: {e}")
+            return False
+        if game.status != PLAYING:
+            return False
+        if game.max_word_length != self.max_word_length:
+            self.load_word_lists(game.max_word_length)
+        game.dictionary = self.dictionary
+        game.hard_mode = self.hard_mode
+        self.game = game
+        if daily_date is None:
+            self.game_rng = game.rng
+        self.daily_date = daily_date
+        self.hidden_text = game.hidden_text
+        self.max_word_length = game.max_word_length
+        self.game_started = time.perf_counter() - elapsed
+        self.gacha_rolls = items
+        self.game_recorded = False
+        print(f"Resumed game seed: {game.rng.seed}")
+        return True
+
+    @timed('save_snapshot')
+    def save_snapshot(self, *args, durable=False):
+        """
+        Save the game in progress, nothing is saved once it was recorded as finished
+        """
+        if self.game_recorded:
+            return
+        data = snapshot.encode(self.game, self.gacha_rolls, time.perf_counter() - self.game_started, self.daily_date)
+        self.replay_log.flush()  # the log must hold every event the snapshot includes
+        try:
+            snapshot.save(data, snapshot.SNAPSHOT_PATH, durable)
+        except OSError as e:
+            print(f"Could not save the game: {e}")
+
+    def record_game(self, outcome):
+        """
+        Append the current game to the statistics store, the write happens off the UI thread
+
+        Args:
+            outcome (str): WON, LOST, SURRENDERED or ABANDONED
+        """
+        self.stats.record(GameRecord(
+            answer=self.game.hidden_text,
+            outcome=outcome,
+            tries=self.current_row,
+            items=self.gacha_rolls,
+            duration=time.perf_counter() - self.game_started,
+            seed=self.game.rng.seed,
+        ))
+        self.replay_log.end(outcome, self.current_row)
+        self.replay_log.flush()
+        self.game_recorded = True
+        snapshot.delete(snapshot.SNAPSHOT_PATH)  # a finished game is not resumed
+
+    def shutdown(self):
+        """
+        Save the game in progress and write out everything still buffered for the statistics and the replay log
+        """
+        self._snapshot_trigger.cancel()
+        self.save_snapshot(durable=True)
+        self.stats.close()
+        self.replay_log.close()
+
     def update_stats_display(self):
         """
         Update the statistics display
@@ -599,85 +873,17 @@ class GameScreenManager(Screen):
         self.total_games += 1
         self.winning_streak = 0
         self.update_stats_display()
+        self.record_game(SURRENDERED)
 
-        surrender_layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
-        
-        # labels
-        surrender_label = Label(
-            text='[b][size=28sp][color=ff6b6b]YOU SURRENDERED[/color][/size][/b]',
-            markup=True,
-            size_hint_y=0.3
-        )
-        message_label = Label(
-            text='[size=18sp]Don\'t give up so easily next time![/size]',
-            markup=True,
-            size_hint_y=0.2
-        )
-        answer_label = Label(
-            text=f'[size=24sp]The word was: [b][color=c9b458]{self.gamebox_layout.hidden_text}[/color][/b][/size]',
-            markup=True,
-            size_hint_y=0.3
-        )
-        
-        button_layout = BoxLayout(size_hint_y=0.2, spacing=10)
-        try_again_btn = Button(text='TRY AGAIN', background_color=(0.3, 0.7, 0.3, 1), bold=True)
-        menu_btn = Button(text='MAIN MENU', background_color=(0.5, 0.5, 0.5, 1), bold=True)
-        button_layout.add_widget(try_again_btn)
-        button_layout.add_widget(menu_btn)
-        
-        surrender_popup = Popup(
-            title='Surrendered',
-            content=surrender_layout,
-            size_hint=(0.7, 0.5),
-            separator_color=(0.8, 0.4, 0.4, 1),
-            auto_dismiss=False
-        )
-        try_again_btn.bind(on_release=lambda x: self.restart_game(surrender_popup))
-        menu_btn.bind(on_release=lambda x: self.back_to_menu_with_reset(surrender_popup))
-        surrender_layout.add_widget(surrender_label)
-        surrender_layout.add_widget(message_label)
-        surrender_layout.add_widget(answer_label)
-        surrender_layout.add_widget(button_layout)
-        surrender_popup.open()
+        answer_text = f'[size=24sp]The word was: [b][color=c9b458]{self.game.hidden_text}[/color][/b][/size]'
+        self.get_popup('surrender').show(None, None, answer_text)
     
     def confirm_menu(self):
         """
         Confirm before going back to menu
         """
         if self.current_row > 0:  # Only confirm if game in progress
-            confirm_layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
-            
-            # labels
-            warning_label = Label(
-                text='[b][size=24sp]Leave Game?[/size][/b]',
-                markup=True,
-                size_hint_y=0.4
-            )
-            message_label = Label(
-                text='[size=18sp]Your current progress will be lost.[/size]',
-                markup=True,
-                size_hint_y=0.3
-            )
-            
-            button_layout = BoxLayout(size_hint_y=0.3, spacing=10)
-            stay_btn = Button(text='STAY', background_color=(0.3, 0.7, 0.3, 1), bold=True)
-            leave_btn = Button(text='LEAVE', background_color=(0.8, 0.3, 0.3, 1), bold=True)
-            button_layout.add_widget(stay_btn)
-            button_layout.add_widget(leave_btn)
-            
-            confirm_popup = Popup(
-                title='Confirm',
-                content=confirm_layout,
-                size_hint=(0.6, 0.4),
-                auto_dismiss=False
-            )
-            
-            stay_btn.bind(on_release=confirm_popup.dismiss)
-            leave_btn.bind(on_release=lambda x: self.force_menu(confirm_popup))
-            confirm_layout.add_widget(warning_label)
-            confirm_layout.add_widget(message_label)
-            confirm_layout.add_widget(button_layout)
-            confirm_popup.open()
+            self.get_popup('confirm').show()
         else:
             self.back_to_menu()
     
@@ -686,12 +892,12 @@ class GameScreenManager(Screen):
         Restart the game without going back to menu
         """
         popup.dismiss()
-        self.current_row = 0
-        self.current_col = 0
-        self.hidden_text = self.keyword_generator()
-        self.gamebox_layout.update_hidden_text(self.hidden_text)
-        self.gamebox_layout.reset()
+        rng = self.next_game_rng()
+        self.hidden_text = self.keyword_generator(rng)
+        self.game.reset(self.hidden_text, rng)
+        self.begin_game()
         self.virtual_keyboard.reset_keyboard()
+        self.hint_label.text = ''
     
     def back_to_menu(self):
         self.manager.current = 'main_menu'
@@ -702,10 +908,16 @@ class GameScreenManager(Screen):
         """
         if popup:
             popup.dismiss()
-        self.current_row = 0
-        self.current_col = 0
-        self.gamebox_layout.reset()
+        rng = self.next_game_rng()
+        if self.daily_date is not None:
+            # the daily answer is only played as the daily puzzle
+            self.hidden_text = self.keyword_generator(rng)
+            self.game.reset(self.hidden_text, rng)
+        else:
+            self.game.reset(rng=rng)  # same word, fresh streams so the game can be replayed
+        self.begin_game()
         self.virtual_keyboard.reset_keyboard()
+        self.hint_label.text = ''
         self.back_to_menu()
     
     def force_menu(self, popup):
@@ -715,5 +927,6 @@ class GameScreenManager(Screen):
         popup.dismiss()
         self.winning_streak = 0
         self.update_stats_display()
+        self.record_game(ABANDONED)
         self.virtual_keyboard.reset_keyboard()
         self.back_to_menu_with_reset(None)
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from timing import Histogram
+from words import load_words, answers_path
+from server import encode_frame, read_frame, WS_TEXT
+
+"""
+Load generator for server.py
+Every simulated client plays whole games over one keep-alive HTTP
+connection (or one WebSocket): it starts a session, guesses random answers
+and rolls the gacha now and then until the game ends. Latencies go into
+the same log-bucket histograms as the in-app timing, and the report gives
+the throughput and p50/p99 of every operation.
+
+    python loadgen.py --spawn --clients 500 --duration 10
+    python loadgen.py --port 8765 --ws
+"""
+
+
+class HttpClient:
+    def __init__(self, reader, writer, host):
+        self.reader = reader
+        self.writer = writer
+        self.host = host
+
+    async def call(self, op, params):
+        body = json.dumps(params).encode()
+        self.writer.write(
+            f"POST /{op} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split(' ')[1])
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+
+class WebSocketClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, reader, writer, host):
+        writer.write(
+            f"GET /ws HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {os.urandom(16).hex()}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode())
+        await reader.readuntil(b'\r\n\r\n')
+        return cls(reader, writer)
+
+    async def call(self, op, params):
+        message = dict(params, op=op)
+        self.writer.write(encode_frame(WS_TEXT, json.dumps(message).encode(), os.urandom(4)))
+        _, payload = await read_frame(self.reader)
+        response = json.loads(payload)
+        return response['status'], response['result']
+
+
+class LoadGenerator:
+    def __init__(self, host, port, words, gacha_rate=0.2, websocket=False, seed=0):
+        self.host = host
+        self.port = port
+        self.words = [word.upper() for word in words]
+        self.gacha_rate = gacha_rate
+        self.websocket = websocket
+        self.rng = random.Random(seed)
+        self.histograms = {}
+        self.errors = {}
+        self.games = 0
+
+    def record(self, op, seconds):
+        hist = self.histograms.get(op)
+        if hist is None:
+            hist = self.histograms[op] = Histogram(op)
+        hist.add(seconds)
+
+    async def timed_call(self, client, op, params):
+        start = time.perf_counter()
+        status, result = await client.call(op, params)
+        self.record(op, time.perf_counter() - start)
+        if status != 200 and status != 409:  # 409: the gacha ended the game first
+            self.errors[status] = self.errors.get(status, 0) + 1
+        return status, result
+
+    async def client(self, deadline):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        host = f"{self.host}:{self.port}"
+        client = await WebSocketClient.connect(reader, writer, host) if self.websocket else HttpClient(reader, writer, host)
+        rng = self.rng
+        try:
+            while time.perf_counter() < deadline:
+                status, result = await self.timed_call(client, 'start', {})
+                if status != 200:
+                    continue
+                session = {'session': result['session']}
+                over = False
+                while not over and time.perf_counter() < deadline:
+                    if rng.random() < self.gacha_rate:
+                        status, result = await self.timed_call(client, 'gacha', session)
+                    else:
+                        status, result = await self.timed_call(client, 'guess', dict(session, word=rng.choice(self.words)))
+                    over = status == 409 or (status == 200 and result['status'] != 'playing')
+                self.games += over
+        finally:
+            writer.close()
+
+    async def run(self, clients, duration):
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*(self.client(deadline) for _ in range(clients)))
+        return time.perf_counter() - start
+
+
+def report(generator, elapsed):
+    total = sum(hist.count for hist in generator.histograms.values())
+    print(f"{total} requests in {elapsed:.1f}s: {total / elapsed:.0f} req/s, "
+          f"{generator.games} games finished ({generator.games / elapsed:.0f} games/s)")
+    print(f"{'operation':10s} {'count':>9s} {'p50 ms':>8s} {'p90 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for op in ('start', 'guess', 'gacha'):
+        hist = generator.histograms.get(op)
+        if hist is None:
+            continue
+        print(f"{op:10s} {hist.count:9d} {hist.percentile(50) * 1000:8.2f} {hist.percentile(90) * 1000:8.2f} "
+              f"{hist.percentile(99) * 1000:8.2f} {hist.max * 1000:8.2f}")
+    if generator.errors:
+        print("Errors: " + ', '.join(f"{status}: {count}" for status, count in sorted(generator.errors.items())))
+
+
+async def wait_for_server(host, port, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for the game server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, default=100, help='concurrent connections, each playing games in a loop')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--gacha-rate', type=float, default=0.2, help='chance of rolling the gacha instead of guessing')
+    parser.add_argument('--ws', action='store_true', help='use WebSocket instead of HTTP')
+    parser.add_argument('--length', type=int, default=5, help='word length the server plays with')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help='start server.py in a subprocess for the run')
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py'),
+                                   '--host', args.host, '--port', str(args.port), '--length', str(args.length)])
+    try:
+        asyncio.run(wait_for_server(args.host, args.port))
+        generator = LoadGenerator(args.host, args.port, load_words(answers_path(args.length), args.length),
+                                  args.gacha_rate, args.ws, args.seed)
+        elapsed = asyncio.run(generator.run(args.clients, args.duration))
+        report(generator, elapsed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,10 @@
+import os
+import time
+
+STARTED = time.perf_counter()  # before the Kivy imports, which are most of a cold start
+
+import importlib
+
 from kivy.app import App
 from kivy.uix.label import Label
 from kivy.uix.button import Button
@@ -7,24 +14,83 @@ from kivy.uix.popup import Popup
 from kivy.core.window import Window
 from kivy.lang import Builder
 
-from main_menu import MainMenuManager
-from game_screen import GameScreenManager
-from gacha_animation import GachaAnimationScreen
+import timing
+
+IMPORTED = time.perf_counter()
+
+# set to print the time to the first frame, 'exit' also closes the app right after
+STARTUP_TIME = os.environ.get('WORDLE_STARTUP_TIME')
 
 """
 Wordle game main application
 """
+class LazyScreenManager(ScreenManager):
+    """
+    Screen manager whose screens are registered by module and class name and only
+    imported and built the first time they are shown or looked up
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = {}
+
+    def register(self, name, module_name, class_name):
+        self.factories[name] = (module_name, class_name)
+
+    def get_screen(self, name):
+        factory = self.factories.pop(name, None)
+        if factory is not None:
+            start = time.perf_counter()
+            module_name, class_name = factory
+            screen_class = getattr(importlib.import_module(module_name), class_name)
+            self.add_widget(screen_class(name=name))
+            if STARTUP_TIME:
+                print(f"Built screen '{name}' in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return super().get_screen(name)
+
+    def has_screen(self, name):
+        return name in self.factories or super().has_screen(name)
+
+
 class GachaWordleApp(App):
+    stopped = False
+
     def build(self):
         Window.size = (1080, 720)
-        sm = ScreenManager()
-        self.GachaAnimationScreen = GachaAnimationScreen(name='gacha_animation')
-        sm.add_widget(MainMenuManager(name='main_menu'))
-        sm.add_widget(GameScreenManager(name='game_screen'))
-        sm.add_widget(self.GachaAnimationScreen)
+        sm = LazyScreenManager()
+        sm.register('main_menu', 'main_menu', 'MainMenuManager')
+        sm.register('game_screen', 'game_screen', 'GameScreenManager')
+        sm.register('gacha_animation', 'gacha_animation', 'GachaAnimationScreen')
+        sm.register('multi_board', 'multiboard', 'MultiBoardScreen')
+        sm.current = 'main_menu'
         Window.bind(on_request_close=self.on_exit)
+        if STARTUP_TIME:
+            self.built = time.perf_counter()
+            Window.bind(on_draw=self.report_startup)
         return sm
 
+    def report_startup(self, *args):
+        Window.unbind(on_draw=self.report_startup)
+        now = time.perf_counter()
+        print(f"First frame after {(now - STARTED) * 1000:.1f}ms "
+              f"(imports {(IMPORTED - STARTED) * 1000:.1f}ms, "
+              f"build {(self.built - IMPORTED) * 1000:.1f}ms, "
+              f"first draw {(now - self.built) * 1000:.1f}ms)")
+        if STARTUP_TIME == 'exit':
+            self.stop()
+
+    def on_start(self):
+        self.frame_timer = timing.install()
+
+    def on_stop(self):
+        if self.stopped:
+            return  # stop() and the end of run() both dispatch on_stop
+        self.stopped = True
+        # commit the games still queued for the statistics store and the replay log
+        if 'game_screen' in self.root.screen_names:
+            self.root.get_screen('game_screen').shutdown()
+        if timing.ENABLED:
+            timing.dump()
+
     def on_exit(self, *args):
         self.show_exit_popup()
         return True
@@ -47,4 +113,4 @@ class GachaWordleApp(App):
 
 if __name__ == '__main__':
     Builder.load_file('./wordle.kv')
-    GachaWordleApp().run()
\ No newline at end of file
+    GachaWordleApp().run()
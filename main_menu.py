@@ -5,10 +5,59 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.scrollview import ScrollView
 
+from engine import WON, LOST
+from gacha import GACHA_ITEMS
+from stats import SURRENDERED, ABANDONED
+
 """
 Main menu for the game
 Most of its UI is written in wordle.kv
 """
+
+OUTCOME_LABELS = ((WON, 'Won'), (LOST, 'Lost'), (SURRENDERED, 'Surrendered'), (ABANDONED, 'Abandoned'))
+ITEM_NAMES = {item['effect']: item['name'] for item in GACHA_ITEMS}
+
+
+def stats_text(stats, recent_games=5):
+    """
+    Markup of the statistics popup, every number comes from an indexed query of the store
+
+    Args:
+        stats (StatsStore): Store of the finished games
+        recent_games (int): Number of latest games listed
+    """
+    totals = stats.totals()
+    games = totals['games']
+    win_rate = round(100 * totals['wins'] / games) if games else 0
+    lines = [
+        f"[b]Played:[/b] {games}    [b]Win %:[/b] {win_rate}    "
+        f"[b]Streak:[/b] {totals['streak']}    [b]Best streak:[/b] {totals['best_streak']}",
+        '',
+        "[b][size=18sp]Guess Distribution[/size][/b]",
+    ]
+    distribution = stats.distribution()
+    most = max(distribution.values(), default=0)
+    for tries in sorted(distribution):
+        count = distribution[tries]
+        lines.append(f"{tries:>2}  [color=6ac764]{'|' * max(1, round(30 * count / most))}[/color] {count}")
+    if not distribution:
+        lines.append("No wins yet")
+
+    outcomes = stats.outcomes()
+    lines += ['', "[b][size=18sp]Outcomes[/size][/b]",
+              '    '.join(f"{label}: {outcomes.get(outcome, 0)}" for outcome, label in OUTCOME_LABELS)]
+
+    items = sorted(stats.item_counts().items(), key=lambda item: -item[1])
+    lines += ['', "[b][size=18sp]Gacha Rolls[/size][/b]"]
+    lines += [f"{ITEM_NAMES.get(effect, effect)}: {count}" for effect, count in items] or ["No rolls yet"]
+
+    recent = stats.recent(recent_games)
+    lines += ['', "[b][size=18sp]Recent Games[/size][/b]"]
+    lines += [f"[color=c9b458]{answer}[/color]  {outcome}, {tries} tries, {rolls} rolls, {duration:.0f}s"
+              for answer, outcome, tries, rolls, duration, seed in recent] or ["No games yet"]
+    return '\n'.join(lines)
+
+
 class MainMenuManager(Screen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -81,5 +130,73 @@ class MainMenuManager(Screen):
         close_btn.bind(on_press=popup.dismiss)
         popup.open()
 
+    def show_stats(self):
+        # games finished a moment ago may still be queued, the writer commits them within a frame or two
+        stats = self.manager.get_screen('game_screen').stats
+        content = BoxLayout(orientation='vertical', padding=15, spacing=10)
+        scroll_view = ScrollView(size_hint=(1, 0.9))
+        stats_label = Label(
+            text=stats_text(stats),
+            markup=True,
+            size_hint_y=None,
+            text_size=(700, None),
+            halign='left',
+            valign='top',
+            font_size='16sp'
+        )
+        stats_label.bind(texture_size=stats_label.setter('size'))
+        scroll_view.add_widget(stats_label)
+        close_btn = Button(
+            text='Close',
+            size_hint=(1, 0.1),
+            font_size='18sp',
+            bold=True,
+            background_normal='',
+            background_color=(0.5, 0.3, 0.6, 1)
+        )
+        content.add_widget(scroll_view)
+        content.add_widget(close_btn)
+        popup = Popup(
+            title='Statistics',
+            title_size='22sp',
+            content=content,
+            size_hint=(0.75, 0.85),
+            separator_color=(0.5, 0.3, 0.6, 1)
+        )
+        close_btn.bind(on_press=popup.dismiss)
+        popup.open()
+
     def enter_game(self):
         self.manager.current = 'game_screen'
+
+    def enter_daily(self):
+        if self.manager.get_screen('game_screen').start_daily():
+            self.manager.current = 'game_screen'
+            return
+        close_btn = Button(
+            text='OK',
+            size_hint=(1, 0.4),
+            font_size='18sp',
+            bold=True,
+            background_normal='',
+            background_color=(0.2, 0.5, 0.6, 1)
+        )
+        content = BoxLayout(orientation='vertical', padding=15, spacing=10)
+        content.add_widget(Label(
+            text="You already played today's puzzle.\nCome back tomorrow for a new one!",
+            halign='center',
+            font_size='18sp'
+        ))
+        content.add_widget(close_btn)
+        popup = Popup(
+            title='Daily Puzzle',
+            title_size='22sp',
+            content=content,
+            size_hint=(0.5, 0.4),
+            separator_color=(0.2, 0.5, 0.6, 1)
+        )
+        close_btn.bind(on_press=popup.dismiss)
+        popup.open()
+
+    def enter_multi_board(self):
+        self.manager.current = 'multi_board'
@@ -0,0 +1,394 @@
+from kivy.uix.label import Label
+from kivy.uix.button import Button
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.scrollview import ScrollView
+from kivy.uix.screenmanager import Screen
+from kivy.uix.widget import Widget
+from kivy.core.text import Label as CoreLabel
+from kivy.core.window import Window
+from kivy.graphics import Color, Rectangle, InstructionGroup
+from kivy.clock import Clock
+
+import os
+
+from gacha import Gacha
+from rng import GameRandom
+from words import load_words, load_allowed, answers_path, allowed_path
+from multigame import MultiGame, default_tries, MIN_BOARDS, MAX_BOARDS
+from game_screen import GameBoxLayout, VirtualKeyboard, MessagePopup, KeyQueue
+from timing import timed
+
+"""
+Multi-board mode: 4 to 32 boards answered with the same guesses
+Each board is one widget drawing its tiles straight on its canvas (a colored
+rectangle per tile plus a rectangle per letter, textured from a shared glyph
+cache) instead of a Label per tile, so 32 boards of 37 rows stay a few
+thousand canvas instructions and a guess repaints only the tiles it changed.
+"""
+
+BOARD_COUNTS = (4, 8, 16, 32)
+
+_glyphs = {}  # (letter, font size) -> texture, shared by every board
+
+
+def glyph(letter, font_size):
+    texture = _glyphs.get((letter, font_size))
+    if texture is None:
+        label = CoreLabel(text=letter, font_size=font_size, bold=True)
+        label.refresh()
+        texture = _glyphs[letter, font_size] = label.texture
+    return texture
+
+
+class MiniBoard(Widget):
+    """
+    Canvas-drawn board of one WordleGame, same colors as GameBoxLayout
+    """
+    spacing_ratio = 1 / 8
+    font_ratio = 0.6
+    min_box_size = 12  # below this the boards scroll instead of shrinking
+
+    def __init__(self, game, **kwargs):
+        super().__init__(**kwargs)
+        self.game = game
+        self.backgrounds = InstructionGroup()
+        self.glyphs = InstructionGroup()
+        self.canvas.add(self.backgrounds)
+        self.canvas.add(Color(0, 0, 0, 1))  # letters, black as on the main board
+        self.canvas.add(self.glyphs)
+        self.colors = []  # per cell, row-major as in the engine
+        self.tiles = []
+        self.letters = []
+        self.num_tries = 0
+        self.max_word_length = 0
+        self.box_size = 0
+        self.font_size = 0
+
+        self.dirty = set()
+        self._flush_trigger = Clock.create_trigger(self.flush)
+        game.listener = self.mark_dirty
+        self.bind(pos=self.layout, size=self.layout)
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Create the instructions of every tile of the engine's board
+        """
+        self.backgrounds.clear()
+        self.glyphs.clear()
+        self.colors = []
+        self.tiles = []
+        self.letters = []
+        for _ in range(self.game.num_tries * self.game.max_word_length):
+            color = Color(1, 1, 1, 1)
+            tile = Rectangle()
+            self.backgrounds.add(color)
+            self.backgrounds.add(tile)
+            letter = Rectangle(size=(0, 0))
+            self.glyphs.add(letter)
+            self.colors.append(color)
+            self.tiles.append(tile)
+            self.letters.append(letter)
+        self.num_tries = self.game.num_tries
+        self.max_word_length = self.game.max_word_length
+        self.layout()
+
+    def layout(self, *args):
+        """
+        Place the tiles at the largest size that fits the widget and repaint them
+        """
+        cols, rows = self.max_word_length, self.num_tries
+        ratio = self.spacing_ratio
+        box_size = max(2, int(min(self.width / (cols + (cols + 1) * ratio),
+                                  self.height / (rows + (rows + 1) * ratio))))
+        gap = max(1, int(round(box_size * ratio)))
+        step = box_size + gap
+        left = self.x + (self.width - cols * step - gap) / 2 + gap
+        top = self.top - (self.height - rows * step - gap) / 2 - gap
+        for index, tile in enumerate(self.tiles):
+            row, col = divmod(index, cols)
+            tile.pos = (left + col * step, top - row * step - box_size)
+            tile.size = (box_size, box_size)
+        self.box_size = box_size
+        self.font_size = max(1, int(box_size * self.font_ratio))
+        self.refresh()
+
+    def refresh_cell(self, index):
+        game = self.game
+        feedback = game.feedback[index]
+        if feedback:
+            self.colors[index].rgba = GameBoxLayout.feedback_colors[feedback]
+        else:
+            self.colors[index].rgba = GameBoxLayout.state_colors[game.box_state[index]]
+
+        letter = self.letters[index]
+        text = game.letters[index]
+        if not text:
+            letter.size = (0, 0)
+            return
+        texture = glyph(text, self.font_size)
+        x, y = self.tiles[index].pos
+        width, height = texture.size
+        letter.texture = texture
+        letter.size = (width, height)
+        letter.pos = (int(x + (self.box_size - width) / 2), int(y + (self.box_size - height) / 2))
+
+    def mark_dirty(self, index):
+        self.dirty.add(index)
+        self._flush_trigger()
+
+    @timed('multiboard_flush')
+    def flush(self, *args):
+        game = self.game
+        if game.num_tries != self.num_tries or game.max_word_length != self.max_word_length:
+            self.rebuild()
+            return
+        dirty = self.dirty
+        if not dirty:
+            return
+        self.dirty = set()
+        for index in dirty:
+            self.refresh_cell(index)
+
+    def refresh(self):
+        self.dirty.clear()
+        self._flush_trigger.cancel()
+        for index in range(len(self.tiles)):
+            self.refresh_cell(index)
+
+
+class MultiBoardScreen(Screen):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.gacha_system = Gacha()
+        self.word_list = list(load_words(answers_path(5), 5))
+        allowed = load_allowed(allowed_path(5), 5)
+        self.dictionary = None if allowed is None else allowed.union(self.word_list)
+
+        num_boards = int(os.environ.get('WORDLE_BOARDS', 4))
+        self.num_boards = min(max(num_boards, MIN_BOARDS), MAX_BOARDS)
+        self.game_rng = None
+        rng = self.next_game_rng()
+        self.game = MultiGame(self.pick_answers(rng), rng=rng, dictionary=self.dictionary)
+        self.popups = {}
+        self.key_queue = KeyQueue(self.handle_key_input)
+
+        main_container = BoxLayout(orientation='vertical', padding=10, spacing=10)
+
+        self.status_label = Label(markup=True, font_size='18sp', size_hint_y=0.06)
+        self.board_view = ScrollView(size_hint_y=0.7, do_scroll_x=False)
+        self.board_grid = GridLayout(spacing=8, size_hint_y=None)
+        self.board_view.add_widget(self.board_grid)
+        self.board_view.bind(height=self.fit_grid)
+        self.build_boards()
+
+        self.virtual_keyboard = VirtualKeyboard(handle_key_input=self.key_queue.push, size_hint_y=None)
+        self.virtual_keyboard.height = 140
+
+        button_layout = BoxLayout(size_hint_y=0.07, spacing=20, size_hint_x=0.6, pos_hint={'center_x': 0.5})
+        self.boards_btn = Button(
+            text=f'BOARDS: {self.num_boards}',
+            background_color=(0.3, 0.7, 0.3, 1),
+            bold=True,
+            font_size='18sp'
+        )
+        self.boards_btn.bind(on_press=lambda x: self.cycle_boards())
+        new_btn = Button(
+            text='NEW',
+            background_color=(0.6, 0.5, 0.2, 1),
+            bold=True,
+            font_size='18sp'
+        )
+        new_btn.bind(on_press=lambda x: self.new_game())
+        gacha_btn = Button(
+            text='GACHA',
+            background_color=(0.3, 0.5, 0.8, 1),
+            bold=True,
+            font_size='18sp'
+        )
+        gacha_btn.bind(on_press=lambda x: self.gacha())
+        menu_btn = Button(
+            text='MENU',
+            background_color=(0.5, 0.5, 0.5, 1),
+            bold=True,
+            font_size='18sp'
+        )
+        menu_btn.bind(on_press=lambda x: self.back_to_menu())
+        button_layout.add_widget(self.boards_btn)
+        button_layout.add_widget(new_btn)
+        button_layout.add_widget(gacha_btn)
+        button_layout.add_widget(menu_btn)
+
+        main_container.add_widget(self.status_label)
+        main_container.add_widget(self.board_view)
+        main_container.add_widget(self.virtual_keyboard)
+        main_container.add_widget(button_layout)
+        self.add_widget(main_container)
+        self.update_status()
+
+    def build_boards(self):
+        """
+        One MiniBoard per engine board, in rows of 4 (up to 8 boards) or 8
+        """
+        self.board_grid.clear_widgets()
+        count = len(self.game.boards)
+        self.board_grid.cols = min(count, 4 if count <= 8 else 8)
+        self.mini_boards = [MiniBoard(board) for board in self.game.boards]
+        for mini_board in self.mini_boards:
+            self.board_grid.add_widget(mini_board)
+        self.fit_grid()
+
+    def fit_grid(self, *args):
+        """
+        Fill the visible area, or grow past it and scroll when the tiles would get too small
+        """
+        rows = -(-len(self.mini_boards) // self.board_grid.cols)
+        tries = self.game.num_tries
+        board_height = MiniBoard.min_box_size * (tries + (tries + 1) * MiniBoard.spacing_ratio)
+        spacing = self.board_grid.spacing[1]
+        self.board_grid.height = max(self.board_view.height, rows * board_height + (rows - 1) * spacing)
+
+    def next_game_rng(self):
+        if self.game_rng is None:
+            self.game_rng = GameRandom()
+        else:
+            self.game_rng = self.game_rng.spawn('next')
+        print(f"Game seed: {self.game_rng.seed}")
+        return self.game_rng
+
+    def pick_answers(self, rng):
+        """
+        Distinct hidden words for every board, repeated only if the answer list is too short
+        """
+        if self.num_boards <= len(self.word_list):
+            return rng.answer.sample(self.word_list, self.num_boards)
+        return rng.answer.choices(self.word_list, k=self.num_boards)
+
+    def on_enter(self, *args):
+        # bound on the window rather than through request_keyboard, which would take
+        # the keyboard away from the single game screen for good
+        Window.bind(on_key_down=self._on_key_down)
+
+    def on_leave(self, *args):
+        Window.unbind(on_key_down=self._on_key_down)
+
+    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
+        if self.manager is None or self.manager.current != self.name:
+            return False  # left mid-transition, on_leave has not run yet
+        if key == 8:
+            self.key_queue.push('backspace')
+        elif key in (13, 271):  # enter and keypad enter
+            self.key_queue.push('enter')
+        elif ord('a') <= key <= ord('z'):
+            self.key_queue.push(chr(key))
+        else:
+            return False
+        return True
+
+    @timed('multiboard_key')
+    def handle_key_input(self, key):
+        """
+        Handle keyboard input for physical and virtual keyboards
+
+        Args:
+            key (str): The key pressed ('backspace', 'enter', or a letter)
+        """
+        if key == 'backspace':
+            self.game.backspace()
+        elif key == 'enter':
+            if len(self.game.guess) == self.game.word_length and not self.game.is_valid_guess():
+                print("Not in word list, cannot submit.")
+                return True
+            solved, letter_states = self.game.submit()
+            if letter_states == {}:
+                print("Incomplete row, cannot submit.")
+                return True
+            self.virtual_keyboard.sync(self.game.keyboard)
+            self.update_status()
+            self.check_game_over()
+        elif len(key) == 1 and 'a' <= key <= 'z':
+            self.game.type_letter(key)
+        return True
+
+    def update_status(self):
+        solved = sum(board.won for board in self.game.boards)
+        left = self.game.num_tries - self.game.current_row
+        self.status_label.text = (f'[b]Solved: [color=6ac764]{solved}[/color]/{len(self.game.boards)}'
+                                  f'    Guesses left: {left}[/b]')
+
+    def check_game_over(self):
+        if self.game.won:
+            self.get_popup('win').show(
+                None, f'[size=20sp]All {len(self.game.boards)} words found in '
+                      f'[b][color=6ac764]{self.game.current_row}[/color][/b] guesses![/size]')
+        elif self.game.lost:
+            missed = [board.hidden_text for board in self.game.boards if not board.won]
+            self.get_popup('game_over').show(
+                None, f'[size=18sp]Missed: [b][color=ff6b6b]{", ".join(missed)}[/color][/b][/size]')
+
+    def get_popup(self, kind):
+        popup = self.popups.get(kind)
+        if popup is None:
+            green = (0.3, 0.7, 0.3, 1)
+            gray = (0.5, 0.5, 0.5, 1)
+            if kind == 'win':
+                title, header = 'Victory!', '[b][size=32sp][color=6ac764]ALL SOLVED![/color][/size][/b]'
+            else:
+                title, header = 'Game Over', '[b][size=32sp][color=c9b458]GAME OVER[/color][/size][/b]'
+            popup = self.popups[kind] = MessagePopup(
+                texts=[header, ''],
+                heights=[0.4, 0.4],
+                buttons=[('PLAY AGAIN', green, self.restart_game), ('MAIN MENU', gray, self.menu_from_popup)],
+                title=title,
+                size_hint=(0.7, 0.5),
+            )
+        return popup
+
+    @timed('apply_gacha_result')
+    def apply_gacha_result(self, result_func):
+        """
+        Apply the gacha result function to every unsolved board
+        """
+        self.game.apply(result_func)
+        self.update_status()
+        self.check_game_over()
+
+    def gacha(self):
+        gacha_screen = self.manager.get_screen('gacha_animation')
+        gacha_screen.source = self.name
+        self.manager.current = 'gacha_animation'
+
+    def new_game(self):
+        """
+        Start a new game with the current number of boards
+        """
+        rng = self.next_game_rng()
+        resized = len(self.game.boards) != self.num_boards
+        self.game.reset(self.pick_answers(rng), rng, default_tries(self.num_boards, self.game.word_length))
+        if resized:
+            self.build_boards()  # same number of boards keeps the widgets, they listen to the reset boards
+        self.key_queue.clear()
+        self.virtual_keyboard.reset_keyboard()
+        self.update_status()
+
+    def cycle_boards(self):
+        """
+        Switch to the next number of boards and start a new game
+        """
+        index = BOARD_COUNTS.index(self.num_boards) if self.num_boards in BOARD_COUNTS else -1
+        self.num_boards = BOARD_COUNTS[(index + 1) % len(BOARD_COUNTS)]
+        self.boards_btn.text = f'BOARDS: {self.num_boards}'
+        self.new_game()
+
+    def restart_game(self, popup):
+        popup.dismiss()
+        self.new_game()
+
+    def menu_from_popup(self, popup):
+        popup.dismiss()
+        self.new_game()
+        self.back_to_menu()
+
+    def back_to_menu(self):
+        self.manager.current = 'main_menu'
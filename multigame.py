@@ -0,0 +1,158 @@
+from engine import WordleGame, LetterStates, PLAYING, WON, LOST, FEEDBACK_NAMES, FEEDBACK_STATES
+from rng import GameRandom
+from scoring import letter_codes, pattern_pairs
+
+"""
+Multi-board game (Quordle/Octordle style)
+Several WordleGame boards, each with its own hidden word and its own random
+streams, share one input row. A guess is written into the current row of
+every unsolved board (cursed and revealed boxes keep their letter, as in a
+normal game) and all those rows are scored in a single vectorized call.
+"""
+
+MIN_BOARDS = 4
+MAX_BOARDS = 32
+
+
+def default_tries(num_boards, word_length=5):
+    """
+    Tries of the usual multi-board variants: the number of boards plus the word length
+    (9 for Quordle, 13 for Octordle, 37 for 32 boards)
+    """
+    return num_boards + word_length
+
+
+class MultiGame:
+    def __init__(self, hidden_texts, num_tries=None, rng=None, dictionary=None):
+        """
+        Args:
+            hidden_texts (list): One hidden word per board, all of the same length
+            num_tries (int): Rows on every board, default_tries() if None
+            rng (GameRandom): Random streams of the whole game, board i uses rng.spawn('board', i)
+            dictionary (container): Words a typed guess must belong to
+        """
+        self.dictionary = dictionary
+        self.boards = []
+        self.keyboard = LetterStates()  # merged over every board
+        self.reset(hidden_texts, rng, num_tries)
+
+    def reset(self, hidden_texts=None, rng=None, num_tries=None):
+        """
+        Start a new game, optionally with new hidden words, random streams and number of rows
+        """
+        if rng is not None or not self.boards:
+            self.rng = GameRandom() if rng is None else rng
+        if hidden_texts is None:
+            hidden_texts = [board.hidden_text for board in self.boards]
+        if num_tries is None:
+            num_tries = self.boards[0].num_tries if self.boards else default_tries(len(hidden_texts), len(hidden_texts[0]))
+        self.num_tries = num_tries
+
+        # boards are reused so the widgets listening to them stay attached
+        del self.boards[len(hidden_texts):]
+        for index, text in enumerate(hidden_texts):
+            board_rng = self.rng.spawn('board', index)
+            if index < len(self.boards):
+                self.boards[index].reset(text, board_rng, num_tries)
+            else:
+                self.boards.append(WordleGame(text, num_tries=num_tries, rng=board_rng))
+        self.word_length = len(hidden_texts[0])
+        self.answer_codes = letter_codes([board.hidden_text for board in self.boards])
+        self.guess = []  # letters typed for the current guess
+        self.num_guesses = 0
+        self.keyboard.reset()
+
+    @property
+    def current_row(self):
+        return self.num_guesses
+
+    def active_boards(self):
+        return [board for board in self.boards if not board.is_over]
+
+    @property
+    def status(self):
+        if any(board.lost for board in self.boards):
+            return LOST
+        if all(board.won for board in self.boards):
+            return WON
+        return PLAYING
+
+    @property
+    def is_over(self):
+        return self.status != PLAYING
+
+    @property
+    def won(self):
+        return self.status == WON
+
+    @property
+    def lost(self):
+        return self.status == LOST
+
+    def type_letter(self, letter):
+        if self.is_over or len(self.guess) >= self.word_length:
+            return False
+        col = len(self.guess)
+        self.guess.append(letter.upper())
+        for board in self.active_boards():
+            board.add_letter_at(board.current_row, col, letter)
+        return True
+
+    def backspace(self):
+        if self.is_over or not self.guess:
+            return False
+        self.guess.pop()
+        col = len(self.guess)
+        for board in self.active_boards():
+            board.delete_letter_at(board.current_row, col)
+        return True
+
+    def is_valid_guess(self):
+        if len(self.guess) < self.word_length:
+            return False
+        return self.dictionary is None or ''.join(self.guess) in self.dictionary
+
+    def submit(self):
+        """
+        Submit the typed guess to every unsolved board, scoring them all at once
+
+        Return:
+            tuple: (Number of boards solved by this guess, dict of letter states of the guess
+            merged over the boards with correct > present > absent), the dict is empty if the
+            guess is incomplete or not in the dictionary
+        """
+        if self.is_over or not self.is_valid_guess():
+            return 0, {}
+        indices = [index for index, board in enumerate(self.boards) if not board.is_over]
+        boards = [self.boards[index] for index in indices]
+        # rows are scored as written, cursed and revealed boxes included
+        rows = [board.row_text(board.current_row) for board in boards]
+        patterns = pattern_pairs(letter_codes(rows), self.answer_codes[indices])
+
+        solved = 0
+        merged = LetterStates()
+        for board, pattern in zip(boards, patterns.tolist()):
+            _, letter_states = board.submit(pattern)
+            if board.won:
+                solved += 1
+            # correct > present > absent over every board
+            for letter, name in letter_states.items():
+                state = FEEDBACK_STATES[name]
+                merged.update(letter, state)
+                self.keyboard.update(letter, state)
+        self.num_guesses += 1
+        self.guess = []
+        return solved, {chr(65 + index): FEEDBACK_NAMES[state] for index, state in enumerate(merged.states) if state}
+
+    def apply(self, effect):
+        """
+        Apply a gacha effect to every unsolved board, each one draws from its own curse stream
+
+        Args:
+            effect (callable): Gacha effect taking (game, current_row)
+        """
+        for board in self.active_boards():
+            effect(board, board.current_row)
+            # a curse can land on a box of the guess being typed, show the typed letters again
+            for col, letter in enumerate(self.guess):
+                board.add_letter_at(board.current_row, col, letter)
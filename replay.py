@@ -0,0 +1,281 @@
+import argparse
+import os
+
+from engine import WordleGame, WON, LOST, PLAYING
+from gacha import Gacha, GACHA_ITEMS
+from rng import GameRandom
+from stats import SURRENDERED, ABANDONED
+
+"""
+Binary replay log
+A log is a stream of length-prefixed records, each one a varint length
+followed by an event type byte and its payload. A game starts with a START
+record holding the seed of its GameRandom context, the number of tries and
+the answer; every random draw of the game (gacha effects included) comes
+from streams derived from that seed, so the inputs below are enough to
+replay the game through the engine:
+
+    START   seed (varint), num_tries (varint), answer (ASCII)
+    KEY     one byte: a-z, BACKSPACE or ENTER
+    GUESS   a whole row written with add_letter_at (ASCII), used by the simulator
+    SUBMIT  encoded feedback pattern (varint), checked on replay
+    GACHA   index of the item in GACHA_ITEMS
+    END     outcome (byte), rows submitted (varint)
+
+A keystroke costs 3 bytes and a simulated game about 50.
+"""
+
+REPLAY_PATH = os.environ.get('WORDLE_REPLAY', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'replays.bin'))
+
+START, KEY, GUESS, SUBMIT, GACHA, END = range(6)
+EVENT_NAMES = ('START', 'KEY', 'GUESS', 'SUBMIT', 'GACHA', 'END')
+
+BACKSPACE = 8
+ENTER = 13
+
+OUTCOMES = (WON, LOST, SURRENDERED, ABANDONED)
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+ITEM_INDEX = {item['effect']: index for index, item in enumerate(GACHA_ITEMS)}
+
+READ_CHUNK = 64 * 1024
+
+
+class ReplayError(Exception):
+    pass
+
+
+def put_varint(buffer, value):
+    while value > 0x7f:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def get_varint(data, pos):
+    """
+    Return:
+        tuple: (value, position after it), position is -1 if data ends inside the varint
+    """
+    value = 0
+    shift = 0
+    while pos < len(data):
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+    return 0, -1
+
+
+class ReplayWriter:
+    """
+    Appends events to a binary stream, buffered in memory between flushes
+    """
+    def __init__(self, stream, buffer_size=READ_CHUNK):
+        """
+        Args:
+            stream: Binary file-like object opened for writing/appending
+            buffer_size (int): Bytes kept in memory before they are written out
+        """
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self._record = bytearray()
+        self.closed = False
+
+    def _event(self, event, payload=b''):
+        record = self._record
+        record.clear()
+        record.append(event)
+        record += payload
+        put_varint(self.buffer, len(record))
+        self.buffer += record
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def start(self, game):
+        payload = bytearray()
+        put_varint(payload, game.rng.seed)
+        put_varint(payload, game.num_tries)
+        payload += game.hidden_text.encode('ascii')
+        self._event(START, payload)
+
+    def key(self, key):
+        """
+        Args:
+            key (str): 'backspace', 'enter' or a letter
+        """
+        if key == 'enter':
+            code = ENTER
+        elif key == 'backspace':
+            code = BACKSPACE
+        else:
+            code = ord(key.lower())
+        self._event(KEY, bytes((code,)))
+
+    def guess(self, word):
+        self._event(GUESS, word.encode('ascii'))
+
+    def submit(self, pattern):
+        payload = bytearray()
+        put_varint(payload, pattern)
+        self._event(SUBMIT, payload)
+
+    def gacha(self, effect):
+        """
+        Args:
+            effect (str): Effect name of the gacha item applied
+        """
+        self._event(GACHA, bytes((ITEM_INDEX[effect],)))
+
+    def end(self, outcome, tries):
+        payload = bytearray((OUTCOME_CODES[outcome],))
+        put_varint(payload, tries)
+        self._event(END, payload)
+
+    def flush(self):
+        if self.buffer:
+            self.stream.write(self.buffer)
+            self.buffer = bytearray()
+        if hasattr(self.stream, 'flush'):
+            self.stream.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.flush()
+        self.stream.close()
+
+
+def read_events(stream):
+    """
+    Stream the events of a log without loading it whole
+
+    Args:
+        stream: Binary file-like object
+    Return:
+        generator: (event, payload) pairs, payload is a bytes object
+    """
+    data = b''
+    pos = 0
+    while True:
+        chunk = stream.read(READ_CHUNK)
+        data = data[pos:] + chunk
+        pos = 0
+        while pos < len(data):
+            length, start = get_varint(data, pos)
+            if start < 0 or start + length > len(data):
+                break  # record continues in the next chunk
+            yield data[start], data[start + 1:start + length]
+            pos = start + length
+        if not chunk:
+            if pos < len(data):
+                raise ReplayError(f"Log ends inside a record ({len(data) - pos} bytes left)")
+            return
+
+
+def read_games(stream):
+    """
+    Group the events of a log by game
+
+    Return:
+        generator: Lists of (event, payload) pairs, each one starting with a START event
+    """
+    game = None
+    for event, payload in read_events(stream):
+        if event == START:
+            if game is not None:
+                yield game
+            game = []
+        elif game is None:
+            raise ReplayError(f"{EVENT_NAMES[event]} event before the first START")
+        game.append((event, payload))
+    if game is not None:
+        yield game
+
+
+def replay(events, gacha=None, game=None):
+    """
+    Play the events of one game through the engine, checking every recorded result
+
+    Args:
+        events (list): (event, payload) pairs of one game, starting with START
+        gacha (Gacha): Effects to apply, a quiet one is created if None
+        game (WordleGame): Engine to reuse, a new one is created if None
+    Return:
+        WordleGame: The engine at the end of the game
+    """
+    gacha = gacha or Gacha(verbose=False)
+    event, payload = events[0]
+    if event != START:
+        raise ReplayError("A game must start with a START event")
+    seed, pos = get_varint(payload, 0)
+    num_tries, pos = get_varint(payload, pos)
+    answer = payload[pos:].decode('ascii')
+    if game is None or game.num_tries != num_tries:
+        game = WordleGame(answer, num_tries=num_tries, rng=GameRandom(seed))
+    else:
+        game.reset(answer, GameRandom(seed))
+
+    for event, payload in events[1:]:
+        if event == KEY:
+            code = payload[0]
+            if code == ENTER:
+                game.submit()
+            elif code == BACKSPACE:
+                game.backspace()
+            else:
+                game.type_letter(chr(code))
+        elif event == GUESS:
+            row = game.current_row
+            for col, letter in enumerate(payload.decode('ascii')):
+                game.add_letter_at(row, col, letter)
+            game.submit()
+        elif event == SUBMIT:
+            pattern = get_varint(payload, 0)[0]
+            if not game.history or game.history[-1][1] != pattern:
+                raise ReplayError(f"Row {len(game.history)} of {answer} does not give the recorded feedback")
+        elif event == GACHA:
+            getattr(gacha, GACHA_ITEMS[payload[0]]['effect'])(game, game.current_row)
+        elif event == END:
+            outcome, tries = OUTCOMES[payload[0]], get_varint(payload, 1)[0]
+            expected = outcome if outcome in (WON, LOST) else PLAYING
+            if game.status != expected or game.current_row != tries:
+                raise ReplayError(f"Game of {answer} ends {game.status} after {game.current_row} rows, "
+                                  f"the log says {outcome} after {tries}")
+        else:
+            raise ReplayError(f"Unknown event type {event}")
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Read and verify a binary replay log')
+    parser.add_argument('path', nargs='?', default=REPLAY_PATH, help='replay log file')
+    parser.add_argument('--game', type=int, help='print the board of one game (0-based)')
+    args = parser.parse_args()
+
+    gacha = Gacha(verbose=False)
+    game = None
+    games = 0
+    outcomes = {}
+    with open(args.path, 'rb') as stream:
+        for index, events in enumerate(read_games(stream)):
+            game = replay(events, gacha, game)
+            games += 1
+            if events[-1][0] == END:
+                outcome = OUTCOMES[events[-1][1][0]]
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            if index == args.game:
+                print(f"Game {index}: {game.hidden_text} (seed {game.rng.seed}), {game.status}")
+                for row in range(game.current_row):
+                    print(f"  {game.row_text(row)}")
+    size = os.path.getsize(args.path)
+    print(f"Replayed {games} games from {size} bytes ({size / max(1, games):.1f} bytes per game)")
+    for outcome, count in outcomes.items():
+        print(f"  {outcome}: {count}")
+
+
+if __name__ == '__main__':
+    main()
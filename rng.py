@@ -0,0 +1,55 @@
+import hashlib
+import random
+
+"""
+Seeded random streams
+Every game owns a GameRandom context with one independent stream per source
+of randomness, so a game can be replayed bit-for-bit from its seed and the
+draws of one source never shift the draws of another.
+"""
+
+# answer: hidden word choice, strip: gacha items on the strip,
+# scroll: gacha scroll distance, curse: everything a gacha effect randomizes,
+# player: choices of simulated players
+STREAMS = ('answer', 'strip', 'scroll', 'curse', 'player')
+
+
+def derive_seed(seed, *keys):
+    """
+    Derive a 64-bit seed from a parent seed and any number of keys
+    Different keys give unrelated seeds, so derived streams do not overlap in practice.
+    """
+    text = '/'.join(str(part) for part in (seed,) + keys)
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+
+
+def new_seed():
+    return random.SystemRandom().getrandbits(64)
+
+
+class GameRandom:
+    """
+    Per-game random context, each name of STREAMS is a random.Random attribute
+    """
+    __slots__ = ('seed',) + STREAMS
+
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed (int): Seed of the context, a fresh one from the OS if None
+        """
+        self.seed = new_seed() if seed is None else seed
+
+    def __getattr__(self, name):
+        # streams are seeded on first use, most games never touch all of them
+        if name not in STREAMS:
+            raise AttributeError(name)
+        stream = random.Random(derive_seed(self.seed, name))
+        setattr(self, name, stream)
+        return stream
+
+    def spawn(self, *keys):
+        """
+        Child context with its own streams (e.g. one per game of a session or per worker task)
+        """
+        return GameRandom(derive_seed(self.seed, 'spawn', *keys))
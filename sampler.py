@@ -0,0 +1,86 @@
+import random
+
+import numpy as np
+
+"""
+Walker alias sampler
+Draws an index with probability proportional to its weight in O(1) after an
+O(n) setup, using a single uniform number per draw.
+"""
+
+
+class AliasSampler:
+    def __init__(self, weights):
+        """
+        Args:
+            weights (list): Non-negative weights, they do not need to sum to 1
+        """
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("AliasSampler needs at least one positive weight")
+        self.n = n
+        self.probabilities = [w / total for w in weights]
+
+        scaled = [p * n for p in self.probabilities]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, s in enumerate(scaled) if s < 1.0]
+        large = [i for i, s in enumerate(scaled) if s >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            prob[less] = scaled[less]
+            alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        # whatever is left is 1 up to rounding errors
+        for i in small + large:
+            prob[i] = 1.0
+
+        self.prob = prob
+        self.alias = alias
+        self._prob_array = np.array(prob)
+        self._alias_array = np.array(alias, dtype=np.intp)
+
+    def sample(self, rng=random):
+        """
+        Draw one index
+
+        Args:
+            rng: Anything with a random() method, the global random module by default
+        """
+        u = rng.random() * self.n
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample_many(self, k, rng=random):
+        """
+        Draw k indices
+        """
+        n = self.n
+        prob = self.prob
+        alias = self.alias
+        draws = []
+        for _ in range(k):
+            u = rng.random() * n
+            i = int(u)
+            draws.append(i if u - i < prob[i] else alias[i])
+        return draws
+
+    def sample_array(self, k, generator):
+        """
+        Draw k indices at once
+
+        Args:
+            k (int): Number of draws
+            generator (np.random.Generator): Source of the uniform numbers
+        Return:
+            np.ndarray: Drawn indices
+        """
+        u = generator.random(k) * self.n
+        i = u.astype(np.intp)
+        return np.where(u - i < self._prob_array[i], i, self._alias_array[i])
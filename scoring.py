@@ -0,0 +1,225 @@
+import numpy as np
+
+"""
+Guess scoring
+A feedback is encoded as a base-3 integer: position i contributes
+digit * 3**i where the digit is 0 (absent), 1 (present) or 2 (correct).
+Duplicate letters are scored like the original Wordle: greens are matched
+first, then each remaining copy of a letter in the answer can turn at most
+one other guessed copy yellow.
+"""
+
+ABSENT = 0
+PRESENT = 1
+CORRECT = 2
+
+
+def all_correct(word_length):
+    """
+    Pattern of a fully solved row
+    """
+    return 3 ** word_length - 1
+
+
+def pattern_dtype(word_length):
+    """
+    Smallest unsigned dtype able to hold every pattern of the given word length
+    """
+    if 3 ** word_length <= 256:
+        return np.uint8
+    if 3 ** word_length <= 65536:
+        return np.uint16
+    return np.uint32
+
+
+def score_guess(guess, answer):
+    """
+    Score a guess against an answer
+
+    Args:
+        guess (str): Guessed word
+        answer (str): Hidden word, same length as the guess
+    Return:
+        list: One digit per position (0 absent, 1 present, 2 correct)
+    """
+    feedback = [ABSENT] * len(guess)
+    remaining = {}
+    for i, (g, a) in enumerate(zip(guess, answer)):
+        if g == a:
+            feedback[i] = CORRECT
+        else:
+            remaining[a] = remaining.get(a, 0) + 1
+    for i, g in enumerate(guess):
+        if feedback[i] != CORRECT and remaining.get(g, 0) > 0:
+            feedback[i] = PRESENT
+            remaining[g] -= 1
+    return feedback
+
+
+def encode(feedback):
+    pattern = 0
+    for digit in reversed(feedback):
+        pattern = pattern * 3 + digit
+    return pattern
+
+
+def decode(pattern, word_length):
+    feedback = []
+    for _ in range(word_length):
+        pattern, digit = divmod(pattern, 3)
+        feedback.append(digit)
+    return feedback
+
+
+def score_pattern(guess, answer):
+    return encode(score_guess(guess, answer))
+
+
+def letter_codes(words):
+    """
+    Convert equal-length words to an (n, word_length) uint8 array of 0-25 letter codes
+    """
+    if not words:
+        return np.zeros((0, 0), dtype=np.uint8)
+    word_length = len(words[0])
+    buffer = ''.join(words).upper().encode('ascii')
+    codes = np.frombuffer(buffer, dtype=np.uint8).reshape(len(words), word_length)
+    return codes - ord('A')
+
+
+def pattern_block(guess_codes, answer_codes):
+    """
+    Score every guess against every answer at once
+
+    Args:
+        guess_codes (np.ndarray): (n, word_length) letter codes
+        answer_codes (np.ndarray): (m, word_length) letter codes
+    Return:
+        np.ndarray: (n, m) matrix of encoded patterns
+    """
+    n, word_length = guess_codes.shape
+    m = answer_codes.shape[0]
+    guess_cols = [guess_codes[:, i, None] for i in range(word_length)]  # (n, 1) each
+    answer_cols = [answer_codes[None, :, j] for j in range(word_length)]  # (1, m) each
+
+    greens = [guess_cols[i] == answer_cols[i] for i in range(word_length)]
+    free = [~green for green in greens]  # positions not matched by a green
+
+    patterns = np.zeros((n, m), dtype=np.uint32)
+    for i in range(word_length):
+        # copies of this letter left in the answer once greens are taken
+        available = np.zeros((n, m), dtype=np.uint8)
+        for j in range(word_length):
+            available += (guess_cols[i] == answer_cols[j]) & free[j]
+        # earlier copies of the same letter in the guess that also want a yellow
+        rank = np.zeros((n, m), dtype=np.uint8)
+        for k in range(i):
+            rank += (guess_cols[k] == guess_cols[i]) & free[k]
+        yellow = free[i] & (rank < available)
+        patterns += (greens[i] * np.uint32(CORRECT * 3 ** i)) + (yellow * np.uint32(3 ** i))
+    return patterns.astype(pattern_dtype(word_length))
+
+
+def pattern_pairs(guess_codes, answer_codes):
+    """
+    Score guess i against answer i for every i at once (e.g. one row on each of many boards)
+
+    Args:
+        guess_codes (np.ndarray): (n, word_length) letter codes
+        answer_codes (np.ndarray): (n, word_length) letter codes
+    Return:
+        np.ndarray: (n,) encoded patterns
+    """
+    n, word_length = guess_codes.shape
+    guess_cols = [guess_codes[:, i] for i in range(word_length)]
+    answer_cols = [answer_codes[:, j] for j in range(word_length)]
+
+    greens = [guess_cols[i] == answer_cols[i] for i in range(word_length)]
+    free = [~green for green in greens]
+
+    patterns = np.zeros(n, dtype=np.uint32)
+    for i in range(word_length):
+        available = np.zeros(n, dtype=np.uint8)
+        for j in range(word_length):
+            available += (guess_cols[i] == answer_cols[j]) & free[j]
+        rank = np.zeros(n, dtype=np.uint8)
+        for k in range(i):
+            rank += (guess_cols[k] == guess_cols[i]) & free[k]
+        yellow = free[i] & (rank < available)
+        patterns += (greens[i] * np.uint32(CORRECT * 3 ** i)) + (yellow * np.uint32(3 ** i))
+    return patterns
+
+
+class PatternTable:
+    """
+    Precomputed guess x answer feedback matrix
+    After construction scoring a known pair is a single array lookup.
+    """
+    def __init__(self, guesses, answers=None, max_block_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            guesses (list): Words that can be guessed
+            answers (list): Words that can be hidden, defaults to the guesses
+            max_block_bytes (int): Upper bound of the scratch memory used per block of guesses
+        """
+        self.guesses = [word.upper() for word in guesses]
+        self.answers = self.guesses if answers is None else [word.upper() for word in answers]
+        self.word_length = len(self.guesses[0]) if self.guesses else 0
+        self.guess_index = {word: i for i, word in enumerate(self.guesses)}
+        self.answer_index = {word: i for i, word in enumerate(self.answers)}
+
+        self.guess_codes = letter_codes(self.guesses)
+        self.answer_codes = letter_codes(self.answers)
+        self.matrix = np.empty((len(self.guesses), len(self.answers)), dtype=pattern_dtype(self.word_length))
+
+        per_guess = max(1, len(self.answers) * (4 * self.word_length + 16))
+        block = max(1, max_block_bytes // per_guess)
+        for start in range(0, len(self.guesses), block):
+            stop = min(start + block, len(self.guesses))
+            self.matrix[start:stop] = pattern_block(self.guess_codes[start:stop], self.answer_codes)
+
+    @classmethod
+    def from_matrix(cls, guesses, answers, matrix):
+        """
+        Wrap an already computed matrix (e.g. one living in shared memory) without copying it
+        """
+        table = cls.__new__(cls)
+        table.guesses = [word.upper() for word in guesses]
+        table.answers = [word.upper() for word in answers]
+        table.word_length = len(table.guesses[0]) if table.guesses else 0
+        table.guess_index = {word: i for i, word in enumerate(table.guesses)}
+        table.answer_index = {word: i for i, word in enumerate(table.answers)}
+        table.guess_codes = letter_codes(table.guesses)
+        table.answer_codes = letter_codes(table.answers)
+        table.matrix = matrix
+        return table
+
+    def pattern(self, guess, answer):
+        """
+        Encoded pattern of a guess against an answer, falls back to direct
+        scoring when either word is not in the table
+        """
+        gi = self.guess_index.get(guess)
+        ai = self.answer_index.get(answer)
+        if gi is None or ai is None:
+            return score_pattern(guess, answer)
+        return int(self.matrix[gi, ai])
+
+    def patterns_for(self, guess):
+        """
+        Patterns of one guess against every answer
+        """
+        gi = self.guess_index.get(guess.upper())
+        if gi is None:
+            return pattern_block(letter_codes([guess]), self.answer_codes)[0]
+        return self.matrix[gi]
+
+    def patterns_against(self, guess, answer_indices):
+        """
+        Patterns of one guess against a subset of the answers, only the
+        subset is scored when the guess is not in the table
+        """
+        gi = self.guess_index.get(guess.upper())
+        if gi is None:
+            return pattern_block(letter_codes([guess]), self.answer_codes[answer_indices])[0]
+        return self.matrix[gi, answer_indices]
@@ -0,0 +1,509 @@
+import argparse
+import asyncio
+import base64
+import datetime
+import hashlib
+import json
+import os
+import secrets
+import time
+from array import array
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+
+from daily import daily_word, daily_rng
+from engine import WordleGame, FEEDBACK_NAMES, PLAYING
+from gacha import Gacha, GACHA_ITEMS, GACHA_SAMPLER
+from rng import GameRandom
+from words import load_words, load_allowed, answers_path, allowed_path, MIN_WORD_LENGTH, MAX_WORD_LENGTH
+
+"""
+Asyncio game server
+Hosts many concurrent games with the same rules as the Kivy screens (the
+same engine, dictionary check and gacha effects, one alias-sampler draw per
+roll as in the simulator) over plain HTTP/1.1 with keep-alive and over
+WebSocket, using only the standard library.
+
+    POST /start      {"seed": int, "daily": "YYYY-MM-DD", "hard": bool}, all optional -> new session
+    POST /guess      {"session": id, "word": "CRANE"}   -> feedback of the row
+    POST /gacha      {"session": id}                    -> item rolled and the board
+    POST /surrender  {"session": id}                    -> the answer
+    GET  /state?session=id                              -> the board
+    GET  /health                                        -> server counters
+    GET  /ws         WebSocket, JSON messages {"op": "guess", "word": ..., "id": ...}
+                     (the session started on a connection is used when none is given)
+
+Sessions are kept in LRU order, so evicting the idle ones only looks at
+the oldest entries.
+
+    python server.py --port 8765
+"""
+
+MAX_HEADER = 8 * 1024
+MAX_BODY = 16 * 1024
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+WS_TEXT, WS_BINARY, WS_CLOSE, WS_PING, WS_PONG = 1, 2, 8, 9, 10
+WS_MESSAGE_TOO_BIG = 1009  # close code
+
+DIGITS = bytes((48 + value) % 256 for value in range(256))  # byte value -> its ASCII digit
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 409: 'Conflict',
+           413: 'Payload Too Large', 422: 'Unprocessable Entity', 503: 'Service Unavailable'}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MessageTooBig(ConnectionError):
+    pass
+
+
+class Session:
+    """
+    One game in progress, the board itself lives in the engine's flat arrays
+    """
+    __slots__ = ('id', 'game', 'rolls', 'surrendered', 'last_seen')
+
+    def __init__(self, session_id, game):
+        self.id = session_id
+        self.game = game
+        self.rolls = array('B')  # indices in GACHA_ITEMS
+        self.surrendered = False
+        self.last_seen = time.monotonic()
+
+
+class SessionStore:
+    def __init__(self, idle_timeout=600.0, max_sessions=100000):
+        """
+        Args:
+            idle_timeout (float): Seconds without a request before a session is evicted
+            max_sessions (int): Sessions kept at most, the least recently used goes first
+        """
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()  # least recently used first
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def add(self, session):
+        while len(self.sessions) >= self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+        self.sessions[session.id] = session
+
+    def get(self, session_id):
+        if not isinstance(session_id, str):
+            raise ApiError(400, "session must be a session id string")
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ApiError(404, f"Unknown or expired session {session_id!r}")
+        session.last_seen = time.monotonic()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def evict(self, now=None):
+        """
+        Drop the sessions idle for longer than idle_timeout
+
+        Return:
+            int: Number of sessions evicted
+        """
+        deadline = (time.monotonic() if now is None else now) - self.idle_timeout
+        count = 0
+        sessions = self.sessions
+        while sessions:
+            session = next(iter(sessions.values()))
+            if session.last_seen > deadline:
+                break
+            sessions.popitem(last=False)
+            count += 1
+        self.evicted += count
+        return count
+
+
+class GameServer:
+    def __init__(self, word_length=5, num_tries=6, idle_timeout=600.0, max_sessions=100000):
+        self.word_length = word_length
+        self.num_tries = num_tries
+        self.word_list = load_words(answers_path(word_length), word_length)
+        if len(self.word_list) == 0:
+            raise ValueError(f"No {word_length}-letter words in {answers_path(word_length)}")
+        allowed = load_allowed(allowed_path(word_length), word_length)
+        self.dictionary = None if allowed is None else allowed.union(self.word_list)
+        self.gacha = Gacha(verbose=False)
+        self.store = SessionStore(idle_timeout, max_sessions)
+        self.started = 0
+        self.requests = 0
+        self.operations = {
+            'start': self.op_start,
+            'guess': self.op_guess,
+            'gacha': self.op_gacha,
+            'surrender': self.op_surrender,
+            'state': self.op_state,
+            'health': self.op_health,
+        }
+
+    """
+    Game operations, shared by HTTP and WebSocket
+    """
+    def board(self, session):
+        game = session.game
+        state = {
+            'session': session.id,
+            'status': 'surrendered' if session.surrendered else game.status,
+            'row': game.current_row,
+            'tries': game.num_tries,
+            # one character per cell, row-major: '.' for an empty box
+            'letters': ''.join(letter or '.' for letter in game.letters),
+            'box_state': game.box_state.translate(DIGITS).decode(),
+            'feedback': game.feedback.translate(DIGITS).decode(),
+        }
+        if game.is_over or session.surrendered:
+            state['answer'] = game.hidden_text
+        return state
+
+    def playing(self, params):
+        session = self.store.get(params.get('session'))
+        if session.surrendered or session.game.status != PLAYING:
+            raise ApiError(409, "The game is over")
+        return session
+
+    def op_start(self, params):
+        seed = params.get('seed')
+        if seed is not None and not isinstance(seed, int):
+            raise ApiError(400, "seed must be an integer")
+        daily = params.get('daily')
+        if daily is not None:
+            try:
+                date = datetime.date.fromisoformat(daily)
+            except (TypeError, ValueError):
+                raise ApiError(400, "daily must be a date as YYYY-MM-DD")
+            rng = daily_rng(date)
+            answer = daily_word(self.word_list, date)
+        else:
+            rng = GameRandom(seed)
+            answer = rng.answer.choice(self.word_list).upper()
+            del rng.answer  # 2.5KB of Mersenne state, recreated from the seed if it is ever needed again
+        hard_mode = params.get('hard', False)
+        if not isinstance(hard_mode, bool):
+            raise ApiError(400, "hard must be true or false")
+        game = WordleGame(answer, num_tries=self.num_tries, dictionary=self.dictionary, rng=rng, hard_mode=hard_mode)
+        session = Session(secrets.token_urlsafe(9), game)
+        self.store.add(session)
+        self.started += 1
+        return {'session': session.id, 'seed': rng.seed, 'word_length': game.max_word_length, 'tries': game.num_tries}
+
+    def op_guess(self, params):
+        session = self.playing(params)
+        game = session.game
+        word = params.get('word')
+        if not isinstance(word, str) or len(word) != game.max_word_length or not word.isascii() or not word.isalpha():
+            raise ApiError(400, f"word must be {game.max_word_length} letters")
+        row = game.current_row
+        # cursed and revealed boxes keep their letter, as when typing in the app
+        written = [col for col, letter in enumerate(word) if game.add_letter_at(row, col, letter)]
+        error = game.row_error(row)
+        if error is not None:
+            for col in written:
+                game.delete_letter_at(row, col)
+            raise ApiError(422, error)
+        num_correct, _ = game.submit()
+        start = row * game.max_word_length
+        return {
+            'row': row,
+            'guess': game.row_text(row),
+            'pattern': game.history[-1][1],
+            'feedback': [FEEDBACK_NAMES[state] for state in game.feedback[start:start + game.max_word_length]],
+            'correct': num_correct,
+            'status': game.status,
+            'answer': game.hidden_text if game.is_over else None,
+        }
+
+    def op_gacha(self, params):
+        session = self.playing(params)
+        game = session.game
+        index = GACHA_SAMPLER.sample(game.rng.strip)
+        item = GACHA_ITEMS[index]
+        getattr(self.gacha, item['effect'])(game, game.current_row)
+        session.rolls.append(index)
+        result = self.board(session)
+        result['item'] = {'type': item['type'], 'name': item['name'], 'effect': item['effect']}
+        return result
+
+    def op_surrender(self, params):
+        session = self.playing(params)
+        session.surrendered = True
+        return self.board(session)
+
+    def op_state(self, params):
+        return self.board(self.store.get(params.get('session')))
+
+    def op_health(self, params):
+        return {'sessions': len(self.store), 'started': self.started, 'evicted': self.store.evicted,
+                'requests': self.requests}
+
+    def dispatch(self, op, params):
+        """
+        Run one operation
+
+        Return:
+            tuple: (HTTP status, JSON-serializable result)
+        """
+        self.requests += 1
+        handler = self.operations.get(op) if isinstance(op, str) else None
+        if handler is None:
+            return 404, {'error': f"Unknown operation {op!r}"}
+        try:
+            return 200, handler(params)
+        except ApiError as e:
+            return e.status, {'error': str(e)}
+
+    """
+    HTTP and WebSocket transport
+    """
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    return  # client closed the connection
+                except asyncio.LimitOverrunError:
+                    await self.respond(writer, 413, {'error': "Headers too large"}, keep_alive=False)
+                    return
+                method, target, headers = parse_head(head)
+                if method is None:
+                    await self.respond(writer, 400, {'error': "Malformed request"}, keep_alive=False)
+                    return
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                url = urlsplit(target)
+
+                if url.path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                    await self.websocket(reader, writer, headers)
+                    return
+
+                length = parse_length(headers.get('content-length'))
+                if length is None:
+                    await self.respond(writer, 400, {'error': "Invalid Content-Length"}, keep_alive=False)
+                    return
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {'error': "Body too large"}, keep_alive=False)
+                    return
+                body = await reader.readexactly(length) if length else b''
+                status, result = self.handle_http(method, url, body)
+                await self.respond(writer, status, result, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def handle_http(self, method, url, body):
+        op = url.path.strip('/')
+        if method == 'GET':
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if op not in ('state', 'health'):
+                return 405, {'error': f"Use POST for /{op}"}
+        elif method == 'POST':
+            try:
+                params = json.loads(body) if body else {}
+            except ValueError:
+                return 400, {'error': "Body must be JSON"}
+            if not isinstance(params, dict):
+                return 400, {'error': "Body must be a JSON object"}
+        else:
+            return 405, {'error': f"Method {method} not allowed"}
+        return self.dispatch(op, params)
+
+    async def respond(self, writer, status, result, keep_alive=True):
+        body = json.dumps(result, separators=(',', ':')).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def websocket(self, reader, writer, headers):
+        key = headers.get('sec-websocket-key', '')
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+        await writer.drain()
+
+        session_id = None  # session started on this connection
+        while True:
+            try:
+                opcode, payload = await read_frame(reader)
+            except MessageTooBig:
+                writer.write(encode_frame(WS_CLOSE, WS_MESSAGE_TOO_BIG.to_bytes(2, 'big')))
+                await writer.drain()
+                return
+            if opcode == WS_CLOSE:
+                writer.write(encode_frame(WS_CLOSE, payload[:2]))
+                await writer.drain()
+                return
+            if opcode == WS_PING:
+                writer.write(encode_frame(WS_PONG, payload))
+                await writer.drain()
+                continue
+            if opcode not in (WS_TEXT, WS_BINARY):
+                continue
+            try:
+                message = json.loads(payload)
+                if not isinstance(message, dict):
+                    raise ValueError
+            except ValueError:
+                status, result = 400, {'error': "Messages must be JSON objects"}
+                message = {}
+            else:
+                message.setdefault('session', session_id)
+                status, result = self.dispatch(message.get('op'), message)
+                if message.get('op') == 'start' and status == 200:
+                    session_id = result['session']
+            response = {'status': status, 'result': result}
+            if 'id' in message:
+                response['id'] = message['id']
+            writer.write(encode_frame(WS_TEXT, json.dumps(response, separators=(',', ':')).encode()))
+            await writer.drain()
+
+    async def evict_loop(self):
+        interval = max(1.0, self.store.idle_timeout / 4)
+        while True:
+            await asyncio.sleep(interval)
+            count = self.store.evict()
+            if count:
+                print(f"Evicted {count} idle sessions, {len(self.store)} left")
+
+    async def serve(self, host='127.0.0.1', port=8765, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER,
+                                            backlog=1024)
+        evictor = asyncio.create_task(self.evict_loop())
+        print(f"Serving {self.word_length}-letter games on http://{host}:{port}")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            evictor.cancel()
+
+
+def parse_head(head):
+    """
+    Return:
+        tuple: (method, target, headers with lowercase names), method is None if malformed
+    """
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ')
+    if len(parts) != 3:
+        return None, None, {}
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], headers
+
+
+def parse_length(value):
+    """
+    Return:
+        int or None: The Content-Length (0 when missing), None unless it is a plain decimal number
+    """
+    if value is None or value == '':
+        return 0
+    if not (value.isascii() and value.isdigit()) or len(value) > 18:
+        return None  # rejects signs, spaces and underscores that int() would accept, and absurd sizes
+    return int(value)
+
+
+def unmask(payload, mask):
+    # xor the whole payload at once as one big integer instead of byte by byte
+    n = len(payload)
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+
+
+async def read_frame(reader):
+    """
+    Read one WebSocket message, joining fragmented frames
+    MessageTooBig is raised once the fragments together go over MAX_BODY.
+
+    Return:
+        tuple: (opcode, payload bytes)
+    """
+    message = bytearray()
+    message_opcode = None
+    while True:
+        first, second = await reader.readexactly(2)
+        opcode = first & 0x0f
+        length = second & 0x7f
+        if length == 126:
+            length = int.from_bytes(await reader.readexactly(2), 'big')
+        elif length == 127:
+            length = int.from_bytes(await reader.readexactly(8), 'big')
+        if length > MAX_BODY - len(message):
+            raise MessageTooBig("WebSocket message too large")
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask is not None:
+            payload = unmask(payload, mask)
+        if opcode >= WS_CLOSE:
+            return opcode, payload  # control frames are never fragmented
+        if opcode != 0:
+            message_opcode = opcode
+        message += payload
+        if first & 0x80:
+            return message_opcode, bytes(message)
+
+
+def encode_frame(opcode, payload, mask=None):
+    """
+    Encode one final frame, clients must pass a 4-byte mask
+    """
+    head = bytearray((0x80 | opcode,))
+    mask_bit = 0x80 if mask is not None else 0
+    length = len(payload)
+    if length < 126:
+        head.append(mask_bit | length)
+    elif length < 1 << 16:
+        head.append(mask_bit | 126)
+        head += length.to_bytes(2, 'big')
+    else:
+        head.append(mask_bit | 127)
+        head += length.to_bytes(8, 'big')
+    if mask is not None:
+        return bytes(head) + mask + unmask(payload, mask)
+    return bytes(head) + payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP/WebSocket Gacha Wordle server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--length', type=int, default=int(os.environ.get('WORDLE_LENGTH', 5)), help='word length')
+    parser.add_argument('--tries', type=int, default=int(os.environ.get('WORDLE_TRIES', 6)), help='rows per game')
+    parser.add_argument('--idle-timeout', type=float, default=600.0, help='seconds before an idle session is evicted')
+    parser.add_argument('--max-sessions', type=int, default=100000, help='sessions kept at most')
+    args = parser.parse_args()
+    if not MIN_WORD_LENGTH <= args.length <= MAX_WORD_LENGTH:
+        parser.error(f"--length must be between {MIN_WORD_LENGTH} and {MAX_WORD_LENGTH}")
+
+    server = GameServer(args.length, max(1, args.tries), args.idle_timeout, args.max_sessions)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
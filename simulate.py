@@ -0,0 +1,352 @@
+import argparse
+import io
+import math
+import os
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from engine import WordleGame
+from gacha import Gacha, GACHA_ITEMS, GACHA_SAMPLER
+from replay import ReplayWriter
+from rng import GameRandom, derive_seed
+from scoring import PatternTable
+from words import load_words, ANSWERS_PATH
+
+"""
+Monte Carlo balance simulator for the gacha system
+Plays headless games with the real WordleGame engine and Gacha effects.
+The simulated player always guesses a random answer still consistent with
+the feedback, and opens gacha boxes according to a policy. The pattern
+table is placed in shared memory once and every worker maps it instead of
+receiving a pickled copy.
+"""
+
+
+"""
+Gacha-use policies: number of boxes to open before typing the guess of a turn
+Args: game (WordleGame), num_candidates (int) answers still possible
+"""
+def policy_never(game, num_candidates):
+    return 0
+
+
+def policy_every_turn(game, num_candidates):
+    return 1
+
+
+def policy_opening(game, num_candidates):
+    return 1 if game.current_row == 0 else 0
+
+
+def policy_last_try(game, num_candidates):
+    return 1 if game.current_row == game.num_tries - 1 and num_candidates > 1 else 0
+
+
+def policy_when_stuck(game, num_candidates):
+    return 1 if game.current_row >= game.num_tries // 2 and num_candidates > 2 else 0
+
+
+POLICIES = {
+    'never': policy_never,
+    'every_turn': policy_every_turn,
+    'opening': policy_opening,
+    'last_try': policy_last_try,
+    'when_stuck': policy_when_stuck,
+}
+
+
+class Tally:
+    """
+    Counters of a batch of simulated games, batches from different workers are merged
+    """
+    def __init__(self, num_tries):
+        self.games = 0
+        self.wins = 0
+        self.instant_wins = 0
+        self.instant_losses = 0
+        self.rolls = 0
+        self.win_tries = [0] * (num_tries + 1)  # wins by number of submitted rows
+        self.items = {item['name']: 0 for item in GACHA_ITEMS}
+
+    def merge(self, other):
+        self.games += other.games
+        self.wins += other.wins
+        self.instant_wins += other.instant_wins
+        self.instant_losses += other.instant_losses
+        self.rolls += other.rolls
+        for tries, count in enumerate(other.win_tries):
+            self.win_tries[tries] += count
+        for name, count in other.items.items():
+            self.items[name] += count
+
+
+def wilson_interval(successes, total, z=1.96):
+    """
+    Wilson score interval of a proportion
+
+    Return:
+        tuple: (low, high)
+    """
+    if total == 0:
+        return 0.0, 0.0
+    p = successes / total
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return center - margin, center + margin
+
+
+def mean_interval(histogram, z=1.96):
+    """
+    Mean and normal-approximation interval of a histogram where index is the value
+
+    Return:
+        tuple: (mean, low, high)
+    """
+    total = sum(histogram)
+    if total == 0:
+        return 0.0, 0.0, 0.0
+    mean = sum(value * count for value, count in enumerate(histogram)) / total
+    variance = sum(count * (value - mean) ** 2 for value, count in enumerate(histogram)) / max(1, total - 1)
+    margin = z * math.sqrt(variance / total)
+    return mean, mean - margin, mean + margin
+
+
+class Simulator:
+    """
+    Plays games in the current process
+    """
+    def __init__(self, table, num_tries=6, policy=policy_never):
+        """
+        Args:
+            table (PatternTable): Square table over the answer list
+            num_tries (int): Rows on the board
+            policy (callable): Gacha-use policy
+        """
+        self.table = table
+        self.num_tries = num_tries
+        self.policy = policy
+        self.gacha = Gacha(verbose=False)
+        self.effects = [getattr(self.gacha, item['effect']) for item in GACHA_ITEMS]
+        self.game = WordleGame(table.answers[0], num_tries=num_tries, pattern_table=table)
+        self.all_answers = np.arange(len(table.answers))
+        self.log = None  # ReplayWriter of the batch being played
+
+    def play(self, answer_index, tally):
+        """
+        Play one game against the given answer and record it in the tally
+        """
+        table = self.table
+        game = self.game
+        game.reset(table.answers[answer_index])
+        log = self.log
+        if log is not None:
+            log.start(game)
+        word_length = game.max_word_length
+        candidates = self.all_answers
+        known = [False] * word_length
+
+        while not game.is_over:
+            for _ in range(self.policy(game, len(candidates))):
+                item = GACHA_SAMPLER.sample(game.rng.strip)
+                self.effects[item](game, game.current_row)
+                if log is not None:
+                    log.gacha(GACHA_ITEMS[item]['effect'])
+                tally.rolls += 1
+                tally.items[GACHA_ITEMS[item]['name']] += 1
+                if game.is_over:
+                    break
+            if game.is_over:
+                if game.won:
+                    tally.instant_wins += 1
+                else:
+                    tally.instant_losses += 1
+                break
+
+            # letters revealed by a hint rule out answers right away
+            for col in range(word_length):
+                if game.is_letter_revealed[col] and not known[col]:
+                    known[col] = True
+                    code = ord(game.hidden_text[col]) - ord('A')
+                    candidates = candidates[table.answer_codes[candidates, col] == code]
+
+            guess = table.answers[candidates[game.rng.player.randrange(len(candidates))]]
+            row = game.current_row
+            for col in range(word_length):
+                game.add_letter_at(row, col, guess[col])  # cursed and revealed boxes keep their letter
+            game.submit()
+
+            submitted, pattern = game.history[-1]
+            if log is not None:
+                log.guess(guess)
+                log.submit(pattern)
+            candidates = candidates[table.patterns_against(submitted, candidates) == pattern]
+
+        if log is not None:
+            log.end(game.status, game.current_row)
+        tally.games += 1
+        if game.won:
+            tally.wins += 1
+            tally.win_tries[game.current_row] += 1
+
+    def run(self, num_games, seed, log=None):
+        """
+        Play a batch of games from the streams of GameRandom(seed)
+        Game i gets its own curse stream from the child context spawn(i), so its
+        gacha effects can be replayed alone; the strip and player draws are
+        shared by the batch since the replay log records their results.
+
+        Args:
+            log (ReplayWriter): Records every game of the batch if given
+        """
+        rng = GameRandom(seed)
+        self.log = log
+        tally = Tally(self.num_tries)
+        num_answers = len(self.table.answers)
+        for index in range(num_games):
+            answer_index = rng.answer.randrange(num_answers)
+            game_rng = rng.spawn(index)
+            game_rng.strip = rng.strip
+            game_rng.player = rng.player
+            self.game.rng = game_rng
+            self.play(answer_index, tally)
+        self.log = None
+        return tally
+
+
+_worker_shared = None
+_worker_table = None
+_worker_num_tries = 6
+_worker_simulators = {}
+
+
+def _init_worker(shm_name, shape, dtype, answers, num_tries):
+    """
+    Map the shared pattern table once per worker process
+    """
+    global _worker_shared, _worker_table, _worker_num_tries
+    _worker_shared = shared_memory.SharedMemory(name=shm_name)
+    matrix = np.ndarray(shape, dtype=dtype, buffer=_worker_shared.buf)
+    _worker_table = PatternTable.from_matrix(answers, answers, matrix)
+    _worker_num_tries = num_tries
+
+
+def _run_task(task):
+    policy_name, num_games, seed, record = task
+    simulator = _worker_simulators.get(policy_name)
+    if simulator is None:
+        simulator = Simulator(_worker_table, _worker_num_tries, POLICIES[policy_name])
+        _worker_simulators[policy_name] = simulator
+    return _run_batch(simulator, num_games, seed, record)
+
+
+def _run_batch(simulator, num_games, seed, record):
+    """
+    Return:
+        tuple: (Tally, replay log bytes of the batch, empty unless record is set)
+    """
+    if not record:
+        return simulator.run(num_games, seed), b''
+    buffer = io.BytesIO()
+    log = ReplayWriter(buffer)
+    tally = simulator.run(num_games, seed, log)
+    log.flush()
+    return tally, buffer.getvalue()
+
+
+def simulate(answers, num_games, policy_name='never', num_tries=6, workers=None, chunk_size=2000, seed=0, replay_stream=None):
+    """
+    Play num_games games spread over a process pool
+
+    Args:
+        answers (list): Answer words
+        num_games (int): Games to play
+        policy_name (str): Key of POLICIES
+        num_tries (int): Rows on the board
+        workers (int): Worker processes, defaults to every core
+        chunk_size (int): Games per task
+        seed (int): Base seed, task i plays with derive_seed(seed, 'task', i)
+        replay_stream: Binary stream the replay log of every game is appended to
+    Return:
+        Tally: Merged counters
+    """
+    table = PatternTable(answers)
+    tasks = []
+    for index, start in enumerate(range(0, num_games, chunk_size)):
+        tasks.append((policy_name, min(chunk_size, num_games - start), derive_seed(seed, 'task', index),
+                      replay_stream is not None))
+
+    tally = Tally(num_tries)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        simulator = Simulator(table, num_tries, POLICIES[policy_name])
+        for _, games, task_seed, record in tasks:
+            result, log = _run_batch(simulator, games, task_seed, record)
+            tally.merge(result)
+            if log:
+                replay_stream.write(log)
+        return tally
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, table.matrix.nbytes))
+    try:
+        shared = np.ndarray(table.matrix.shape, dtype=table.matrix.dtype, buffer=shm.buf)
+        shared[:] = table.matrix
+        init_args = (shm.name, table.matrix.shape, table.matrix.dtype.str, table.answers, num_tries)
+        with Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+            for result, log in pool.imap_unordered(_run_task, tasks):
+                tally.merge(result)
+                if log:
+                    replay_stream.write(log)
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+    return tally
+
+
+def report(tally, policy_name, elapsed):
+    low, high = wilson_interval(tally.wins, tally.games)
+    print(f"Policy '{policy_name}': {tally.games} games in {elapsed:.1f}s ({tally.games / max(elapsed, 1e-9):.0f} games/s)")
+    print(f"  Win rate: {tally.wins / max(1, tally.games):.4f}  95% CI [{low:.4f}, {high:.4f}]")
+    mean, mean_low, mean_high = mean_interval(tally.win_tries)
+    print(f"  Average tries when winning: {mean:.3f}  95% CI [{mean_low:.3f}, {mean_high:.3f}]")
+    print(f"  Instant wins: {tally.instant_wins}  Instant losses: {tally.instant_losses}")
+    print(f"  Gacha rolls: {tally.rolls} ({tally.rolls / max(1, tally.games):.3f} per game)")
+    print("  Tries distribution (share of all games):")
+    for tries, count in enumerate(tally.win_tries):
+        low, high = wilson_interval(count, tally.games)
+        print(f"    {tries}: {count / max(1, tally.games):.4f}  [{low:.4f}, {high:.4f}]")
+    print("  Gacha outcomes:")
+    for name, count in tally.items.items():
+        print(f"    {name}: {count / max(1, tally.rolls):.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Monte Carlo balance simulator for the gacha system')
+    parser.add_argument('--games', type=int, default=100000, help='number of games per policy')
+    parser.add_argument('--policy', action='append', choices=sorted(POLICIES), help='gacha-use policy (repeatable, default: all)')
+    parser.add_argument('--answers', default=ANSWERS_PATH, help='answer list file')
+    parser.add_argument('--tries', type=int, default=6, help='rows on the board')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--chunk', type=int, default=2000, help='games per task')
+    parser.add_argument('--seed', type=int, default=0, help='base seed')
+    parser.add_argument('--replay', help='append the replay log of every game to this file')
+    args = parser.parse_args()
+
+    answers = list(load_words(args.answers))
+    replay_stream = open(args.replay, 'ab') if args.replay else None
+    try:
+        for policy_name in args.policy or sorted(POLICIES):
+            start = time.perf_counter()
+            tally = simulate(answers, args.games, policy_name, args.tries, args.workers, args.chunk, args.seed,
+                             replay_stream)
+            report(tally, policy_name, time.perf_counter() - start)
+    finally:
+        if replay_stream is not None:
+            replay_stream.close()
+
+
+if __name__ == '__main__':
+    main()
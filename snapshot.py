@@ -0,0 +1,280 @@
+import datetime
+import os
+import random
+import struct
+import zlib
+from array import array
+
+from engine import WordleGame, PLAYING, WON, LOST, REVEALED, CORRECT
+from gacha import GACHA_ITEMS
+from replay import put_varint, get_varint, ITEM_INDEX
+from rng import GameRandom, STREAMS
+
+"""
+Snapshot of the game in progress
+The whole board (letters, box states, feedback, revealed letters, cursor,
+history) goes into a small binary file with the random streams the game has
+used so far, so a resumed game draws exactly what it would have drawn and its
+replay log stays valid. A snapshot is about 100 bytes plus 2.5KB for each
+random stream in use; writes go to a temporary file renamed over the old one,
+so a crash leaves either the previous snapshot or the new one.
+
+    magic, version
+    seed, num_tries, current row (varints), word length, current col, status (bytes)
+    answer, letters (0 for an empty box), box states, feedback (one byte per cell)
+    revealed letters (one byte per column), keyboard states (26 bytes)
+    history: count (varint), then guess and pattern (varint) of every row
+    gacha results: count (varint), then their indices in GACHA_ITEMS
+    elapsed seconds (double)
+    daily puzzle date as a proleptic ordinal (varint, 0 for an ordinary game), since version 2
+    random streams: count, then index in STREAMS, 625 state words and gauss_next of each
+    CRC32 of everything before it (4 bytes, little endian), since version 3
+"""
+
+SNAPSHOT_PATH = os.environ.get('WORDLE_SNAPSHOT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshot.bin'))
+SNAPSHOT_INTERVAL = float(os.environ.get('WORDLE_SNAPSHOT_INTERVAL', 30))  # seconds between periodic saves
+
+MAGIC = b'WSNP'
+VERSION = 3
+STATUSES = (PLAYING, WON, LOST)
+STATE_WORDS = 625  # Mersenne Twister state plus its position
+NO_GAUSS = float('nan')
+BOARD_CODES = bytes(range(65, 91)) + b'\0'  # A-Z and empty boxes, deleted to find anything else
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def encode(game, items=(), elapsed=0.0, daily_date=None):
+    """
+    Args:
+        game (WordleGame): Game to save
+        items (list): Effect names of the gacha results applied so far
+        elapsed (float): Seconds played so far
+        daily_date (datetime.date): Day of the puzzle if the game is a daily one
+    Return:
+        bytes: The snapshot
+    """
+    buffer = bytearray(MAGIC)
+    buffer.append(VERSION)
+    put_varint(buffer, game.rng.seed)
+    put_varint(buffer, game.num_tries)
+    put_varint(buffer, game.current_row)
+    buffer += bytes((game.max_word_length, game.current_col, STATUSES.index(game.status)))
+    buffer += game.hidden_text.encode('ascii')
+    buffer += bytes(ord(letter) if letter else 0 for letter in game.letters)
+    buffer += game.box_state
+    buffer += game.feedback
+    buffer += bytes(game.is_letter_revealed)
+    buffer += game.keyboard.states
+    put_varint(buffer, len(game.history))
+    for guess, pattern in game.history:
+        buffer += guess.encode('ascii')
+        put_varint(buffer, int(pattern))
+    put_varint(buffer, len(items))
+    buffer += bytes(ITEM_INDEX[item] for item in items)
+    buffer += struct.pack('<d', elapsed)
+    put_varint(buffer, 0 if daily_date is None else daily_date.toordinal())
+
+    # only the streams drawn from so far exist, the others start from the seed anyway
+    streams = [(index, getattr(game.rng, name)) for index, name in enumerate(STREAMS) if _has_stream(game.rng, name)]
+    buffer.append(len(streams))
+    for index, stream in streams:
+        version, state, gauss_next = stream.getstate()
+        buffer.append(index)
+        buffer += array('I', state).tobytes()
+        buffer += struct.pack('<d', NO_GAUSS if gauss_next is None else gauss_next)
+    buffer += zlib.crc32(buffer).to_bytes(4, 'little')
+    return bytes(buffer)
+
+
+def _has_stream(rng, name):
+    # GameRandom creates a stream on first access, look at the slot without touching it
+    try:
+        object.__getattribute__(rng, name)
+    except AttributeError:
+        return False
+    return True
+
+
+def decode(data, game=None):
+    """
+    Rebuild a game from a snapshot
+    The whole snapshot is checked before the game is touched: a truncated file,
+    a value out of range, trailing bytes or a checksum mismatch raise SnapshotError.
+
+    Args:
+        data (bytes): The snapshot
+        game (WordleGame): Engine to load into (keeping its listener and dictionary), a new one if None
+    Return:
+        tuple: (WordleGame, list of gacha effect names, elapsed seconds, daily puzzle date or None)
+    """
+    try:
+        return _decode(data, game)
+    except (IndexError, ValueError, OverflowError, TypeError, struct.error, UnicodeDecodeError) as e:
+        raise SnapshotError(f"Corrupt snapshot: {e}") from e
+
+
+class _Cursor:
+    """
+    Reads a snapshot front to back, every read past the end raises SnapshotError
+    """
+    __slots__ = ('data', 'pos')
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def take(self, size, what):
+        end = self.pos + size
+        if end > len(self.data):
+            raise SnapshotError(f"Snapshot ends inside {what}")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def byte(self, what):
+        return self.take(1, what)[0]
+
+    def varint(self, what):
+        value, pos = get_varint(self.data, self.pos)
+        if pos < 0:
+            raise SnapshotError(f"Snapshot ends inside {what}")
+        self.pos = pos
+        return value
+
+    def letters(self, size, what):
+        chunk = self.take(size, what)
+        if chunk and (min(chunk) < 65 or max(chunk) > 90):
+            raise SnapshotError(f"Invalid letter in {what}")
+        return chunk.decode('ascii')
+
+
+def _check(values, limit, what):
+    if values and max(values) > limit:
+        raise SnapshotError(f"Value out of range in {what}")
+    return values
+
+
+def _decode(data, game):
+    if data[:4] != MAGIC:
+        raise SnapshotError("Not a snapshot file")
+    if len(data) < 5 or not 1 <= data[4] <= VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {data[4] if len(data) > 4 else None}")
+    version = data[4]
+    if version >= 3:
+        if len(data) < 9 or zlib.crc32(data[:-4]) != int.from_bytes(data[-4:], 'little'):
+            raise SnapshotError("Snapshot checksum mismatch")
+        data = data[:-4]
+    cursor = _Cursor(data, 5)
+
+    seed = cursor.varint('its header')
+    num_tries = cursor.varint('its header')
+    current_row = cursor.varint('its header')
+    length = cursor.byte('its header')
+    current_col = cursor.byte('its header')
+    status = cursor.byte('its header')
+    if num_tries < 1 or length < 1 or current_row > num_tries or current_col > length or status >= len(STATUSES):
+        raise SnapshotError("Invalid board header")
+    num_cells = num_tries * length
+    hidden_text = cursor.letters(length, 'the answer')
+    letters = cursor.take(num_cells, 'the board')
+    if letters.translate(None, BOARD_CODES):
+        raise SnapshotError("Invalid letter on the board")
+    box_state = _check(cursor.take(num_cells, 'the board'), REVEALED, 'the box states')
+    feedback = _check(cursor.take(num_cells, 'the board'), CORRECT, 'the feedback')
+    revealed = _check(cursor.take(length, 'the revealed letters'), 1, 'the revealed letters')
+    keyboard = _check(cursor.take(26, 'the keyboard'), CORRECT, 'the keyboard')
+
+    count = cursor.varint('the history')
+    if count > num_tries:
+        raise SnapshotError("More rows in the history than on the board")
+    history = []
+    num_patterns = 3 ** length
+    for _ in range(count):
+        guess = cursor.letters(length, 'the history')
+        pattern = cursor.varint('the history')
+        if pattern >= num_patterns:
+            raise SnapshotError("Invalid feedback pattern in the history")
+        history.append((guess, pattern))
+    count = cursor.varint('the gacha results')
+    items = [GACHA_ITEMS[index]['effect']
+             for index in _check(cursor.take(count, 'the gacha results'), len(GACHA_ITEMS) - 1, 'the gacha results')]
+    elapsed, = struct.unpack('<d', cursor.take(8, 'the elapsed time'))
+    daily_date = None
+    if version >= 2:
+        ordinal = cursor.varint('the daily date')
+        if ordinal:
+            daily_date = datetime.date.fromordinal(ordinal)
+
+    streams = []
+    for _ in range(cursor.byte('the random streams')):
+        index = cursor.byte('the random streams')
+        if index >= len(STREAMS):
+            raise SnapshotError("Unknown random stream")
+        state = tuple(array('I', cursor.take(STATE_WORDS * 4, 'the random streams')))
+        gauss_next, = struct.unpack('<d', cursor.take(8, 'the random streams'))
+        stream = random.Random()
+        stream.setstate((3, state, None if gauss_next != gauss_next else gauss_next))
+        streams.append((STREAMS[index], stream))
+    if cursor.pos != len(data):
+        raise SnapshotError("Trailing bytes after the snapshot")
+
+    # everything was read and checked, only now is the engine touched
+    rng = GameRandom(seed)
+    for name, stream in streams:
+        setattr(rng, name, stream)
+    if game is None:
+        game = WordleGame(hidden_text, num_tries=num_tries, rng=rng)
+    else:
+        game.reset(hidden_text, rng, num_tries)
+    game.letters = [chr(code) if code else '' for code in letters]
+    game.box_state = bytearray(box_state)
+    game.feedback = bytearray(feedback)
+    game.is_letter_revealed = [bool(value) for value in revealed]
+    game.keyboard.states[:] = keyboard
+    game.history = history
+    game.current_row = current_row
+    game.current_col = current_col
+    game.status = STATUSES[status]
+    game.reindex()
+    if game.listener is not None:
+        for index in range(num_cells):
+            game.listener(index)
+    return game, items, elapsed, daily_date
+
+
+def save(data, path=SNAPSHOT_PATH, durable=False):
+    """
+    Atomically replace the snapshot file
+
+    Args:
+        durable (bool): Also fsync, so the snapshot survives a power loss and not only a crash
+    """
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(data)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def load(path=SNAPSHOT_PATH):
+    """
+    Return:
+        bytes or None: The snapshot, None if there is none
+    """
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def delete(path=SNAPSHOT_PATH):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
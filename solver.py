@@ -0,0 +1,204 @@
+import argparse
+import time
+
+import numpy as np
+
+from scoring import PatternTable, all_correct
+from words import load_words, load_allowed, ANSWERS_PATH, ALLOWED_PATH
+
+"""
+Entropy-based solver
+Ranks guesses by the expected information (in bits) their feedback gives
+about the remaining answers. Counting is vectorized over the precomputed
+pattern table, so ranking a few hundred candidates takes milliseconds.
+"""
+
+MAX_COUNT_CELLS = 64 * 1024  # per-block pattern histogram, small enough to stay in cache
+
+
+def entropies(patterns, num_patterns):
+    """
+    Expected information of each guess
+
+    Args:
+        patterns (np.ndarray): (num_guesses, num_candidates) encoded patterns
+        num_patterns (int): Number of possible patterns
+    Return:
+        np.ndarray: Entropy in bits of each guess
+    """
+    num_guesses, num_candidates = patterns.shape
+    # c * log2(c) for every count a pattern bucket can reach
+    counts_range = np.arange(num_candidates + 1, dtype=np.float64)
+    xlogx = np.zeros(num_candidates + 1)
+    xlogx[1:] = counts_range[1:] * np.log2(counts_range[1:])
+
+    result = np.empty(num_guesses)
+    block = max(1, MAX_COUNT_CELLS // num_patterns)
+    for start in range(0, num_guesses, block):
+        chunk = patterns[start:start + block]
+        offsets = np.arange(chunk.shape[0], dtype=np.int32)[:, None] * num_patterns
+        counts = np.bincount((chunk + offsets).ravel(), minlength=chunk.shape[0] * num_patterns)
+        counts = counts.reshape(chunk.shape[0], num_patterns)
+        # H = log2(n) - sum(c * log2(c)) / n
+        result[start:start + block] = np.log2(num_candidates) - xlogx[counts].sum(axis=1) / num_candidates
+    return result
+
+
+class Solver:
+    def __init__(self, answers, guesses=None, table=None):
+        """
+        Args:
+            answers (iterable): Words that can be hidden
+            guesses (iterable): Words that can be guessed, defaults to the answers
+            table (PatternTable): Prebuilt table over these guesses and answers
+        """
+        if table is None:
+            answers = [word.upper() for word in answers]
+            guesses = answers if guesses is None else [word.upper() for word in guesses]
+            table = PatternTable(guesses, answers)
+        self.table = table
+        # answer-major copy, so gathering the remaining answers reads whole rows
+        self.by_answer = np.ascontiguousarray(table.matrix.T)
+        self.num_patterns = all_correct(table.word_length) + 1
+        self.is_answer = np.zeros(len(table.guesses), dtype=bool)
+        for word in table.answers:
+            if word in table.guess_index:
+                self.is_answer[table.guess_index[word]] = True
+        self._opening = None
+
+    def candidates(self, history=(), revealed=None):
+        """
+        Indices of the answers consistent with the feedback so far
+
+        Args:
+            history (list): (guess, pattern) pairs
+            revealed (dict): Column index -> letter known to be at that position
+        Return:
+            np.ndarray: Answer indices
+        """
+        remaining = np.arange(len(self.table.answers))
+        for guess, pattern in history:
+            remaining = remaining[self.table.patterns_against(guess, remaining) == pattern]
+        if revealed:
+            codes = self.table.answer_codes
+            for col, letter in revealed.items():
+                remaining = remaining[codes[remaining, col] == ord(letter.upper()) - ord('A')]
+        return remaining
+
+    def rank(self, candidates, top=10):
+        """
+        Best guesses against the given candidates
+
+        Args:
+            candidates (np.ndarray): Answer indices still possible
+            top (int): Number of guesses to return
+        Return:
+            list: (word, bits) pairs, best first
+        """
+        if len(candidates) == 0:
+            return []
+        if len(candidates) <= 2:
+            # any remaining answer is at least as good as the best split
+            return [(self.table.answers[i], float(len(candidates) - 1)) for i in candidates[:top]]
+
+        full = len(candidates) == len(self.table.answers)
+        if full and self._opening is not None:
+            scores = self._opening
+        else:
+            scores = entropies(self.by_answer[candidates].T, self.num_patterns)
+            if full:
+                self._opening = scores
+
+        # prefer guesses that could still be the answer when the information is equal
+        bonus = np.zeros(len(scores))
+        candidate_words = [self.table.answers[i] for i in candidates]
+        for word in candidate_words:
+            gi = self.table.guess_index.get(word)
+            if gi is not None:
+                bonus[gi] = 1e-6
+        order = np.argsort(-(scores + bonus), kind='stable')[:top]
+        return [(self.table.guesses[i], float(scores[i])) for i in order]
+
+    def best_guess(self, history=(), revealed=None):
+        ranked = self.rank(self.candidates(history, revealed), top=1)
+        return ranked[0][0] if ranked else None
+
+    def suggest(self, game):
+        """
+        Best next guess for a running WordleGame, in hard mode the best one it accepts
+        (an answer still possible always follows the hard mode rules)
+        """
+        revealed = {i: game.hidden_text[i] for i, known in enumerate(game.is_letter_revealed) if known}
+        if not game.hard_mode:
+            return self.best_guess(game.history, revealed)
+        for word, _ in self.rank(self.candidates(game.history, revealed), top=len(self.table.guesses)):
+            if game.hard_mode_error(word) is None:
+                return word
+        return None
+
+    def solve(self, answer, max_tries=None):
+        """
+        Play the solver against a known answer
+
+        Return:
+            list: Guesses made, the last one is the answer if it was found
+        """
+        answer_index = self.table.answer_index[answer.upper()]
+        solved = all_correct(self.table.word_length)
+        remaining = np.arange(len(self.table.answers))
+        guesses = []
+        while max_tries is None or len(guesses) < max_tries:
+            guess = self.rank(remaining, top=1)[0][0]
+            guesses.append(guess)
+            gi = self.table.guess_index.get(guess)
+            patterns = self.table.patterns_for(guess) if gi is None else self.table.matrix[gi]
+            pattern = patterns[answer_index]
+            if pattern == solved:
+                break
+            remaining = remaining[patterns[remaining] == pattern]
+        return guesses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Entropy-based Wordle solver')
+    parser.add_argument('--answers', default=ANSWERS_PATH, help='answer list file')
+    parser.add_argument('--allowed', default=ALLOWED_PATH, help='allowed guess list file (optional)')
+    parser.add_argument('--length', type=int, default=5, help='word length')
+    parser.add_argument('--top', type=int, default=10, help='number of opening guesses to show')
+    parser.add_argument('--word', help='solve a single answer and print the guesses')
+    parser.add_argument('--all', action='store_true', help='solve every answer and print the tries distribution')
+    args = parser.parse_args()
+
+    answers = list(load_words(args.answers, args.length))
+    allowed = load_allowed(args.allowed, args.length)
+    guesses = answers if allowed is None else list(allowed.union(load_words(args.answers, args.length)))
+
+    start = time.perf_counter()
+    solver = Solver(answers, guesses)
+    print(f"Built {len(solver.table.guesses)}x{len(solver.table.answers)} pattern table in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    opening = solver.rank(solver.candidates(), top=args.top)
+    print(f"Ranked openings in {(time.perf_counter() - start) * 1000:.1f}ms")
+    for word, bits in opening:
+        print(f"  {word}  {bits:.3f} bits")
+
+    if args.word:
+        print(' -> '.join(solver.solve(args.word)))
+
+    if args.all:
+        start = time.perf_counter()
+        distribution = {}
+        for answer in solver.table.answers:
+            tries = len(solver.solve(answer))
+            distribution[tries] = distribution.get(tries, 0) + 1
+        elapsed = time.perf_counter() - start
+        total = sum(distribution.values())
+        average = sum(tries * count for tries, count in distribution.items()) / total
+        print(f"Solved {total} answers in {elapsed:.2f}s ({elapsed / total * 1000:.2f}ms each), average {average:.3f} tries")
+        for tries in sorted(distribution):
+            print(f"  {tries}: {distribution[tries]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from engine import WON
+
+"""
+Durable game statistics
+Every finished game is appended to an SQLite log in WAL mode. Records are
+queued by the UI thread and written in batches by a background thread, one
+transaction per batch, so a commit never blocks a frame. Totals and streaks
+are kept in a one-row summary updated in the same transaction as the log,
+and the other aggregates are answered from indexes, so reading the stats
+stays cheap with millions of recorded games.
+"""
+
+STATS_PATH = os.environ.get('WORDLE_STATS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stats.db'))
+
+# outcomes besides WON and engine.LOST
+SURRENDERED = 'surrendered'
+ABANDONED = 'abandoned'  # left for the menu mid-game, breaks the streak but is not counted as a game
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    ended REAL NOT NULL,
+    answer TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    tries INTEGER NOT NULL,
+    rolls INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    seed INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_outcome_tries ON games (outcome, tries);
+DROP INDEX IF EXISTS games_answer;
+CREATE INDEX IF NOT EXISTS games_seed ON games (seed);
+CREATE TABLE IF NOT EXISTS rolls (
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rolls_item ON rolls (item);
+CREATE INDEX IF NOT EXISTS rolls_game ON rolls (game_id);
+CREATE TABLE IF NOT EXISTS summary (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    best_streak INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO summary VALUES (0, 0, 0, 0, 0);
+"""
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')  # durable at checkpoints, enough for stats
+    return connection
+
+
+def to_signed(seed):
+    # SQLite integers are signed 64-bit, GameRandom seeds are unsigned
+    if seed is not None and seed >= 1 << 63:
+        return seed - (1 << 64)
+    return seed
+
+
+def from_signed(seed):
+    if seed is not None and seed < 0:
+        return seed + (1 << 64)
+    return seed
+
+
+class GameRecord:
+    """
+    One finished game
+    """
+    __slots__ = ('answer', 'outcome', 'tries', 'items', 'duration', 'seed', 'ended')
+
+    def __init__(self, answer, outcome, tries, items=(), duration=0.0, seed=None, ended=None):
+        """
+        Args:
+            answer (str): Hidden word
+            outcome (str): WON, engine.LOST, SURRENDERED or ABANDONED
+            tries (int): Rows submitted
+            items (list): Effect names of the gacha results applied, in order
+            duration (float): Seconds from the start of the game to its end
+            seed (int): Seed of the game's GameRandom
+            ended (float): Unix time of the end, now if None
+        """
+        self.answer = answer
+        self.outcome = outcome
+        self.tries = tries
+        self.items = list(items)
+        self.duration = duration
+        self.seed = seed
+        self.ended = time.time() if ended is None else ended
+
+
+class StatsStore:
+    def __init__(self, path=STATS_PATH, batch_size=256):
+        """
+        Args:
+            path (str): Database file, ':memory:' is not supported since reads use their own connection
+            batch_size (int): Most records written in one transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._reader = None
+        self._session_seeds = set()  # seeds recorded by this process, committed or still queued
+        self.closed = False
+
+        connection = connect(path)
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name='stats-writer', daemon=True)
+        self._writer.start()
+
+    def record(self, record):
+        """
+        Queue a finished game, returns immediately
+        """
+        if record.seed is not None:
+            self._session_seeds.add(record.seed)
+        self._queue.put(record)
+
+    def flush(self):
+        """
+        Wait until every queued record is committed
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Commit what is left and stop the writer thread, later calls do nothing
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _write_loop(self):
+        connection = connect(self.path)
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not None]
+            running = len(records) == len(batch)
+            try:
+                if records:
+                    self._write(connection, records)
+            except (sqlite3.Error, ValueError, OverflowError) as e:
+                print(f"Could not save game statistics: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+    def _write(self, connection, records):
+        with connection:
+            games, wins, streak, best_streak = connection.execute(
+                'SELECT games, wins, streak, best_streak FROM summary WHERE id = 0').fetchone()
+            for record in records:
+                cursor = connection.execute(
+                    'INSERT INTO games (ended, answer, outcome, tries, rolls, duration, seed) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (record.ended, record.answer, record.outcome, record.tries, len(record.items), record.duration,
+                     to_signed(record.seed)))
+                if record.items:
+                    game_id = cursor.lastrowid
+                    connection.executemany('INSERT INTO rolls (game_id, item) VALUES (?, ?)',
+                                           [(game_id, item) for item in record.items])
+                if record.outcome != ABANDONED:
+                    games += 1
+                if record.outcome == WON:
+                    wins += 1
+                    streak += 1
+                    best_streak = max(best_streak, streak)
+                else:
+                    streak = 0
+            connection.execute('UPDATE summary SET games = ?, wins = ?, streak = ?, best_streak = ? WHERE id = 0',
+                               (games, wins, streak, best_streak))
+
+    def _read(self, sql, params=()):
+        # reads run on the calling thread; under WAL they never wait for the writer
+        if self._reader is None:
+            self._reader = connect(self.path)
+        return self._reader.execute(sql, params).fetchall()
+
+    def totals(self):
+        """
+        Return:
+            dict: games, wins, streak and best_streak of every committed record
+        """
+        games, wins, streak, best_streak = self._read(
+            'SELECT games, wins, streak, best_streak FROM summary WHERE id = 0')[0]
+        return {'games': games, 'wins': wins, 'streak': streak, 'best_streak': best_streak}
+
+    def distribution(self):
+        """
+        Return:
+            dict: Number of tries -> number of games won in that many tries
+        """
+        return dict(self._read('SELECT tries, COUNT(*) FROM games WHERE outcome = ? GROUP BY tries', (WON,)))
+
+    def outcomes(self):
+        """
+        Return:
+            dict: Outcome -> number of games
+        """
+        return dict(self._read('SELECT outcome, COUNT(*) FROM games GROUP BY outcome'))
+
+    def item_counts(self):
+        """
+        Return:
+            dict: Gacha effect name -> number of times it was rolled
+        """
+        return dict(self._read('SELECT item, COUNT(*) FROM rolls GROUP BY item'))
+
+    def played(self, seed):
+        """
+        Answered without waiting for the writer: records still queued are known from memory
+
+        Return:
+            bool: True if a game with this seed was recorded, whatever its outcome
+        """
+        if seed in self._session_seeds:
+            return True
+        return bool(self._read('SELECT 1 FROM games WHERE seed = ? LIMIT 1', (to_signed(seed),)))
+
+    def recent(self, limit=10):
+        """
+        Return:
+            list: (answer, outcome, tries, rolls, duration, seed) of the latest games, newest first
+        """
+        rows = self._read('SELECT answer, outcome, tries, rolls, duration, seed FROM games ORDER BY id DESC LIMIT ?', (limit,))
+        return [row[:5] + (from_signed(row[5]),) for row in rows]
@@ -0,0 +1,18 @@
+import os
+import tempfile
+
+"""
+Every test runs headless and keeps its statistics, replays and snapshots in a
+throwaway directory; set before the game modules read these variables on import
+"""
+
+DATA_DIR = tempfile.mkdtemp(prefix='wordle-tests-')
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+os.environ.setdefault('KIVY_LOG_MODE', 'PYTHON')
+os.environ['WORDLE_STATS'] = os.path.join(DATA_DIR, 'stats.db')
+os.environ['WORDLE_REPLAY'] = os.path.join(DATA_DIR, 'replays.bin')
+os.environ['WORDLE_SNAPSHOT'] = os.path.join(DATA_DIR, 'snapshot.bin')
+for name in ('WORDLE_SEED', 'WORDLE_DAILY', 'WORDLE_LENGTH', 'WORDLE_TRIES', 'WORDLE_ANSWERS', 'WORDLE_ALLOWED'):
+    os.environ.pop(name, None)
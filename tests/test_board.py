@@ -0,0 +1,52 @@
+import snapshot
+from engine import WordleGame
+from game_screen import GameBoxLayout, GameScreenManager
+from rng import GameRandom
+
+"""
+The board follows the engine's size: word length and number of tries
+"""
+
+
+def assert_board_matches(board, game):
+    assert (board.max_word_length, board.num_tries) == (game.max_word_length, game.num_tries)
+    assert len(board.cells) == len(board.children) == game.max_word_length * game.num_tries
+    gap = board.spacing[0]
+    assert board.width == game.max_word_length * board.box_size + (game.max_word_length + 1) * gap
+    assert board.height == game.num_tries * board.box_size + (game.num_tries + 1) * gap
+    assert all(cell.size == [board.box_size, board.box_size] for cell in board.cells)
+
+
+def test_board_rebuilds_when_the_game_changes_size():
+    game = WordleGame('CRANE', rng=GameRandom(1))
+    board = GameBoxLayout(game)
+    assert_board_matches(board, game)
+
+    game.reset('ELEPHANT', GameRandom(2), 10)
+    board.flush()
+    assert_board_matches(board, game)
+
+    game.type_letter('E')
+    game.reset('FROG', GameRandom(3), 3)
+    board.flush()
+    assert_board_matches(board, game)
+    assert all(cell.text == '' for cell in board.cells)
+
+
+def test_screen_uses_the_configured_size_and_resumes_another(monkeypatch):
+    snapshot.delete(snapshot.SNAPSHOT_PATH)
+    monkeypatch.setenv('WORDLE_LENGTH', '8')
+    monkeypatch.setenv('WORDLE_TRIES', '10')
+    screen = GameScreenManager(name='game_screen')
+    assert (screen.game.max_word_length, screen.game.num_tries) == (8, 10)
+    assert_board_matches(screen.gamebox_layout, screen.game)
+    hidden_text = screen.game.hidden_text
+    screen.shutdown()  # saves the 8-letter game in progress
+
+    monkeypatch.delenv('WORDLE_LENGTH')
+    monkeypatch.delenv('WORDLE_TRIES')
+    resumed = GameScreenManager(name='game_screen')
+    assert resumed.game.hidden_text == hidden_text
+    assert_board_matches(resumed.gamebox_layout, resumed.game)
+    resumed.shutdown()
+    snapshot.delete(snapshot.SNAPSHOT_PATH)
@@ -0,0 +1,79 @@
+from engine import WordleGame, LOCKED, CORRECT, PRESENT, ABSENT, NO_FEEDBACK
+from rng import GameRandom
+from solver import Solver
+
+"""
+Letter knowledge and the hard mode rules built on it
+"""
+
+
+def play(game, word):
+    for letter in word:
+        game.type_letter(letter)
+    game.submit()
+
+
+def traced_game(hard_mode=True):
+    # TRACE against CRANE: R, A and E green, C yellow, T gray
+    game = WordleGame('CRANE', rng=GameRandom(1), hard_mode=hard_mode)
+    play(game, 'TRACE')
+    return game
+
+
+def test_letter_state_query():
+    keyboard = traced_game().keyboard
+    assert keyboard.state('R') == CORRECT
+    assert keyboard.state('c') == PRESENT
+    assert keyboard.state('T') == ABSENT
+    assert keyboard.state('Z') == NO_FEEDBACK
+
+
+def test_hard_mode_rules():
+    game = traced_game()
+    assert game.hard_mode_error('CLAVE') == "Letter 2 must be R"
+    assert game.hard_mode_error('BRAVE') == "Guess must contain C"
+    assert game.hard_mode_error('crane') is None
+    assert game.hard_mode_error('CRAZE') is None  # gray letters may be used again, as in the original game
+
+
+def test_green_letters_must_keep_their_column():
+    game = traced_game()
+    # contains every known letter, but E moved out of its green column
+    assert game.hard_mode_error('ERACR') == "Letter 5 must be E"
+
+
+def test_submit_validation_in_hard_mode():
+    game = traced_game()
+    for letter in 'BRAVE':
+        game.type_letter(letter)
+    assert game.row_error(game.current_row) == "Guess must contain C"
+    assert not game.is_valid_row(game.current_row)
+
+    easy = traced_game(hard_mode=False)
+    for letter in 'BRAVE':
+        easy.type_letter(letter)
+    assert easy.row_error(easy.current_row) is None
+
+
+def test_rows_with_cursed_letters_are_exempt():
+    game = traced_game()
+    row = game.current_row
+    game.add_letter_at(row, 0, 'Z')
+    game.set_box_state(row, 0, LOCKED)
+    for letter in 'LOBS':
+        game.type_letter(letter)
+    assert game.row_error(row) is None
+
+
+def test_hint_follows_hard_mode():
+    answers = ['CRANE', 'CRATE', 'CRAZE', 'CRAVE', 'CRAKE']
+    # splits every remaining answer but drops the green C, R, A and E
+    solver = Solver(answers, answers + ['TNZVK'])
+    game = WordleGame('CRANE', rng=GameRandom(1))
+    play(game, 'CRAPE')
+    assert solver.suggest(game) == 'TNZVK'
+
+    game.hard_mode = True
+    guess = solver.suggest(game)
+    assert guess in answers
+    assert game.hard_mode_error(guess) is None
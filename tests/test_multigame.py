@@ -0,0 +1,39 @@
+from gacha import Gacha
+from multigame import MultiGame, default_tries
+from rng import GameRandom
+
+"""
+Multi-board input rules
+"""
+
+ANSWERS = ['CRANE', 'SLOTH', 'PIVOT', 'GUMBO']
+
+
+def test_default_tries_is_boards_plus_word_length():
+    assert default_tries(4) == 9
+    assert default_tries(8) == 13
+    assert default_tries(32) == 37
+    assert MultiGame(ANSWERS, rng=GameRandom(1)).num_tries == 9
+
+
+def test_no_editing_after_the_game_ends():
+    game = MultiGame(ANSWERS, rng=GameRandom(1))
+    for letter in 'BRI':
+        assert game.type_letter(letter)
+    game.apply(Gacha(verbose=False).lose_game)
+    assert game.is_over
+
+    rows = [board.letters[:] for board in game.boards]
+    assert not game.backspace()
+    assert not game.type_letter('E')
+    assert game.guess == ['B', 'R', 'I']
+    assert [board.letters for board in game.boards] == rows
+
+
+def test_backspace_while_playing():
+    game = MultiGame(ANSWERS, rng=GameRandom(1))
+    game.type_letter('B')
+    game.type_letter('R')
+    assert game.backspace()
+    assert game.guess == ['B']
+    assert all(board.letters[:2] == ['B', ''] for board in game.boards)
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from server import GameServer, encode_frame, read_frame, WS_TEXT, WS_CLOSE, WS_MESSAGE_TOO_BIG, MAX_BODY
+
+"""
+Bad input must get an error response from the server instead of a dropped connection
+"""
+
+
+async def exchange(request, websocket_messages=None):
+    """
+    Send raw bytes to a fresh server and read the reply
+
+    Args:
+        request (bytes): Raw HTTP request
+        websocket_messages (list): JSON messages sent after a WebSocket upgrade
+    Return:
+        tuple: (status, JSON body) for HTTP, or the list of WebSocket responses
+    """
+    game_server = GameServer()
+    server = await asyncio.start_server(game_server.handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(request)
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 5)
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split(' ')[1])
+        if websocket_messages is not None:
+            responses = []
+            for message in websocket_messages:
+                writer.write(encode_frame(WS_TEXT, json.dumps(message).encode(), os.urandom(4)))
+                _, payload = await asyncio.wait_for(read_frame(reader), 5)
+                responses.append(json.loads(payload))
+            return responses
+        length = next(int(line.partition(':')[2]) for line in lines if line.lower().startswith('content-length'))
+        return status, json.loads(await asyncio.wait_for(reader.readexactly(length), 5))
+    finally:
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+
+def post(op, body, content_length=None):
+    if content_length is None:
+        content_length = str(len(body))
+    return (f"POST /{op} HTTP/1.1\r\nHost: test\r\nContent-Length: {content_length}\r\n\r\n".encode()
+            + body)
+
+
+@pytest.mark.parametrize('session', [['abc'], 5, {'id': 'abc'}, None])
+def test_session_must_be_a_string(session):
+    status, result = asyncio.run(exchange(post('guess', json.dumps({'session': session, 'word': 'CRANE'}).encode())))
+    assert status == 400
+    assert 'session' in result['error']
+
+
+def test_unknown_session_is_not_found():
+    status, _ = asyncio.run(exchange(post('state', b'{"session": "nope"}')))
+    assert status == 404
+
+
+@pytest.mark.parametrize('content_length', ['abc', '-5', '+5', '1_0', '9' * 30])
+def test_invalid_content_length(content_length):
+    status, result = asyncio.run(exchange(post('start', b'', content_length)))
+    assert status == 400
+    assert result['error'] == "Invalid Content-Length"
+
+
+def test_body_over_the_limit():
+    status, _ = asyncio.run(exchange(post('start', b'', str(MAX_BODY + 1))))
+    assert status == 413
+
+
+def test_valid_request_still_works():
+    status, result = asyncio.run(exchange(post('start', b'{"seed": 1}')))
+    assert status == 200
+    assert result['seed'] == 1
+
+
+def test_websocket_bad_session_and_op():
+    upgrade = (b"GET /ws HTTP/1.1\r\nHost: test\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+               b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n")
+    responses = asyncio.run(exchange(upgrade, [
+        {'op': 'state', 'session': ['abc']},
+        {'op': ['state']},
+        {'op': 'start'},
+    ]))
+    assert [response['status'] for response in responses] == [400, 404, 200]
+
+
+def masked_frame(opcode, payload, final):
+    mask = os.urandom(4)
+    frame = encode_frame(opcode, payload, mask)
+    return bytes((frame[0] if final else frame[0] & 0x7f,)) + frame[1:]
+
+
+async def send_fragmented(total, fragment_size):
+    server = await asyncio.start_server(GameServer().handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(b"GET /ws HTTP/1.1\r\nHost: test\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n")
+        await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 5)
+        sent = 0
+        while sent < total:
+            size = min(fragment_size, total - sent)
+            opcode = WS_TEXT if sent == 0 else 0  # then continuation frames
+            writer.write(masked_frame(opcode, b' ' * size, final=sent + size == total))
+            sent += size
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass  # the server may close before every fragment is sent
+        return await asyncio.wait_for(read_frame(reader), 5)
+    finally:
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+
+def test_websocket_fragmented_message_over_the_limit():
+    fragment_size = MAX_BODY // 4  # every frame alone is well under the limit
+    opcode, payload = asyncio.run(send_fragmented(MAX_BODY * 3, fragment_size))
+    assert opcode == WS_CLOSE
+    assert int.from_bytes(payload[:2], 'big') == WS_MESSAGE_TOO_BIG
+
+
+def test_websocket_fragmented_message_under_the_limit():
+    # a blank message split over several frames is read whole and answered
+    opcode, payload = asyncio.run(send_fragmented(MAX_BODY - 16, MAX_BODY // 4))
+    assert opcode == WS_TEXT
+    assert json.loads(payload)['status'] == 400
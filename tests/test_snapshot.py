@@ -0,0 +1,125 @@
+import datetime
+import struct
+import zlib
+
+import pytest
+
+import snapshot
+from engine import WordleGame
+from gacha import Gacha, GACHA_ITEMS
+from rng import GameRandom
+from snapshot import SnapshotError
+
+"""
+Snapshots round-trip exactly and any damaged file is refused with SnapshotError
+"""
+
+ELAPSED = 12.345  # its bytes are easy to find in a snapshot
+
+
+def played_game(seed=1):
+    rng = GameRandom(seed)
+    game = WordleGame('CRANE', rng=rng)
+    gacha = Gacha(verbose=False)
+    items = []
+    for word in ('SLOTH', 'PIVOT'):
+        for letter in word:
+            game.type_letter(letter)
+        game.submit()
+        effect = GACHA_ITEMS[rng.strip.randrange(len(GACHA_ITEMS))]['effect']
+        if effect not in ('win_game', 'lose_game'):
+            getattr(gacha, effect)(game, game.current_row)
+            items.append(effect)
+    return game, items
+
+
+def resign(data):
+    # recompute the checksum, so the checks behind it are exercised
+    return data[:-4] + zlib.crc32(data[:-4]).to_bytes(4, 'little')
+
+
+def board_of(game):
+    return (game.hidden_text, game.num_tries, game.letters, bytes(game.box_state), bytes(game.feedback),
+            game.is_letter_revealed, bytes(game.keyboard.states), game.history, game.current_row,
+            game.current_col, game.status)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_round_trip(seed):
+    game, items = played_game(seed)
+    date = datetime.date(2026, 10, 18)
+    resumed, resumed_items, elapsed, daily_date = snapshot.decode(snapshot.encode(game, items, ELAPSED, date))
+    assert board_of(resumed) == board_of(game)
+    assert (resumed_items, elapsed, daily_date) == (items, ELAPSED, date)
+    assert resumed.rng.curse.random() == game.rng.curse.random()
+
+
+def test_every_truncation_is_refused():
+    game, items = played_game()
+    data = snapshot.encode(game, items, ELAPSED)
+    for size in range(len(data)):
+        with pytest.raises(SnapshotError):
+            snapshot.decode(data[:size])
+
+
+def test_every_truncation_is_refused_without_checksum():
+    # version 2 snapshots have no checksum, their structure alone must catch a short file
+    game, items = played_game()
+    data = snapshot.encode(game, items, ELAPSED)[:-4]
+    data = data[:4] + bytes((2,)) + data[5:]
+    assert board_of(snapshot.decode(data)[0]) == board_of(game)
+    for size in range(len(data)):
+        with pytest.raises(SnapshotError):
+            snapshot.decode(data[:size])
+
+
+@pytest.mark.parametrize('damage', [
+    lambda game: game.box_state.__setitem__(0, 9),
+    lambda game: game.feedback.__setitem__(0, 7),
+    lambda game: game.keyboard.states.__setitem__(3, 200),
+    lambda game: game.letters.__setitem__(7, '#'),
+    lambda game: game.history.append(('CRANE', 3 ** 5)),
+    lambda game: game.history.__setitem__(0, ('cr4ne', 0)),
+    lambda game: setattr(game, 'current_col', 6),
+])
+def test_values_out_of_range_are_refused(damage):
+    game, items = played_game()
+    damage(game)
+    with pytest.raises(SnapshotError):
+        snapshot.decode(snapshot.encode(game, items, ELAPSED))
+
+
+def test_unknown_gacha_item_is_refused():
+    game, _ = played_game()
+    data = bytearray(snapshot.encode(game, ['add_curse'], ELAPSED))
+    data[data.index(struct.pack('<d', ELAPSED)) - 1] = len(GACHA_ITEMS)
+    with pytest.raises(SnapshotError):
+        snapshot.decode(resign(bytes(data)))
+
+
+def test_trailing_bytes_are_refused():
+    game, items = played_game()
+    data = snapshot.encode(game, items, ELAPSED)
+    with pytest.raises(SnapshotError):
+        snapshot.decode(resign(data[:-4] + b'\0' + data[-4:]))
+
+
+def test_flipped_bit_is_refused():
+    game, items = played_game()
+    data = snapshot.encode(game, items, ELAPSED)
+    for index in range(5, len(data), 97):
+        damaged = bytearray(data)
+        damaged[index] ^= 0x10
+        with pytest.raises(SnapshotError):
+            snapshot.decode(bytes(damaged))
+
+
+def test_damaged_snapshot_does_not_stop_the_app():
+    from game_screen import GameScreenManager
+    game, items = played_game()
+    game.box_state[0] = 9
+    snapshot.save(snapshot.encode(game, items, ELAPSED), snapshot.SNAPSHOT_PATH)
+    screen = GameScreenManager(name='game_screen')
+    assert screen.game.current_row == 0  # a new game instead of the damaged one
+    screen.shutdown()
+    snapshot.delete(snapshot.SNAPSHOT_PATH)
@@ -0,0 +1,54 @@
+import threading
+
+from stats import StatsStore, GameRecord, ABANDONED
+
+"""
+Statistics store queries
+"""
+
+
+def test_played_sees_queued_records_without_waiting(tmp_path):
+    path = str(tmp_path / 'stats.db')
+    store = StatsStore(path)
+    release = threading.Event()
+    write = store._write
+    store._write = lambda connection, records: (release.wait(5), write(connection, records))
+    store.record(GameRecord('CRANE', ABANDONED, 2, seed=(1 << 64) - 1))
+    assert store.played((1 << 64) - 1)  # answered while the writer is still blocked
+    assert not store.played(42)
+    release.set()
+    store.close()
+
+    reopened = StatsStore(path)
+    assert reopened.played((1 << 64) - 1)  # committed, found through the seed index
+    assert not reopened.played(42)
+    reopened.close()
+
+
+def test_aggregates_feed_the_statistics_popup(tmp_path):
+    from engine import WON, LOST
+    from stats import SURRENDERED
+    from main_menu import stats_text
+
+    store = StatsStore(str(tmp_path / 'stats.db'))
+    assert "No wins yet" in stats_text(store)
+    store.record(GameRecord('CRANE', WON, 3, ['add_curse', 'add_tries'], 40.0, seed=1))
+    store.record(GameRecord('SLATE', WON, 3, ['add_curse'], 20.0, seed=2))
+    store.record(GameRecord('PIANO', WON, 5, (), 60.0, seed=3))
+    store.record(GameRecord('GHOST', LOST, 6, ['add_tries'], 90.0, seed=4))
+    store.record(GameRecord('QUIRK', SURRENDERED, 2, (), 10.0, seed=5))
+    store.flush()
+
+    assert store.distribution() == {3: 2, 5: 1}
+    assert store.outcomes() == {WON: 3, LOST: 1, SURRENDERED: 1}
+    assert store.item_counts() == {'add_curse': 2, 'add_tries': 2}
+    assert store.recent(2) == [('QUIRK', SURRENDERED, 2, 0, 10.0, 5), ('GHOST', LOST, 6, 1, 90.0, 4)]
+
+    text = stats_text(store, recent_games=2)
+    assert "[b]Played:[/b] 5" in text and "[b]Win %:[/b] 60" in text
+    assert " 3  [color=6ac764]" + '|' * 30 + "[/color] 2" in text
+    assert " 5  [color=6ac764]" + '|' * 15 + "[/color] 1" in text
+    assert "Won: 3    Lost: 1    Surrendered: 1    Abandoned: 0" in text
+    assert "Add Curse: 2" in text and "Add Tries: 2" in text
+    assert "QUIRK" in text and "GHOST" in text and "PIANO" not in text
+    store.close()
@@ -0,0 +1,184 @@
+import functools
+import math
+import os
+import time
+from array import array
+
+"""
+Opt-in timing instrumentation
+Set WORDLE_TIMING=1 to time every frame and the hot paths decorated with
+@timed into fixed-size log-scale histograms, dumped to CSV when the app
+stops; WORDLE_TIMING=overlay also shows p50/p99 on screen. When it is off
+@timed returns the function untouched, so disabled timing costs nothing.
+"""
+
+MODE = os.environ.get('WORDLE_TIMING', '')
+ENABLED = MODE not in ('', '0')
+CSV_PATH = os.environ.get('WORDLE_TIMING_CSV', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'timing.csv'))
+
+# buckets split every doubling of the duration in 8, from 1us up to about 16s
+BUCKETS_PER_OCTAVE = 8
+NUM_BUCKETS = 24 * BUCKETS_PER_OCTAVE
+MIN_SECONDS = 1e-6
+
+
+class Histogram:
+    """
+    Durations in log-scale buckets, so memory is fixed and percentiles are within ~9%
+    """
+    __slots__ = ('name', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = array('L', [0]) * NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        if seconds > MIN_SECONDS:
+            bucket = min(int(math.log2(seconds / MIN_SECONDS) * BUCKETS_PER_OCTAVE), NUM_BUCKETS - 1)
+        else:
+            bucket = 0
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @staticmethod
+    def bucket_bounds(bucket):
+        """
+        Return:
+            tuple: (low, high) of a bucket in seconds
+        """
+        return (MIN_SECONDS * 2 ** (bucket / BUCKETS_PER_OCTAVE),
+                MIN_SECONDS * 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE))
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket holding the p-th percentile, in seconds
+
+        Args:
+            p (float): Percentile between 0 and 100
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_bounds(bucket)[1], self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+HISTOGRAMS = {}
+
+
+def histogram(name):
+    hist = HISTOGRAMS.get(name)
+    if hist is None:
+        hist = HISTOGRAMS[name] = Histogram(name)
+    return hist
+
+
+def timed(name):
+    """
+    Decorator recording the duration of every call under the given name, a no-op when timing is off
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+        hist = histogram(name)
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.add(perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def summary(names=None):
+    """
+    Return:
+        str: One line per histogram with count, p50 and p99 in milliseconds
+    """
+    lines = []
+    for name in names or sorted(HISTOGRAMS):
+        hist = HISTOGRAMS.get(name)
+        if hist is None or hist.count == 0:
+            continue
+        lines.append(f"{name}: n={hist.count} p50={hist.percentile(50) * 1000:.2f}ms "
+                     f"p99={hist.percentile(99) * 1000:.2f}ms max={hist.max * 1000:.2f}ms")
+    return '\n'.join(lines)
+
+
+def dump(path=CSV_PATH):
+    """
+    Write every non-empty bucket as name,low_ms,high_ms,count
+    """
+    with open(path, 'w') as f:
+        f.write('name,low_ms,high_ms,count\n')
+        for name in sorted(HISTOGRAMS):
+            for bucket, count in enumerate(HISTOGRAMS[name].counts):
+                if count:
+                    low, high = Histogram.bucket_bounds(bucket)
+                    f.write(f'{name},{low * 1000:.6f},{high * 1000:.6f},{count}\n')
+    print(f"Timing histograms written to {path}")
+    print(summary())
+
+
+class FrameTimer:
+    """
+    Records the interval between frames and refreshes the optional overlay
+    """
+    def __init__(self, overlay=False):
+        from kivy.clock import Clock
+
+        self.frames = histogram('frame')
+        self.label = None
+        Clock.schedule_interval(self.on_frame, 0)
+        if overlay:
+            from kivy.core.window import Window
+            from kivy.uix.label import Label
+
+            self.label = Label(text='', font_size='12sp', halign='left', valign='top',
+                               size_hint=(None, None), color=(1, 1, 0, 1))
+            self.label.bind(texture_size=self.label.setter('size'))
+            Window.add_widget(self.label)
+            Window.bind(size=self.place_overlay)
+            self.place_overlay()
+            Clock.schedule_interval(self.update_overlay, 0.5)
+
+    def on_frame(self, dt):
+        self.frames.add(dt)
+
+    def place_overlay(self, *args):
+        from kivy.core.window import Window
+
+        self.label.pos = (5, Window.height - self.label.height - 5)
+
+    def update_overlay(self, dt):
+        self.label.text = summary()
+        self.place_overlay()
+
+
+def install():
+    """
+    Start timing frames, does nothing unless WORDLE_TIMING is set
+
+    Return:
+        FrameTimer or None
+    """
+    if not ENABLED:
+        return None
+    return FrameTimer(overlay=MODE == 'overlay')
@@ -0,0 +1,136 @@
+import os
+from array import array
+
+"""
+Word lists loaded from text files
+Every word is packed into one integer (5 bits per letter), so a list of
+tens of thousands of words is a flat array plus a set of small ints and
+checking a guess is a single hash lookup.
+"""
+
+WORDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'words')
+ANSWERS_PATH = os.environ.get('WORDLE_ANSWERS', os.path.join(WORDS_DIR, 'answers.txt'))
+ALLOWED_PATH = os.environ.get('WORDLE_ALLOWED', os.path.join(WORDS_DIR, 'allowed.txt'))
+
+BITS_PER_LETTER = 5
+MIN_WORD_LENGTH = 4
+MAX_WORD_LENGTH = 12  # 12 * 5 bits still fits an unsigned 64-bit slot
+
+
+def answers_path(word_length=5):
+    """
+    Answer list of a word length: words/answers.txt for 5 letters, words/answers<length>.txt
+    for the others, or the WORDLE_ANSWERS file for every length when it is set
+    """
+    if word_length == 5 or 'WORDLE_ANSWERS' in os.environ:
+        return ANSWERS_PATH
+    return os.path.join(WORDS_DIR, f'answers{word_length}.txt')
+
+
+def allowed_path(word_length=5):
+    if word_length == 5 or 'WORDLE_ALLOWED' in os.environ:
+        return ALLOWED_PATH
+    return os.path.join(WORDS_DIR, f'allowed{word_length}.txt')
+
+
+def pack(word):
+    """
+    Pack an uppercase A-Z word into an integer, letter i uses bits [5i, 5i+5)
+
+    Return:
+        int: The packed code, or -1 if the word has other characters
+    """
+    code = 0
+    for ch in reversed(word):
+        value = ord(ch) - 64  # 'A' -> 1, so codes of different lengths never collide
+        if not 1 <= value <= 26:
+            return -1
+        code = (code << BITS_PER_LETTER) | value
+    return code
+
+
+def unpack(code):
+    letters = []
+    while code:
+        letters.append(chr((code & 31) + 64))
+        code >>= BITS_PER_LETTER
+    return ''.join(letters)
+
+
+class WordList:
+    """
+    Words of a single length stored as packed integer codes
+    Supports len(), indexing (so random.choice works) and constant-time `in`.
+    """
+    def __init__(self, words, word_length=5):
+        """
+        Args:
+            words (iterable): Words of any case, words of another length are skipped
+            word_length (int): Length of the words to keep
+        """
+        if not 1 <= word_length <= MAX_WORD_LENGTH:
+            raise ValueError(f"Word length must be between 1 and {MAX_WORD_LENGTH}, got {word_length}")
+        self.word_length = word_length
+        codes = set()
+        for word in words:
+            if len(word) == word_length:
+                code = pack(word.upper())
+                if code >= 0:
+                    codes.add(code)
+        self.codes = array('Q', sorted(codes))
+        self._lookup = frozenset(codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return unpack(self.codes[index])
+
+    def __iter__(self):
+        for code in self.codes:
+            yield unpack(code)
+
+    def __contains__(self, word):
+        if len(word) != self.word_length:
+            return False
+        return pack(word.upper()) in self._lookup
+
+    def union(self, other):
+        """
+        New list holding the words of both lists
+        """
+        merged = WordList((), self.word_length)
+        codes = self._lookup | other._lookup
+        merged.codes = array('Q', sorted(codes))
+        merged._lookup = frozenset(codes)
+        return merged
+
+
+def load_words(path, word_length=5):
+    """
+    Load a word list file (one word per line, blank lines and '#' comments ignored)
+
+    Args:
+        path (str): Path of the file
+        word_length (int): Length of the words to keep
+    Return:
+        WordList: The loaded words
+    """
+    with open(path, encoding='utf-8') as f:
+        words = [line.strip() for line in f if not line.startswith('#')]
+    return WordList(words, word_length)
+
+
+def load_allowed(path=ALLOWED_PATH, word_length=5):
+    """
+    Load the allowed guesses if the file exists
+    Validation is opt-in: only the answer lists ship with the game, and checking
+    guesses against them alone would reject nearly every real word.
+
+    Return:
+        WordList or None: None means every guess is accepted
+    """
+    if not os.path.exists(path):
+        print(f"No allowed-guess list at {path}, guesses are not checked against a dictionary")
+        return None
+    return load_words(path, word_length)